@@ -0,0 +1,73 @@
+"""
+Benchmark of loading the sessions of one report from the database and from the columnar store.
+
+The times include the conversion of the timestamps into datetimes, which the computations need.
+
+Run from the project root: python -m benchmarks.columnar_store [--sessions 2000000] [--identifiers 5]
+"""
+
+import argparse
+import os
+import tempfile
+from time import perf_counter
+
+import pandas as pd
+
+import database.columnar as columnar
+import database.driver as driver
+from benchmarks.synthetic import get_sessions
+
+
+def measure(function, repeat: int):
+    """
+    Returns
+    -------
+    float
+        the fastest time of the function in seconds
+    int
+        the number of returned rows
+    """
+    times = []
+    for _ in range(repeat):
+        start = perf_counter()
+        rows = len(function().index)
+        times.append(perf_counter() - start)
+    return min(times), rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sessions", type=int, default=2 * 10**6)
+    parser.add_argument("--identifiers", type=int, default=5)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    if not columnar.AVAILABLE:
+        print("the columnar store needs pyarrow")
+        return
+
+    with tempfile.TemporaryDirectory() as directory:
+        driver.PATH = os.path.join(directory, "data_table.db")
+        columnar.ROOT = os.path.join(directory, "columnar")
+        sessions = get_sessions(args.sessions, args.identifiers, days=365)
+        driver.df_to_sql_append(sessions, "session")
+        columnar.update(sessions["identifier"].iloc[0], "2022-01-01", "2022-12-31")
+        identifiers = [sessions["identifier"].iloc[0]]
+
+        def from_database():
+            df = driver.get_filtered_df_from_db("session", identifiers=identifiers)
+            df["block_start"] = pd.to_datetime(df["block_start"])
+            df["block_end"] = pd.to_datetime(df["block_end"])
+            return df
+
+        def from_store():
+            return columnar.read("session", identifiers=identifiers)
+
+        print(f"{'source':<10}{'sessions':>12}{'seconds':>12}")
+        for name, function in [("database", from_database), ("columnar", from_store)]:
+            seconds, rows = measure(function, args.repeat)
+            print(f"{name:<10}{rows:>12}{seconds:>12.4f}")
+        driver.close_con()
+
+
+if __name__ == "__main__":
+    main()
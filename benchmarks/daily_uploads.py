@@ -0,0 +1,124 @@
+"""
+Benchmark of consecutive daily uploads.
+
+Uploads one synthetic feature report per day into an empty database and measures the time of every upload. The
+deduplication by unique keys is compared with the former deduplication, which read every table, dropped the
+duplicates in pandas and wrote the table back after each upload.
+
+Run from the project root: python -m benchmarks.daily_uploads [--days 50] [--rows 20000] [--output cache/uploads.html]
+"""
+
+import argparse
+import os
+import tempfile
+from time import perf_counter
+
+import pandas as pd
+import plotly.graph_objects as go
+
+import database.driver as driver
+from benchmarks.synthetic import get_pings
+from csv_config import feature_map
+from dash_app import upload
+
+IDENTIFIER = "benchmark"
+
+
+def rewrite_without_duplicates(table_name: str):
+    """Read a table, drop its duplicates in pandas and write it back, as done before the unique keys.
+
+    Parameters
+    ----------
+    table_name : str
+        name of the table
+    """
+    df = driver.get_df_from_db(table_name)
+    df = df.drop_duplicates(ignore_index=True, keep="last")
+    driver.df_to_sql_replace(df, table_name)
+
+
+def run(directory: str, days: int, rows: int, rewrite: bool):
+    """
+    Parameters
+    ----------
+    directory : str
+        directory of the database and the reports
+    days : int
+        number of uploaded daily reports
+    rows : int
+        number of pings per report
+    rewrite : bool
+        True if the tables should be rewritten without duplicates after each upload
+
+    Returns
+    -------
+    list of float
+        seconds of every upload
+    """
+    driver.close_con()
+    driver.PATH = os.path.join(directory, f"rewrite_{rewrite}.db")
+    driver.df_to_sql_append(
+        pd.DataFrame({"FileIdentifier": [IDENTIFIER], "Type": "unknown"}), "identifier"
+    )
+    times = []
+    for day in pd.date_range("2022-01-01", periods=days):
+        name = f"report_{day.date()}.csv"
+        pings = get_pings(rows, seed=day.dayofyear, start=str(day.date()), days=1)
+        pings.rename(columns=feature_map).to_csv(
+            os.path.join(directory, name), index=False
+        )
+
+        start = perf_counter()
+        upload.prepare_data(
+            lambda progress: None,
+            upload.decode_members(upload.stream_csv(directory, name), IDENTIFIER),
+            IDENTIFIER,
+            -1,
+            [IDENTIFIER],
+        )
+        if rewrite:
+            rewrite_without_duplicates("session")
+            rewrite_without_duplicates("pings")
+        times.append(perf_counter() - start)
+    driver.close_con()
+    return times
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--days", type=int, default=50)
+    parser.add_argument("--rows", type=int, default=20_000)
+    parser.add_argument(
+        "--output", default="cache/uploads.html", help="html file of the plot"
+    )
+    args = parser.parse_args()
+
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        results["unique keys"] = run(directory, args.days, args.rows, rewrite=False)
+        results["rewrite"] = run(directory, args.days, args.rows, rewrite=True)
+
+    print(f"{'upload':>8}" + "".join(f"{name:>16}" for name in results))
+    for i in range(args.days):
+        print(
+            f"{i + 1:>8}" + "".join(f"{times[i]:>16.3f}" for times in results.values())
+        )
+
+    fig = go.Figure(
+        [
+            go.Scatter(x=list(range(1, args.days + 1)), y=times, name=name)
+            for name, times in results.items()
+        ]
+    )
+    fig.update_layout(
+        title=f"Daily uploads of {args.rows:,} pings",
+        xaxis_title="upload",
+        yaxis_title="seconds",
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    fig.write_html(args.output)
+    print("plot written to", args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Benchmark of date range and identifier queries on the session table.
+
+Compares a table created by DataFrame.to_sql (string timestamps, no indexes) with the
+table of database.schema (integer timestamps, indexes).
+
+Run from the project root: python -m benchmarks.database_queries [--sessions 1000000]
+"""
+
+import argparse
+import os
+import sqlite3
+import tempfile
+from time import perf_counter
+
+import pandas as pd
+
+import database.schema as schema
+from benchmarks.synthetic import get_sessions
+
+
+def measure(con: sqlite3.Connection, query: str, params: tuple, repeat: int):
+    """
+    Returns
+    -------
+    float
+        the fastest time of the query in seconds
+    int
+        the number of returned rows
+    """
+    times = []
+    for _ in range(repeat):
+        start = perf_counter()
+        rows = con.execute(query, params).fetchall()
+        times.append(perf_counter() - start)
+    return min(times), len(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sessions", type=int, default=10**6)
+    parser.add_argument("--identifiers", type=int, default=50)
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    sessions = get_sessions(args.sessions, args.identifiers, args.days)
+    first, last = "2022-06-01", "2022-06-07"
+    epoch = [
+        int(pd.Timestamp(first + " 00:00:00", tz="UTC").timestamp()),
+        int(pd.Timestamp(last + " 23:59:59", tz="UTC").timestamp()),
+    ]
+    queries = {
+        "date range": (
+            "block_start BETWEEN ? AND ?",
+            (first + " 00:00:00", last + " 23:59:59"),
+            tuple(epoch),
+        ),
+        "identifier": (
+            "identifier = ?",
+            ("report-007",),
+            ("report-007",),
+        ),
+        "identifier + date range": (
+            "identifier = ? AND block_start BETWEEN ? AND ?",
+            ("report-007", first + " 00:00:00", last + " 23:59:59"),
+            ("report-007", *epoch),
+        ),
+    }
+
+    with tempfile.TemporaryDirectory() as directory:
+        legacy = sqlite3.connect(os.path.join(directory, "legacy.db"))
+        sessions.to_sql("session", legacy, index=False)
+
+        typed = sqlite3.connect(os.path.join(directory, "schema.db"))
+        schema.create_table(typed, "session")
+        schema.encode(sessions, "session").to_sql(
+            "session", typed, if_exists="append", index=False
+        )
+
+        print(f"{'query':<26}{'rows':>10}{'to_sql (s)':>14}{'schema (s)':>14}")
+        for name, (where, legacy_params, typed_params) in queries.items():
+            query = "SELECT * FROM session WHERE " + where
+            legacy_time, rows = measure(legacy, query, legacy_params, args.repeat)
+            typed_time, _ = measure(typed, query, typed_params, args.repeat)
+            print(f"{name:<26}{rows:>10}{legacy_time:>14.4f}{typed_time:>14.4f}")
+
+        legacy.close()
+        typed.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Benchmark of the database calls of one dashboard refresh.
+
+Compares the pooled connection of database.driver with a new connection and engine per call, like the driver
+did before.
+
+Run from the project root: python -m benchmarks.database_refresh [--sessions 1000]
+"""
+
+import argparse
+import os
+import tempfile
+from time import perf_counter
+
+import pandas as pd
+
+import database.driver as driver
+import database.schema as schema
+from benchmarks.synthetic import get_sessions
+
+
+def refresh(per_call: bool):
+    """Run the database calls of update_output_div, the report statistics and the selection options.
+
+    Parameters
+    ----------
+    per_call : bool
+        True if every call should open and close its own connection and engine
+    """
+
+    def call(function, *args, **kwargs):
+        if (
+            per_call
+            and function is driver.get_df_from_db
+            and args[0] not in schema.TABLES
+        ):
+            # tables without schema were read with a new engine
+            result = pd.read_sql_table(args[0], driver.get_engine())
+        else:
+            result = function(*args, **kwargs)
+        if per_call:
+            driver.close_con()
+            driver.engines.clear()
+        return result
+
+    call(driver.check_if_table_exists, "session")
+    first, last = call(driver.get_time_range, "session")
+    call(driver.get_filtered_df_from_db, "session", start=first, end=last)
+    call(driver.get_filtered_df_from_db, "pings", start=first, end=last)
+    call(driver.get_time_range, "pings")
+    call(driver.check_if_table_exists, "report_statistics")
+    call(driver.get_df_from_db, "report_statistics")
+    call(driver.get_df_from_db, "identifier")
+    call(driver.check_if_table_exists, "cluster_ids")
+    call(driver.get_df_from_db, "cluster_ids")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sessions", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        driver.PATH = os.path.join(directory, "data_table.db")
+        sessions = get_sessions(args.sessions, identifiers=5, days=7)
+        driver.df_to_sql_append(sessions, "session")
+        driver.df_to_sql_append(
+            sessions[
+                ["identifier", "cluster_id", "app_instance_id", "feature_mask"]
+            ].assign(
+                time=pd.to_datetime(sessions["last_ping"]).dt.strftime(
+                    schema.PING_TIME_FORMAT
+                )
+            ),
+            "pings",
+        )
+        identifiers = sessions["identifier"].drop_duplicates()
+        driver.df_to_sql_append(
+            identifiers.to_frame("cluster_id").assign(identifier=identifiers),
+            "cluster_ids",
+        )
+        driver.df_to_sql_replace(
+            pd.DataFrame({"FileIdentifier": identifiers, "Type": "unknown"}),
+            "identifier",
+        )
+        driver.df_to_sql_replace(
+            pd.DataFrame({"Report": identifiers, "Lines": args.sessions}),
+            "report_statistics",
+        )
+
+        print(f"{'connection':<12}{'seconds per refresh':>22}")
+        for name, per_call in [("per call", True), ("pooled", False)]:
+            times = []
+            for _ in range(args.repeat):
+                start = perf_counter()
+                refresh(per_call)
+                times.append(perf_counter() - start)
+            print(f"{name:<12}{min(times):>22.4f}")
+        driver.close_con()
+
+
+if __name__ == "__main__":
+    main()
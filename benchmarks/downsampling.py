@@ -0,0 +1,67 @@
+"""
+Benchmark of downsampling the time series of the graphs.
+
+Measures the payload of a line figure with a 15 minute time series per trace, its build and serialization time and
+its render time with kaleido, without downsampling and with min-max and LTTB downsampling to POINT_BUDGET points per
+trace.
+
+Run from the project root: python -m benchmarks.downsampling [--days 365] [--traces 8] [--no-render]
+"""
+
+import argparse
+from time import perf_counter
+
+import numpy as np
+import pandas as pd
+import plotly.express as px
+
+from vis.downsampling import POINT_BUDGET, downsample
+
+
+def get_series(days: int, traces: int) -> pd.DataFrame:
+    """Return a random 15 minute time series of concurrent sessions for some traces."""
+    rng = np.random.default_rng(0)
+    time = pd.date_range("2022-01-01", periods=days * 96, freq="15min")
+    daily = 20 + 15 * np.sin(np.arange(len(time)) * 2 * np.pi / 96)
+    data = pd.DataFrame({"time": time})
+    for trace in range(traces):
+        data[f"trace-{trace}"] = rng.poisson(daily).astype(float)
+    return data
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--traces", type=int, default=8)
+    parser.add_argument("--no-render", action="store_true")
+    args = parser.parse_args()
+
+    data = get_series(args.days, args.traces)
+    columns = [column for column in data.columns if column != "time"]
+
+    if not args.no_render:
+        # the first image starts kaleido
+        px.line().to_image(format="png")
+
+    print(f"{len(data.index):,} points per trace, budget of {POINT_BUDGET}")
+    print(f"{'method':>10}{'points':>12}{'bytes':>14}{'build':>10}{'render':>10}")
+    for method in [None, "minmax", "lttb"]:
+        start = perf_counter()
+        selected = (
+            data if method is None else downsample(data, "time", columns, method=method)
+        )
+        fig = px.line(selected, x="time", y=columns, render_mode="webgl")
+        payload = fig.to_json()
+        build = perf_counter() - start
+        render = np.nan
+        if not args.no_render:
+            start = perf_counter()
+            fig.to_image(format="png")
+            render = perf_counter() - start
+        print(
+            f"{method or 'none':>10}{len(selected.index):>12,}{len(payload):>14,}{build:>10.4f}{render:>10.4f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""
+Benchmark of rendering the figures of the export.
+
+Renders the same number of line figures as the export to PNG images one after another in this process, with the
+pool of rendering processes while it starts, with the started pool and from the PNG cache.
+
+Run from the project root: python -m benchmarks.export_rendering [--figures 7] [--points 2000]
+"""
+
+import argparse
+import os
+import tempfile
+from time import perf_counter
+
+import diskcache
+import numpy as np
+import pandas as pd
+import plotly.express as px
+
+from dash_app import artifacts
+
+
+def get_figures(count: int, points: int) -> list:
+    """Return line figures with four random traces."""
+    rng = np.random.default_rng(0)
+    time = pd.date_range("2022-01-01", periods=points, freq="H")
+    return [
+        px.line(
+            pd.DataFrame(rng.poisson(20, (points, 4)), index=time).cumsum(),
+            title=f"figure {i}",
+        )
+        for i in range(count)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--figures", type=int, default=7)
+    parser.add_argument("--points", type=int, default=2000)
+    args = parser.parse_args()
+
+    figures = get_figures(args.figures, args.points)
+    print(f"{args.figures} figures on {os.cpu_count()} cores")
+    print(f"{'rendering':<14}{'seconds':>10}")
+
+    start = perf_counter()
+    for fig in figures:
+        fig.to_image(format="png")
+    print(f"{'sequential':<14}{perf_counter() - start:>10.3f}")
+
+    with tempfile.TemporaryDirectory() as directory:
+        artifacts.artifacts = diskcache.Cache(directory)
+        # the second run changes the figures, so they aren't cached yet
+        changed = get_figures(args.figures, args.points + 1)
+        for name, figures_of_run in [
+            ("pool starting", figures),
+            ("pool started", changed),
+            ("cached", changed),
+        ]:
+            start = perf_counter()
+            artifacts.get_pngs(figures_of_run)
+            print(f"{name:<14}{perf_counter() - start:>10.3f}")
+        artifacts.artifacts.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""
+Benchmark of decoding feature masks into feature usage, token cost and package combinations.
+
+Measures the sessions with token cost of synthetic sessions for the metered features and for all features of
+FEATURE_BITMASKS, and the package combinations for the metered features and all five packages.
+
+Run from the project root: python -m benchmarks.feature_decoding [--sessions 1000000]
+"""
+
+import argparse
+from time import perf_counter
+
+import pandas as pd
+
+from benchmarks.synthetic import get_pings, get_sessions
+from computation.data import DataPings, DataSessions
+from computation.features import FEATURE_BITMASKS, Features
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sessions", type=int, default=10**6)
+    args = parser.parse_args()
+
+    metered = Features().get_data_features()
+    catalogue = pd.DataFrame(
+        {
+            "keyword": list(FEATURE_BITMASKS),
+            "bitmask": list(FEATURE_BITMASKS.values()),
+            "token_consumption": 10,
+        }
+    )
+    sessions = get_sessions(args.sessions, 1, days=365)
+
+    print(f"{'features':>10}{'sessions':>12}{'seconds':>12}")
+    for features in [metered, catalogue]:
+        data_pings = DataPings("benchmark", get_pings(1000), features)
+        data_session = DataSessions(sessions, data_pings, features, 300, "")
+        start = perf_counter()
+        data_session.get_data_with_token_cost()
+        seconds = perf_counter() - start
+        print(f"{len(features.index):>10}{len(sessions.index):>12}{seconds:>12.4f}")
+
+    identifiers = sessions["identifier"].unique().tolist()
+    packages = catalogue[catalogue["bitmask"] >= FEATURE_BITMASKS["Viewing"]]
+    print(f"\n{'packages':>10}{'sessions':>12}{'seconds':>12}")
+    for features in [metered, packages]:
+        data_pings = DataPings("benchmark", get_pings(1000), features)
+        data_session = DataSessions(sessions, data_pings, features, 300, identifiers)
+        start = perf_counter()
+        data_session.get_package_combination_percentage()
+        seconds = perf_counter() - start
+        print(f"{len(features.index):>10}{len(sessions.index):>12}{seconds:>12.4f}")
+
+
+if __name__ == "__main__":
+    main()
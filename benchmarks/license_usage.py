@@ -0,0 +1,81 @@
+"""
+Benchmark of the license usage table.
+
+Writes synthetic license rows into an empty database and builds the table of cache generations per feature and license
+identifier, once from the loaded rows and once from the counts which are kept up to date while the rows are written,
+and checks that both are equal.
+
+Run from the project root: python -m benchmarks.license_usage [--rows 1000000] [--identifiers 10] [--features 2000]
+"""
+
+import argparse
+import os
+import tempfile
+from time import perf_counter
+
+import numpy as np
+import pandas as pd
+
+import database.driver as driver
+from computation.data import LicenseUsage
+
+
+def get_license_rows(
+    rows: int, identifiers: list, features: int, seed: int = 0
+) -> pd.DataFrame:
+    """Return random license rows, a resource_id is used about three times."""
+    rng = np.random.default_rng(seed)
+    names = np.array([f"loader/format/feature-{i}" for i in range(features)])
+    return pd.DataFrame(
+        {
+            "identifier": rng.choice(identifiers, rows),
+            "grant_id": "grant",
+            "feature_name": rng.choice(names, rows),
+            "cluster_id": "cluster",
+            "resource_id": rng.integers(0, max(rows // 3, 1), rows).astype(str),
+            "service_id": "service",
+            "start_time": "2022-01-01T00:00:00Z",
+            "end_time": "2022-01-01T01:00:00Z",
+        }
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--identifiers", type=int, default=10)
+    parser.add_argument("--features", type=int, default=2000)
+    args = parser.parse_args()
+
+    identifiers = [f"license-{i}" for i in range(args.identifiers)]
+    data = get_license_rows(args.rows, identifiers, args.features)
+
+    with tempfile.TemporaryDirectory() as directory:
+        driver.close_con()
+        driver.PATH = os.path.join(directory, "license.db")
+        print(
+            f"{args.rows:,} license rows of {args.identifiers} identifiers and"
+            f" {args.features} features"
+        )
+        print(f"{'step':<10}{'seconds':>12}")
+        start = perf_counter()
+        for chunk in np.array_split(data, max(args.rows // 100_000, 1)):
+            driver.append_license(chunk)
+        print(f"{'ingest':<10}{perf_counter() - start:>12.3f}")
+
+        start = perf_counter()
+        loaded = LicenseUsage(driver.get_df_from_db("license"))
+        expected = loaded.get_license_usage_data(identifiers)
+        print(f"{'pandas':<10}{perf_counter() - start:>12.3f}")
+
+        start = perf_counter()
+        aggregated = LicenseUsage(None, counts=driver.get_license_counts())
+        table = aggregated.get_license_usage_data(identifiers)
+        print(f"{'counts':<10}{perf_counter() - start:>12.3f}")
+        driver.close_con()
+
+    pd.testing.assert_frame_equal(table, expected)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+"""
+Benchmark of the session block extraction in a pool of processes.
+
+Extracts the session blocks of synthetic pings with different numbers of processes, which split the pings by
+cluster_id, and checks that every run creates the same sessions as the extraction in one process.
+
+Run from the project root: python -m benchmarks.parallel_sessions [--rows 2000000] [--workers 1 2 4 8]
+"""
+
+import argparse
+import os
+from time import perf_counter
+
+import pandas as pd
+
+from benchmarks.synthetic import get_pings
+from computation.session_blocks import extract_session_blocks
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=2_000_000)
+    parser.add_argument(
+        "--workers", type=int, nargs="+", default=[1, 2, 4, os.cpu_count()]
+    )
+    args = parser.parse_args()
+
+    pings = get_pings(args.rows)
+    expected = extract_session_blocks(pings, 300)
+
+    print(
+        f"{args.rows:,} pings of {pings['cluster_id'].nunique()} cluster_ids on"
+        f" {os.cpu_count()} cores"
+    )
+    print(f"{'workers':>8}{'seconds':>12}{'speedup':>10}")
+    baseline = None
+    for workers in sorted(set(args.workers)):
+        start = perf_counter()
+        sessions = extract_session_blocks(pings, 300, workers)
+        seconds = perf_counter() - start
+        pd.testing.assert_frame_equal(sessions, expected)
+        baseline = baseline or seconds
+        print(f"{workers:>8}{seconds:>12.3f}{baseline / seconds:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
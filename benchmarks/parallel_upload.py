@@ -0,0 +1,122 @@
+"""
+Benchmark of uploading a zip file with many csv files.
+
+Writes a synthetic zip file with one feature report per day and uploads it into an empty database with different
+numbers of decoding processes. The decoding alone and the whole upload, which writes the decoded files through one
+writer, are measured.
+
+Run from the project root: python -m benchmarks.parallel_upload [--members 16] [--rows 100000] [--workers 1 2 4]
+"""
+
+import argparse
+import os
+import tempfile
+import zipfile
+from time import perf_counter
+
+import pandas as pd
+
+import database.driver as driver
+from benchmarks.synthetic import get_pings
+from csv_config import feature_map
+from dash_app import upload
+
+IDENTIFIER = "benchmark"
+ZIP_NAME = "report.zip"
+
+
+def write_report(directory: str, members: int, rows: int):
+    """Write a zip file with one csv file of pings per day.
+
+    Parameters
+    ----------
+    directory : str
+        directory of the zip file
+    members : int
+        number of csv files
+    rows : int
+        number of pings per csv file
+    """
+    with zipfile.ZipFile(
+        os.path.join(directory, ZIP_NAME), "w", zipfile.ZIP_DEFLATED
+    ) as zip_file:
+        for day in range(members):
+            start = pd.Timestamp("2022-01-01") + pd.Timedelta(days=day)
+            pings = get_pings(rows, seed=day, start=str(start.date()), days=1)
+            zip_file.writestr(
+                f"report_{start.date()}.csv",
+                pings.rename(columns=feature_map).to_csv(index=False),
+            )
+
+
+def run(directory: str, workers: int):
+    """
+    Parameters
+    ----------
+    directory : str
+        directory of the zip file and the database
+    workers : int
+        number of decoding processes
+
+    Returns
+    -------
+    float
+        seconds of the decoding
+    float
+        seconds of the upload
+    """
+    upload.WORKERS = workers
+
+    start = perf_counter()
+    for chunks, _ in upload.decode_report(ZIP_NAME, IDENTIFIER):
+        for _ in chunks:
+            pass
+    decoding = perf_counter() - start
+
+    driver.close_con()
+    driver.PATH = os.path.join(directory, f"workers_{workers}.db")
+    driver.df_to_sql_append(
+        pd.DataFrame({"FileIdentifier": [IDENTIFIER], "Type": "unknown"}), "identifier"
+    )
+    start = perf_counter()
+    upload.prepare_data(
+        lambda progress: None,
+        upload.decode_report(ZIP_NAME, IDENTIFIER),
+        IDENTIFIER,
+        -1,
+        [IDENTIFIER],
+    )
+    uploading = perf_counter() - start
+    driver.close_con()
+    return decoding, uploading
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--members", type=int, default=16)
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument(
+        "--workers", type=int, nargs="+", default=[1, 2, 4, os.cpu_count()]
+    )
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        upload.UPLOAD_CACHE_PATH = directory
+        write_report(directory, args.members, args.rows)
+
+        print(
+            f"{args.members} csv files with {args.rows:,} pings on"
+            f" {os.cpu_count()} cores"
+        )
+        print(f"{'workers':>8}{'decoding':>12}{'upload':>12}{'speedup':>10}")
+        baseline = None
+        for workers in sorted(set(args.workers)):
+            decoding, uploading = run(directory, workers)
+            baseline = baseline or uploading
+            print(
+                f"{workers:>8}{decoding:>12.3f}{uploading:>12.3f}{baseline / uploading:>10.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
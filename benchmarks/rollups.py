@@ -0,0 +1,103 @@
+"""
+Benchmark of the token consumption and the concurrent active sessions computed from every session and from the
+token rollup and the CAS histogram.
+
+The times include loading the data from the database.
+
+Run from the project root: python -m benchmarks.rollups [--sessions 1000000] [--interval D]
+"""
+
+import argparse
+import os
+import tempfile
+from functools import partial
+from time import perf_counter
+
+import pandas as pd
+
+import database.driver as driver
+from benchmarks.synthetic import get_pings, get_sessions
+from computation.data import DataPings, DataSessions
+from computation.features import Features
+from computation.rollups import get_cas_histogram, get_token_rollup
+
+
+def measure(function, repeat: int):
+    """
+    Returns
+    -------
+    float
+        the fastest time of the function in seconds
+    int
+        the number of returned rows
+    """
+    times = []
+    for _ in range(repeat):
+        start = perf_counter()
+        rows = len(function().index)
+        times.append(perf_counter() - start)
+    return min(times), rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sessions", type=int, default=10**6)
+    parser.add_argument("--identifiers", type=int, default=5)
+    parser.add_argument("--interval", default="D")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    features = Features().get_data_features()
+
+    with tempfile.TemporaryDirectory() as directory:
+        driver.PATH = os.path.join(directory, "data_table.db")
+        sessions = get_sessions(args.sessions, args.identifiers, days=365)
+        driver.df_to_sql_append(sessions, "session")
+        identifiers = sessions["identifier"].unique().tolist()
+        for identifier in identifiers:
+            data = sessions[sessions["identifier"] == identifier].copy()
+            data["block_start"] = pd.to_datetime(data["block_start"])
+            data["block_end"] = pd.to_datetime(data["block_end"])
+            driver.set_rollup(
+                "token_rollup",
+                get_token_rollup(data, features),
+                identifier,
+                "2022-01-01",
+                "2022-12-31",
+            )
+            driver.set_rollup(
+                "cas_histogram",
+                get_cas_histogram(data),
+                identifier,
+                "2022-01-01",
+                "2022-12-31",
+            )
+
+        def compute(method: str, rollup: bool):
+            data = driver.get_filtered_df_from_db("session")
+            data_pings = DataPings("benchmark", get_pings(1000), features)
+            token_rollup = driver.get_token_rollup if rollup else None
+            cas_histogram = (
+                partial(driver.get_rollup, "cas_histogram") if rollup else None
+            )
+            sessions = DataSessions(
+                data,
+                data_pings,
+                features,
+                300,
+                identifiers,
+                None,
+                token_rollup,
+                cas_histogram,
+            )
+            return getattr(sessions, method)(args.interval, multi_files=True)
+
+        print(f"{'method':<24}{'source':<10}{'rows':>12}{'seconds':>12}")
+        for method in ["get_token_consumption", "get_cas"]:
+            for name, rollup in [("sessions", False), ("rollup", True)]:
+                seconds, rows = measure(partial(compute, method, rollup), args.repeat)
+                print(f"{method:<24}{name:<10}{rows:>12}{seconds:>12.4f}")
+        driver.close_con()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Benchmark of the session block extraction.
+
+Compares the vectorized engine with the row by row extraction on synthetic pings and checks that both create the
+same sessions.
+
+Run from the project root: python -m benchmarks.session_blocks [--sizes 100000 1000000 10000000]
+"""
+
+import argparse
+from time import perf_counter
+
+import pandas as pd
+
+from benchmarks.synthetic import get_pings
+from computation.data import DataPings, DataSessions
+from computation.features import Features
+
+
+def run(rows: int, row_wise: bool):
+    """
+    Parameters
+    ----------
+    rows : int
+        number of synthetic pings
+    row_wise : bool
+        True if the row by row extraction should be measured too
+
+    Returns
+    -------
+    list of tuple(str, int, float, int)
+        engine, number of pings, seconds and number of sessions
+    """
+    features = Features().get_data_features()
+    data_pings = DataPings("benchmark", get_pings(rows), features)
+
+    results = []
+    sessions = {}
+    for engine in ["vectorized", "row_wise"] if row_wise else ["vectorized"]:
+        data_session = DataSessions(pd.DataFrame([]), data_pings, features, 300, "")
+        start = perf_counter()
+        data_session.extract_session_blocks(row_wise=engine == "row_wise")
+        results.append(
+            (engine, rows, perf_counter() - start, len(data_session.data.index))
+        )
+        sessions[engine] = data_session.data
+
+    if row_wise:
+        pd.testing.assert_frame_equal(sessions["vectorized"], sessions["row_wise"])
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", default=[10**5, 10**6, 10**7]
+    )
+    parser.add_argument(
+        "--row-wise-limit",
+        type=int,
+        default=10**7,
+        help="largest size for which the row by row extraction is measured",
+    )
+    args = parser.parse_args()
+
+    print(f"{'engine':<12}{'pings':>12}{'seconds':>12}{'sessions':>12}")
+    for rows in args.sizes:
+        for engine, n, seconds, sessions in run(rows, rows <= args.row_wise_limit):
+            print(f"{engine:<12}{n:>12}{seconds:>12.3f}{sessions:>12}")
+
+
+if __name__ == "__main__":
+    main()
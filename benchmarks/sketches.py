@@ -0,0 +1,64 @@
+"""
+Benchmark of the distinct value sketches.
+
+Sketches the app instances of synthetic pings per cluster_id and day and compares the estimates of unions of days with
+the exact number of distinct app instances: the time to sketch and to merge, the size of the packed sketches and the
+relative error of the estimates.
+
+Run from the project root: python -m benchmarks.sketches [--rows 2000000] [--days 30]
+"""
+
+import argparse
+from time import perf_counter
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.synthetic import get_pings
+from computation.sketches import STANDARD_ERROR, get_distinct_counts, get_sketches
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=2_000_000)
+    parser.add_argument("--days", type=int, default=30)
+    args = parser.parse_args()
+
+    pings = get_pings(args.rows, days=args.days)
+    pings["time"] = pd.to_datetime(pings["time"], utc=True).dt.tz_localize(None)
+
+    start = perf_counter()
+    sketches = get_sketches(pings, "cluster_id", "app_instance_id", "time")
+    sketching = perf_counter() - start
+    size = sketches["registers"].map(len).sum()
+    print(
+        f"{args.rows:,} pings, {len(sketches.index)} sketches of"
+        f" {size / len(sketches.index):,.0f} bytes in {sketching:.3f} seconds,"
+        f" standard error {STANDARD_ERROR:.2%}"
+    )
+
+    print(
+        f"{'days':>6}{'merge':>10}{'mean error':>12}{'max error':>12}{'in bounds':>12}"
+    )
+    days = np.sort(sketches["day"].unique())
+    for length in [1, 7, len(days)]:
+        selected = days[:length]
+        start = perf_counter()
+        counts = get_distinct_counts(
+            sketches[sketches["day"].isin(selected)], ["name"]
+        ).set_index("name")
+        merging = perf_counter() - start
+        exact = (
+            pings[pings["time"].dt.normalize().isin(selected)]
+            .groupby("cluster_id")["app_instance_id"]
+            .nunique()
+        )
+        error = (counts["distinct"] - exact).abs() / exact
+        in_bounds = ((counts["lower"] <= exact) & (exact <= counts["upper"])).mean()
+        print(
+            f"{length:>6}{merging:>10.4f}{error.mean():>12.2%}{error.max():>12.2%}{in_bounds:>12.0%}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+This is synthetic.py.
+
+synthetic.py creates synthetic report data for the benchmarks.
+"""
+
+import numpy as np
+import pandas as pd
+
+import database.schema as schema
+from computation.features import Features
+
+
+def get_pings(rows: int, seed: int = 0, start: str = "2022-10-01", days: int = 30):
+    """Return synthetic pings in the format of a renamed feature_usage file.
+
+    Parameters
+    ----------
+    rows : int
+        number of pings
+    seed : int
+        seed of the random generator
+    start : str
+        first day of the pings
+    days : int
+        number of days the pings are spread over
+
+    Returns
+    -------
+    pd.DataFrame
+        pings with the columns cluster_id, app_instance_id, time and feature_mask
+    """
+    rng = np.random.default_rng(seed)
+    bitmasks = Features().get_data_features()["bitmask"].to_numpy()
+
+    # every app instance pings about once a minute, starting at a random time
+    instances = max(rows // 500, 1)
+    instance = np.sort(rng.integers(0, instances, rows))
+    cluster = instance % max(instances // 50, 1)
+    first_ping = rng.integers(0, days * 24 * 3600, instances)
+    ping_num = np.arange(rows) - np.searchsorted(instance, instance)
+    seconds = first_ping[instance] + ping_num * 60 + rng.integers(0, 30, rows)
+    masks = np.bitwise_or(
+        rng.choice(bitmasks, rows), rng.choice(np.append(bitmasks, 0x1), rows)
+    )
+
+    time = pd.Timestamp(start, tz="UTC") + pd.to_timedelta(seconds, unit="s")
+    order = rng.permutation(rows)
+    return pd.DataFrame(
+        {
+            "cluster_id": pd.Series(cluster[order]).map("cluster-{:04d}".format),
+            "app_instance_id": pd.Series(instance[order]).map("instance-{:06d}".format),
+            "time": time[order].strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "feature_mask": masks[order],
+        }
+    )
+
+
+def get_sessions(rows: int, identifiers: int, days: int, seed: int = 0):
+    """Return synthetic sessions in the format of the application.
+
+    Parameters
+    ----------
+    rows : int
+        number of sessions
+    identifiers : int
+        number of file identifiers
+    days : int
+        number of days the sessions are spread over
+    seed : int
+        seed of the random generator
+
+    Returns
+    -------
+    pd.DataFrame
+        sessions with the columns of the session table
+    """
+    rng = np.random.default_rng(seed)
+    start = pd.Timestamp("2022-01-01") + pd.to_timedelta(
+        rng.integers(0, days * 24 * 3600, rows), unit="s"
+    )
+    return pd.DataFrame(
+        {
+            "identifier": pd.Series(rng.integers(0, identifiers, rows)).map(
+                "report-{:03d}".format
+            ),
+            "cluster_id": pd.Series(rng.integers(0, 20, rows)).map(
+                "cluster-{:02d}".format
+            ),
+            "app_instance_id": pd.Series(rng.integers(0, rows // 50, rows)).map(
+                "instance-{:06d}".format
+            ),
+            "feature_mask": rng.choice([0x80000, 0x100000, 0x200000], rows),
+            "block_start": start.strftime(schema.SESSION_TIME_FORMAT),
+            "block_end": (start + pd.Timedelta(seconds=300)).strftime(
+                schema.SESSION_TIME_FORMAT
+            ),
+            "last_ping": (start + pd.Timedelta(seconds=240)).strftime(
+                schema.SESSION_TIME_FORMAT
+            ),
+        }
+    )
@@ -5,10 +5,20 @@ data.py contains classes DataPings and DataSessions.
 """
 
 import datetime as dt
+from typing import Callable
 
 import numpy as np
 import pandas as pd
 
+from computation.features import (
+    decode_feature_masks,
+    get_combination_counts,
+    get_token_cost_matrix,
+)
+from computation.memo import memoize
+from computation.rollups import get_cas_block_mask, get_rollup_interval, get_token_cost
+from computation.session_blocks import extract_session_blocks, resume_session_blocks
+
 
 class DataPings:
     """Data frame of pings.
@@ -25,6 +35,8 @@ class DataPings:
         list of dates between first and last metered date (both inclusive)
     filename: str
         name of the file from which the pings come from
+    time_range: tuple of str
+        first and last time of the pings of all cluster_ids, None if data contains all pings
 
     Methods
     -------
@@ -46,6 +58,7 @@ class DataPings:
         data: pd.DataFrame,
         features: pd.DataFrame,
         cluster_id: str = None,
+        time_range: tuple = None,
     ):
         """Declare/Initialize variables and filter pings.
 
@@ -56,6 +69,8 @@ class DataPings:
         features : np.DataFrame
         cluster_id: str
             cluster_id that doesn't get filtered out
+        time_range: tuple of str
+            first and last time of the pings of all cluster_ids, needed if data only contains a part of them
         """
         self.data_with_all_c_ids = data
         self.data = self.data_with_all_c_ids
@@ -67,6 +82,7 @@ class DataPings:
         self.metered_days = None
         self.day_sequence_of_timespan = None
         self.filename = filename
+        self.time_range = time_range
 
         self.filter_out_unmetered_bitmask_entries()
         self.data = self.data.drop_duplicates()
@@ -109,10 +125,13 @@ class DataPings:
         dates : list of dt.Date
         """
         if not self.metered_days:
-            unique_days = self.data["time"].str[:10].drop_duplicates()
-            dates = []
-            for day in unique_days:
-                dates.append(dt.datetime.strptime(day, "%Y-%m-%d").date())
+            if pd.api.types.is_datetime64_any_dtype(self.data["time"]):
+                dates = list(self.data["time"].dt.normalize().drop_duplicates().dt.date)
+            else:
+                unique_days = self.data["time"].str[:10].drop_duplicates()
+                dates = []
+                for day in unique_days:
+                    dates.append(dt.datetime.strptime(day, "%Y-%m-%d").date())
             dates.sort()
             self.metered_days = dates
         return self.metered_days
@@ -161,9 +180,12 @@ class DataPings:
         list of pd.Timestamp
             a sequence of dates independent of selected cluster_id
         """
-        data = self.data_with_all_c_ids.copy()
-        data = data["time"]
-        data = pd.to_datetime(data)
+        if self.time_range is not None:
+            data = pd.to_datetime(pd.Series(self.time_range))
+        else:
+            data = self.data_with_all_c_ids.copy()
+            data = data["time"]
+            data = pd.to_datetime(data)
         first_day = data.min().date()
         last_day = data.max().date()
         return pd.date_range(first_day, last_day).tolist()
@@ -192,11 +214,22 @@ class DataSessions:
         data frame containing the concurrent active sessions
     feature_package_combination: pd.DataFrame
         data frame containing how often a feature with which features in combination is used daily
+    token_rollup: Callable
+        function which returns the token rollup of data for an interval of ROLLUP_INTERVALS, None if the token
+        consumption should be computed from data
+    cas_histogram: Callable
+        function which returns the CAS histogram of data, None if the concurrent active sessions should be computed
+        from data
+    cache_key: tuple
+        key of the data in the result cache, the first element is the generation of the data, None if the results
+        shouldn't be cached
 
     Methods
     -------
     extract_session_blocks()
         create sessions
+    resume_session_blocks(open_blocks)
+        create sessions, continuing the open blocks of a previous extraction
     get_data_with_feature_use()
         return sessions with feature usage information
     get_feature_data_from_bitmasks(bitmasks)
@@ -207,6 +240,8 @@ class DataSessions:
         return token consumption of given interval.
     get_cas()
         return the number of concurrent active sessions by date.
+    get_cas_block_mask(block_start)
+        return which sessions include one of the 15min-timestamps
     crop_data()
         sets the data to the wanted interval
     get_total_token_amount()
@@ -227,6 +262,9 @@ class DataSessions:
         block_length: int,
         file_selector: list,
         cluster_id_selector: str = None,
+        token_rollup: Callable = None,
+        cas_histogram: Callable = None,
+        cache_key: tuple = None,
     ):
         """Declare/Initialize variable and extract sessions.
 
@@ -241,6 +279,12 @@ class DataSessions:
             identifiers of selected files
         cluster_id_selector : str
             cluster_id that is selected
+        token_rollup : Callable
+            function which returns the token rollup of data for an interval of ROLLUP_INTERVALS
+        cas_histogram : Callable
+            function which returns the CAS histogram of data
+        cache_key : tuple
+            key of the data in the result cache, starting with the generation of the data
         """
         self.data_pings = data_pings
         self.features = features
@@ -252,60 +296,120 @@ class DataSessions:
         self.feature_package_combination = None
         self.file_selector = file_selector
         self.cluster_id_selector = cluster_id_selector
+        self.token_rollup = token_rollup
+        self.cas_histogram = cas_histogram
+        self.cache_key = cache_key
 
-    def extract_session_blocks(self):
+    def extract_session_blocks(self, row_wise: bool = False, workers: int = 1):
         """Create session blocks.
 
+        Parameters
+        ----------
+        row_wise : bool
+            use the row by row extraction instead of the vectorized engine (only kept for comparison)
+        workers : int
+            number of processes of the vectorized engine, the clusters are split between them
+
         Yields
         ------
         data : pd.DataFrame
         time_format : String
         session_data : list of list
-        cur_timestamp : dt.datetime
-        cur_bitmask : int
-        cur_c_id : String
-        cur_a_id : String
-        cur_last_ping : dt.datetime
-        timestamp : dt.datetime
-        bitmask : int
-        c_id : String
-        a_id : String
-        block_end_timestamp : dt.datetime
+        cur : dict
         """
-        data = self.data_pings.data.copy()
+        if row_wise:
+            data = self.data_pings.data.copy()
 
-        # sort data
-        data = data.sort_values(by=["cluster_id", "app_instance_id", "time"])
-        data = data.reset_index(drop=True)  # make sure that indices exist correctly
+            # sort data
+            data = data.sort_values(by=["cluster_id", "app_instance_id", "time"])
+            data = data.reset_index(drop=True)  # make sure that indices exist correctly
 
-        # convert str to datetime
-        data["time"] = pd.to_datetime(data["time"])
+            # convert str to datetime
+            data["time"] = pd.to_datetime(data["time"])
+
+            # for iterating through rows of data
+            session_data = []
+            cur = {
+                "cluster_id": None,
+                "app_instance_id": None,
+                "feature_mask": None,
+                "block_start": None,
+                "block_end": None,
+                "last_ping": None,
+            }
+
+            # iterate through rows of data
+            data.apply(
+                lambda row: self.extract_row(row, session_data, cur), axis="columns"
+            )
+
+            # close last block
+            if cur["block_start"]:
+                session_data.append(cur)
+
+            self.data = pd.DataFrame.from_dict(session_data)
+        else:
+            self.data = extract_session_blocks(
+                self.data_pings.data, self.block_length, workers
+            )
+
+        self.data = self.format_blocks(self.data)
+
+    def resume_session_blocks(self, open_blocks: pd.DataFrame) -> pd.DataFrame:
+        """Create session blocks, continuing the open blocks of a previous extraction.
 
-        # for iterating through rows of data
-        session_data = []
-        cur = {
-            "cluster_id": None,
-            "app_instance_id": None,
-            "feature_mask": None,
-            "block_start": None,
-            "block_end": None,
-            "last_ping": None,
-        }
+        data gets the blocks which are closed by the pings, the open blocks are returned.
+        Pings of a (cluster_id, app_instance_id) pair have to arrive in time order, see get_late_groups.
 
-        # iterate through rows of data
-        data.apply(lambda row: self.extract_row(row, session_data, cur), axis="columns")
+        Parameters
+        ----------
+        open_blocks : pd.DataFrame
+            open blocks of the previous extraction in the format of data, may be empty
 
-        # close last block
-        if cur["block_start"]:
-            session_data.append(cur)
+        Returns
+        -------
+        pd.DataFrame
+            open blocks after the pings in the format of data, one per (cluster_id, app_instance_id) pair
+        """
+        open_blocks = open_blocks[
+            [
+                "cluster_id",
+                "app_instance_id",
+                "feature_mask",
+                "block_start",
+                "block_end",
+                "last_ping",
+            ]
+        ].copy()
+        for column in ["block_start", "block_end", "last_ping"]:
+            open_blocks[column] = pd.to_datetime(open_blocks[column])
+        open_blocks["feature_mask"] = open_blocks["feature_mask"].astype("int64")
 
-        self.data = pd.DataFrame.from_dict(session_data)
+        closed_blocks, open_blocks = resume_session_blocks(
+            self.data_pings.data, open_blocks, self.block_length
+        )
+        self.data = self.format_blocks(closed_blocks)
+        return self.format_blocks(open_blocks)
+
+    def format_blocks(self, blocks: pd.DataFrame) -> pd.DataFrame:
+        """Convert the datetimes of session blocks to str.
 
-        # convert datetime to str
+        Parameters
+        ----------
+        blocks : pd.DataFrame
+            session blocks with datetimes
+
+        Returns
+        -------
+        pd.DataFrame
+            session blocks with str
+        """
+        blocks = blocks.copy()
         string_format = "%Y-%m-%d %H:%M:%S"
-        self.data["block_start"] = self.data["block_start"].dt.strftime(string_format)
-        self.data["block_end"] = self.data["block_end"].dt.strftime(string_format)
-        self.data["last_ping"] = self.data["last_ping"].dt.strftime(string_format)
+        blocks["block_start"] = blocks["block_start"].dt.strftime(string_format)
+        blocks["block_end"] = blocks["block_end"].dt.strftime(string_format)
+        blocks["last_ping"] = blocks["last_ping"].dt.strftime(string_format)
+        return blocks
 
     def extract_row(self, row, session_data, cur):
         """Get information from row, open and close session blocks and append session blocks to session_data
@@ -374,15 +478,13 @@ class DataSessions:
 
         Yields
         ------
-        data : pd.DataFrame
-        feature_df : pd.Series
+        feature_df : pd.DataFrame
         """
         if self.data_with_feature_use is None:
-            data = self.data.copy()
-            feature_df = self.get_feature_data_from_bitmasks(data["feature_mask"])
-            feature_df.index = feature_df.index.astype(int)
-            data.index = data.index.astype(int)
-            self.data_with_feature_use = pd.concat([data, feature_df], axis="columns")
+            feature_df = self.get_feature_data_from_bitmasks(self.data["feature_mask"])
+            self.data_with_feature_use = pd.concat(
+                [self.data, feature_df], axis="columns"
+            )
         return self.data_with_feature_use
 
     def get_feature_data_from_bitmasks(self, bitmasks: pd.Series):
@@ -397,22 +499,13 @@ class DataSessions:
         Returns
         -------
         pd.DataFrame
-            feature usage (0 or 1) for each feature of each feature mask
-
-        Yields
-        ------
-        feature_data : list of list of int
-        feature_df : pd.Series
+            feature usage (0 or 1 as np.uint8) for each feature of each feature mask, with the index of bitmasks
         """
-        # get data if feature is used as list of list (:= feature_x of row_x)
-        feature_data = [
-            [int(f & b > 0) for f in self.features["bitmask"]] for b in bitmasks
-        ]
-
-        # get column names as list
-        col_names = [name for name in self.features["keyword"]]
-
-        return pd.DataFrame(feature_data, columns=col_names)
+        return pd.DataFrame(
+            decode_feature_masks(bitmasks, self.features["bitmask"]),
+            columns=self.features["keyword"].tolist(),
+            index=bitmasks.index,
+        )
 
     def get_data_with_token_cost(self):
         """
@@ -429,32 +522,29 @@ class DataSessions:
         Yields
         ------
         data : pd.DataFrame
-        features_in_df : list of String
-        feat_name : String
+        token_cost : np.ndarray
         """
         if self.data_with_token_cost is None:
             if self.data_with_feature_use is None:
                 self.get_data_with_feature_use()
-            data = self.data_with_feature_use.copy()
+            # make sure that indices exist correctly, reset_index returns a copy
+            data = self.data_with_feature_use.reset_index(drop=True)
             # map feature usage to feature token cost
-            features_in_df = []
-            data = data.reset_index(drop=True)  # make sure that indices exist correctly
-            for index, row in self.features.iterrows():
-                feat_name = row["keyword"]
-                if feat_name in data.columns:
-                    data[feat_name] = data[feat_name].apply(
-                        lambda x: x * row["token_consumption"]
-                    )
-                    features_in_df.append(feat_name)
+            feat_names = self.features["keyword"].tolist()
+            token_cost = get_token_cost_matrix(
+                data[feat_names].to_numpy(), self.features["token_consumption"]
+            )
+            data[feat_names] = token_cost
 
             # calculate total token consumption of session block and extend
             # with column for it
-            data["total"] = data[features_in_df].sum(axis=1)
+            data["total"] = token_cost.sum(axis=1)
 
             self.data_with_token_cost = data
 
         return self.data_with_token_cost
 
+    @memoize
     def get_token_consumption(
         self,
         interval: str = "D",
@@ -464,6 +554,8 @@ class DataSessions:
         """
         Return token consumption of given interval.
 
+        The token consumption is computed from token_rollup if it is given and one of its intervals fits.
+
         interval : str
             length of interval
             for minutes use: "[num of min]min"
@@ -480,18 +572,25 @@ class DataSessions:
         pd.DataFrame
             data frame containing cost of each feature per chosen interval, as well as total cost per chosen interval
         """
-        if self.data_with_token_cost is None:
-            self.get_data_with_token_cost()
-        data = self.data_with_token_cost.copy()
-        data = data.drop(
-            [
-                "app_instance_id",
-                "feature_mask",
-                "block_end",
-                "last_ping",
-            ],
-            axis="columns",
-        )
+        rollup_interval = get_rollup_interval(interval)
+        if self.token_rollup is not None and rollup_interval is not None:
+            rollup = self.token_rollup(rollup_interval)
+            data = get_token_cost(
+                rollup.rename(columns={"time": "block_start"}), self.features
+            )
+        else:
+            if self.data_with_token_cost is None:
+                self.get_data_with_token_cost()
+            data = self.data_with_token_cost.copy()
+            data = data.drop(
+                [
+                    "app_instance_id",
+                    "feature_mask",
+                    "block_end",
+                    "last_ping",
+                ],
+                axis="columns",
+            )
         feat_names = self.features["keyword"].tolist()
         feat_names.append("total")
         data["block_start"] = pd.to_datetime(data["block_start"])
@@ -507,13 +606,14 @@ class DataSessions:
             if self.cluster_id_selector is not None:
                 data = data[data["cluster_id"] == self.cluster_id_selector]
             groupers = pd.Grouper(key="block_start", freq=interval)
-        data = data.groupby(groupers)[feat_names].sum(numeric_only=True)
+        data = data.groupby(groupers, observed=True)[feat_names].sum(numeric_only=True)
         data = data.reset_index()  # make sure that indices exist correctly
 
         data.rename(columns={"block_start": "time"}, inplace=True)
 
         return data
 
+    @memoize
     def get_cas(
         self,
         interval: str = "D",
@@ -523,6 +623,8 @@ class DataSessions:
         """
         Get number of concurrent active sessions by date.
 
+        The sessions per 15min-timestamp are taken from cas_histogram if it is given.
+
         Parameters
         ----------
         interval : str
@@ -549,48 +651,28 @@ class DataSessions:
         if self.block_length != 300:
             raise Exception("Method only works with self.block_length == 300")
 
-        # remove sessions, that don't include one of the 15min-timestamps
-        data = self.data.copy()
+        if self.cas_histogram is not None:
+            data = self.cas_histogram().rename(columns={"sessions": "amount"})
+        else:
+            # remove sessions, that don't include one of the 15min-timestamps
+            data = self.data[self.get_cas_block_mask(self.data["block_start"])]
+            data = data[["identifier", "cluster_id", "block_start"]]
+            data = data.rename(columns={"block_start": "time"}).assign(amount=1)
+
         if multi_files and (not cluster_id_comparison):
-            s = data[["block_start", "identifier"]].copy()
-            s = s[
-                (s["block_start"].str[14:16].astype("int") % 15 >= 10)
-                | (
-                    (s["block_start"].str[14:16].astype("int") % 15 == 0)
-                    & (s["block_start"].str[17:19].astype("int") == 0)
-                )
-            ]
-            data = s
+            data = data[["time", "identifier", "amount"]]
         elif cluster_id_comparison:
             if not multi_files:
                 data = self.filter_data_for_identifier(data)
-            s = data[["block_start", "cluster_id"]].copy()
-            s = s[
-                (s["block_start"].str[14:16].astype("int") % 15 >= 10)
-                | (
-                    (s["block_start"].str[14:16].astype("int") % 15 == 0)
-                    & (s["block_start"].str[17:19].astype("int") == 0)
-                )
-            ]
-            data = s
+            data = data[["time", "cluster_id", "amount"]]
         else:
             data = self.filter_data_for_identifier(data)
             if self.cluster_id_selector is not None:
                 data = data[data["cluster_id"] == self.cluster_id_selector]
-            s = data["block_start"].copy()
-            s = s[
-                (s.str[14:16].astype("int") % 15 >= 10)
-                | (
-                    (s.str[14:16].astype("int") % 15 == 0)
-                    & (s.str[17:19].astype("int") == 0)
-                )
-            ]
-            data = s.to_frame()
+            data = data[["time", "amount"]]
 
         data = data.reset_index(drop=True)
-        data.rename(columns={"block_start": "time"}, inplace=True)
         data["time"] = pd.to_datetime(data["time"])
-        data["amount"] = 1
 
         # amount of sessions that are active at 15min-timestamps
         if multi_files and (not cluster_id_comparison):
@@ -600,7 +682,7 @@ class DataSessions:
         else:
             groupers = pd.Grouper(key="time", freq="15min")
 
-        data = data.groupby(groupers)["amount"].sum()
+        data = data.groupby(groupers, observed=True)["amount"].sum()
         data = data.reset_index()
 
         # find max num of 15min interval-sessions in given interval
@@ -610,11 +692,27 @@ class DataSessions:
             groupers = [pd.Grouper(key="time", freq=interval), "cluster_id"]
         else:
             groupers = pd.Grouper(key="time", freq=interval)
-        data = data.groupby(groupers)["amount"].max()
+        data = data.groupby(groupers, observed=True)["amount"].max()
         data = data.reset_index()
 
         return data
 
+    def get_cas_block_mask(self, block_start: pd.Series) -> pd.Series:
+        """
+        Return which sessions include one of the 15min-timestamps.
+
+        Parameters
+        ----------
+        block_start : pd.Series
+            start of the sessions, as strings or datetimes
+
+        Returns
+        -------
+        pd.Series of bool
+            True for the sessions which include one of the 15min-timestamps
+        """
+        return get_cas_block_mask(block_start)
+
     def crop_data(self, first_date, last_date):
         """
         Set the data to the wanted interval.
@@ -626,16 +724,39 @@ class DataSessions:
         last_date: str
             last date of the new interval
         """
-        self.data = self.data[
-            (self.data["block_start"] >= (str(first_date)[:10] + " 00:00:00"))
-            & (self.data["block_end"] <= (str(last_date)[:10] + " 23:59:59"))
-        ]
+        first = str(first_date)[:10] + " 00:00:00"
+        last = str(last_date)[:10] + " 23:59:59"
+        # cached results, computed columns and rollups belong to the previous data
+        self.cache_key = None
+        self.data_with_feature_use = None
+        self.data_with_token_cost = None
+        self.data_cas = None
+        self.feature_package_combination = None
+        self.token_rollup = None
+        self.cas_histogram = None
+        if pd.api.types.is_datetime64_any_dtype(self.data["block_start"]):
+            self.data = self.data[
+                (self.data["block_start"] >= pd.Timestamp(first))
+                & (self.data["block_end"] <= pd.Timestamp(last))
+            ]
+        else:
+            self.data = self.data[
+                (self.data["block_start"] >= first) & (self.data["block_end"] <= last)
+            ]
 
-        self.data_pings.data = self.data_pings.data[
-            (self.data_pings.data["time"] >= (str(first_date)[:10] + "T00:00:00Z"))
-            & (self.data_pings.data["time"] <= (str(last_date)[:10] + "T23:59:59Z"))
-        ]
+        pings = self.data_pings.data
+        if pd.api.types.is_datetime64_any_dtype(pings["time"]):
+            self.data_pings.data = pings[
+                (pings["time"] >= pd.Timestamp(first))
+                & (pings["time"] <= pd.Timestamp(last))
+            ]
+        else:
+            self.data_pings.data = pings[
+                (pings["time"] >= first.replace(" ", "T") + "Z")
+                & (pings["time"] <= last.replace(" ", "T") + "Z")
+            ]
 
+    @memoize
     def get_total_token_amount(self):
         """
         Compute the total token usage.
@@ -657,50 +778,43 @@ class DataSessions:
 
         return data
 
+    @memoize
     def get_package_combination_percentage(self):
         """
         Return the amount of possible feature in percentage.
 
+        The percentages refer to all sessions, also to those of other identifiers and cluster ids.
+
         Returns
         ---------
         feature_package_combination: pd.DataFrame
-            data containing usage of possible feature packages
+            data containing usage (in percent) and count of possible feature packages
         """
         if self.feature_package_combination is None:
-            if self.data_with_feature_use is None:
-                self.get_data_with_feature_use()
-        feat_names = self.features["keyword"].tolist()
-        fpc_data = []
-        for i in range(1, 2 ** len(feat_names)):
-            combination = []
-            data = self.data_with_feature_use
-            data = self.filter_data_for_identifier(data)
+            feat_names = self.features["keyword"].tolist()
+            data = self.filter_data_for_identifier(self.data)
             if self.cluster_id_selector is not None:
                 data = data[data["cluster_id"] == self.cluster_id_selector]
-            j = 0
-            for fn in feat_names:
-                if (2**j & i) > 0:
-                    combination.append(fn)
-                    data = data[data[fn] == 1]
-                else:
-                    data = data[data[fn] == 0]
-                j += 1
-            total_rows = len(self.data_with_feature_use.index)
-            num_of_combination = len(data.index)
-            fpc_data.append(
-                [", ".join(combination), (num_of_combination / total_rows) * 100]
+            counts = get_combination_counts(
+                data["feature_mask"], self.features["bitmask"]
+            )[1:]
+            package_names = [
+                ", ".join(fn for j, fn in enumerate(feat_names) if (2**j & i) > 0)
+                for i in range(1, 2 ** len(feat_names))
+            ]
+            total_rows = len(self.data.index)
+
+            self.feature_package_combination = pd.DataFrame(
+                {
+                    "package_names": package_names,
+                    "usage": (counts / total_rows) * 100,
+                    "count": counts,
+                }
             )
 
-        self.feature_package_combination = pd.DataFrame(
-            fpc_data,
-            columns=[
-                "package_names",
-                "usage",
-            ],
-        )
-
         return self.feature_package_combination
 
+    @memoize
     def get_cas_statistics(self, identifier):
         """
         Compute the statistics for the concurrent active sessions.
@@ -744,6 +858,7 @@ class DataSessions:
             res, columns=["Identifier", "Max", "Mean", "Mean in weekdays"]
         )
 
+    @memoize
     def get_selector_comparison_data(
         self, group_by: list, group_in: str, interval: str = "D", multi_cluster=False
     ):
@@ -813,6 +928,7 @@ class DataSessions:
         dates.fillna(0, inplace=True)
         return dates
 
+    @memoize
     def get_multi_cas(
         self, group_by: list, group_in: str, interval: str = "D", multi_cluster=False
     ):
@@ -879,6 +995,7 @@ class DataSessions:
         dates = dates.fillna(0, axis="columns")
         return dates
 
+    @memoize
     def get_multi_total_token_amount(
         self, groups: list, definer: str, multi_cluster=False
     ):
@@ -932,10 +1049,11 @@ class DataSessions:
         Returns
         -------
         list of str
-            list of cluster_ids that appear in sessions
+            sorted list of cluster_ids that appear in sessions
         """
         c_ids = self.data["cluster_id"].copy()
-        return c_ids.drop_duplicates()
+        # the sessions are saved chunk by chunk, so their order doesn't follow the cluster_ids
+        return c_ids.drop_duplicates().sort_values()
 
     def get_file_ids(self):
         """Returns list of file identifier that appear in sessions.
@@ -976,22 +1094,53 @@ class DataSessions:
 
 
 class LicenseUsage:
-    def __init__(
-        self,
-        data: pd.DataFrame,
-    ):
+    def __init__(self, data: pd.DataFrame, counts: pd.DataFrame = None):
         """Dataframe of the License Usage
 
         Parameters
         ----------
         data : pd.Dataframe
+            license rows, not used if counts is given
+        counts : pd.DataFrame
+            number of cache generations per feature_name and identifier, as returned by
+            database.driver.get_license_counts, computed from data if None
 
         Methods
         -------
+        get_license_counts
+            Return the number of cache generations per feature_name and identifier.
         get_license_usage_data
             Return the number of cache generations of a feature.
         """
         self.data = data
+        self.counts = counts
+
+    def get_license_counts(self) -> pd.DataFrame:
+        """Return the number of cache generations per feature_name and identifier.
+
+        A resource_id is counted once per identifier, for the feature_name of its first row.
+
+        Returns
+        -------
+        pd.DataFrame
+            the columns feature_name, identifier and resources like database.driver.get_license_counts
+        """
+        if self.counts is not None:
+            return self.counts
+
+        data = self.data[["identifier", "feature_name", "resource_id"]]
+        counts = (
+            data.drop_duplicates(subset=["identifier", "resource_id"])
+            .groupby(["feature_name", "identifier"], sort=False)["resource_id"]
+            .count()
+            .rename("resources")
+            .reset_index()
+        )
+        # feature_names without a first row of a resource_id are listed too
+        features = data["feature_name"].dropna().drop_duplicates().to_frame()
+        return features.merge(counts, on="feature_name", how="left").fillna(
+            {"resources": 0}
+        )
 
     def get_license_usage_data(self, license_identifier: list):
         """
@@ -1003,51 +1152,28 @@ class LicenseUsage:
         Returns
         -------
         pd.DataFrame
-            data frame containing the number of caches generation of a feature and the total number
-            of cache generations
+            data frame containing the number of caches generation of a feature per identifier, the total number
+            of cache generations per identifier in the last row and the total over all identifiers in the column
+            Total
         """
+        counts = self.get_license_counts()
+        names = counts["feature_name"].drop_duplicates().str.rsplit("/", n=1).str[-1]
+        counts = counts.assign(
+            feature_name=counts["feature_name"].str.rsplit("/", n=1).str[-1]
+        )
 
-        license_df = self.data
-        result = pd.DataFrame([])
-        result["feature_name"] = license_df["feature_name"].drop_duplicates()
-        result["feature_name"] = (result["feature_name"].str.rsplit("/", n=1)).str[-1]
-
-        tot = pd.DataFrame({"feature_name": "Total", "resource_id": 0}, index=[0])
-        result = pd.concat([result, tot], ignore_index=True)
-
-        names = result.copy()
-        names["resource_id"] = 0
-
-        for ident in license_identifier:
-            n = names.copy()
-            df = license_df[license_df["identifier"] == ident]
-            res = (
-                df[["resource_id", "feature_name"]]
-                .drop_duplicates(subset="resource_id")
-                .groupby("feature_name")
-                .count()
-                .reset_index()
-                .sort_values(by=["resource_id"], ascending=False)
-            )
-
-            res["feature_name"] = (res["feature_name"].str.rsplit("/", n=1)).str[-1]
-            total_row = pd.Series(
-                {"feature_name": "Total", "resource_id": res["resource_id"].sum()}
-            )
-
-            res = pd.concat([res, total_row.to_frame().T], ignore_index=True)
-
-            for row_id, row in res.iterrows():
-                n.loc[n["feature_name"] == row["feature_name"], "resource_id"] = res[
-                    res["feature_name"] == row["feature_name"]
-                ]["resource_id"].item()
-            result[ident] = n["resource_id"]
-        result.fillna(0, inplace=True)
-
-        totals = []
-        for row_id, row in result.iterrows():
-            row = row[2:]
-            totals.append(row.sum())
-
-        result["Total"] = totals
-        return result
+        table = counts.pivot_table(
+            index="feature_name",
+            columns="identifier",
+            values="resources",
+            aggfunc="sum",
+        )
+        table = table.reindex(columns=license_identifier, fill_value=0).fillna(0)
+        total = table.sum()
+        table = pd.concat(
+            [table.reindex(index=names, fill_value=0), total.to_frame("Total").T]
+        ).astype(np.int64)
+        table["Total"] = table.sum(axis=1)
+
+        table.columns.name = None
+        return table.rename_axis("feature_name").reset_index()
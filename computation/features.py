@@ -3,36 +3,101 @@ This is features.py.
 
 features.py contains class Features.
 """
+import numpy as np
 import pandas as pd
 
-# # feature bitmasks
-#
-# API = 0x1,
-# Ui = 0x2,
-# Touch = 0x4,
-# Aux = 0x8,
-# AuxAdvanced = 0x10,
-# Query = 0x20,
-# Measurement = 0x40,
-# MeasurementAdvanced = 0x80,
-# WebVR = 0x100,
-# SharedSession = 0x200,
-# LocalVisibility = 0x400,
-# RemoteVisibility = 0x800,
-# RemoteRendering = 0x1000,
-# PaintMode = 0x2000,
-# ColorComparison = 0x4000,
-# StoreRestore = 0x8000,
-# PointRendering = 0x10000,
-# PbrMaterial = 0x20000,
-# SessionStorage = 0x40000,
-#
-# # pkg
-# Viewing = 0x80000,
-# DMU = 0x100000,
-# Collaboration = 0x200000,
-# XR = 0x400000,
-# ModelTracking = 0x800000
+# Bitmasks of all features of the feature_mask
+FEATURE_BITMASKS = {
+    "API": 0x1,
+    "Ui": 0x2,
+    "Touch": 0x4,
+    "Aux": 0x8,
+    "AuxAdvanced": 0x10,
+    "Query": 0x20,
+    "Measurement": 0x40,
+    "MeasurementAdvanced": 0x80,
+    "WebVR": 0x100,
+    "SharedSession": 0x200,
+    "LocalVisibility": 0x400,
+    "RemoteVisibility": 0x800,
+    "RemoteRendering": 0x1000,
+    "PaintMode": 0x2000,
+    "ColorComparison": 0x4000,
+    "StoreRestore": 0x8000,
+    "PointRendering": 0x10000,
+    "PbrMaterial": 0x20000,
+    "SessionStorage": 0x40000,
+    # pkg
+    "Viewing": 0x80000,
+    "DMU": 0x100000,
+    "Collaboration": 0x200000,
+    "XR": 0x400000,
+    "ModelTracking": 0x800000,
+}
+
+
+def decode_feature_masks(feature_masks, bitmasks) -> np.ndarray:
+    """Decode feature masks into the usage of features.
+
+    All features are decoded in one broadcast operation, the result needs one byte per feature and mask.
+
+    Parameters
+    ----------
+    feature_masks : array-like of int
+        feature masks, 24 bits as in FEATURE_BITMASKS
+    bitmasks : array-like of int
+        bitmasks of the features
+
+    Returns
+    -------
+    np.ndarray of np.uint8
+        one row per feature mask and one column per feature containing 1 if the feature is used, otherwise 0
+    """
+    feature_masks = np.asarray(feature_masks, dtype=np.uint32)
+    bitmasks = np.asarray(bitmasks, dtype=np.uint32)
+    used = (feature_masks[:, np.newaxis] & bitmasks[np.newaxis, :]) != 0
+    return used.view(np.uint8)
+
+
+def get_token_cost_matrix(feature_use: np.ndarray, token_consumption) -> np.ndarray:
+    """Return the token cost of the usage of features.
+
+    Parameters
+    ----------
+    feature_use : np.ndarray
+        usage of features as returned by decode_feature_masks
+    token_consumption : array-like of int
+        token consumption of the features
+
+    Returns
+    -------
+    np.ndarray of np.int64
+        one row per feature mask and one column per feature containing 0 or the token consumption of the feature
+    """
+    return feature_use * np.asarray(token_consumption, dtype=np.int64)[np.newaxis, :]
+
+
+def get_combination_counts(feature_masks, bitmasks) -> np.ndarray:
+    """Count how often each combination of features is used.
+
+    Every feature mask is projected onto the given bitmasks: bit j of its combination is set if the feature j is
+    used. The combinations are counted with one bincount.
+
+    Parameters
+    ----------
+    feature_masks : array-like of int
+        feature masks, 24 bits as in FEATURE_BITMASKS
+    bitmasks : array-like of int
+        bitmasks of the features
+
+    Returns
+    -------
+    np.ndarray of np.int64
+        number of feature masks per combination, the index of a combination has bit j set if it contains feature j
+    """
+    feature_use = decode_feature_masks(feature_masks, bitmasks)
+    combinations = feature_use @ (1 << np.arange(feature_use.shape[1], dtype=np.int64))
+    return np.bincount(combinations, minlength=2 ** feature_use.shape[1])
 
 
 class Features:
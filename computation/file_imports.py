@@ -1,8 +1,245 @@
+import shutil
+import tempfile
 import zipfile
-from io import BytesIO
+from contextlib import ExitStack, contextmanager
+from typing import IO, Iterator
 
 import pandas as pd
 
+from csv_config import feature_map, license_map
+
+# Number of lines which are read from a csv file at once in streaming mode
+CHUNK_SIZE = 250_000
+
+# Types of the used columns, the keys are the column names used in the application
+feature_dtypes = {
+    "cluster_id": str,
+    "app_instance_id": str,
+    "time": str,
+    "feature_mask": "int64",
+}
+license_dtypes = {
+    "grant_id": str,
+    "feature_name": str,
+    "cluster_id": str,
+    "resource_id": str,
+    "service_id": str,
+    "start_time": str,
+    "end_time": str,
+}
+
+
+# Size in bytes up to which a nested zip file is kept in memory, larger ones are spilled to a temporary file
+NESTED_ZIP_MEMORY = 64 * 2**20
+
+
+@contextmanager
+def open_nested_zip(zip_file: zipfile.ZipFile, file: str) -> Iterator[zipfile.ZipFile]:
+    """
+    Parameters
+    ----------
+    zip_file: zipfile.ZipFile
+        an opened zip file
+    file: str
+        the name of a zip file in zip_file
+
+    Returns
+    -------
+    context manager of the opened nested zip file,
+    it is decompressed once into a seekable copy, since the stream of the member restarts at every backward seek
+    """
+    with tempfile.SpooledTemporaryFile(max_size=NESTED_ZIP_MEMORY) as copy:
+        with zip_file.open(file) as data:
+            shutil.copyfileobj(data, copy)
+        copy.seek(0)
+        with zipfile.ZipFile(copy) as nested_zip:
+            yield nested_zip
+
+
+def get_csv_dtypes() -> dict:
+    """
+    Returns
+    -------
+    dict which maps the column names of the csv files to their types
+    """
+    dtypes = {feature_map[name]: dtype for name, dtype in feature_dtypes.items()}
+    dtypes.update({license_map[name]: dtype for name, dtype in license_dtypes.items()})
+    return dtypes
+
+
+def read_csv_chunks(data, chunksize: int = CHUNK_SIZE) -> Iterator[pd.DataFrame]:
+    """
+    Parameters
+    ----------
+    data: str or file-like object
+        the path or the content of a csv file
+    chunksize: int
+        the maximal number of lines per chunk
+
+    Returns
+    -------
+    iterator of pd.Dataframe which contains the used columns of the csv file in chunks of chunksize lines
+    """
+    dtypes = get_csv_dtypes()
+    with pd.read_csv(
+        data, dtype=dtypes, usecols=lambda c: c in dtypes, chunksize=chunksize
+    ) as reader:
+        yield from reader
+
+
+def stream_zip(path: str, filename: str, chunksize: int = CHUNK_SIZE):
+    """
+    Parameters
+    ----------
+    path: str
+        the absolute path of the zip file
+    filename: str
+        the name of the zip file
+    chunksize: int
+        the maximal number of lines per chunk
+
+    Returns
+    -------
+    iterator of tuples with an iterator of pd.Dataframe chunks and the file names,
+    the chunks of a file have to be read before the next file is requested
+    """
+    with zipfile.ZipFile(path + "/" + filename, mode="r") as zip_file:
+        yield from stream_deep_zip(zip_file, None, chunksize)
+
+
+def stream_deep_zip(zip_file: zipfile.ZipFile, name: str, chunksize: int):
+    """
+    Parameters
+    ----------
+    zip_file: zipfile.ZipFile
+        an opened zip file
+    name: str
+        the name of the zip file or None for the uploaded zip file
+    chunksize: int
+        the maximal number of lines per chunk
+
+    Returns
+    -------
+    iterator of tuples with an iterator of pd.Dataframe chunks and the file names
+    """
+    for file in zip_file.namelist():
+        if file.split(".")[-1] == "zip":
+            with open_nested_zip(zip_file, file) as nested_zip:
+                yield from stream_deep_zip(nested_zip, file, chunksize)
+        elif file.split(".")[-1] == "csv":
+            with zip_file.open(file) as data:
+                yield read_csv_chunks(data, chunksize), (
+                    file if name is None else name + "/" + file
+                )
+
+
+def get_zip_names(path: str, filename: str):
+    """
+    Parameters
+    ----------
+    path: str
+        the absolute path of the zip file
+    filename: str
+        the name of the zip file
+
+    Returns
+    -------
+    list of the names of all csv files in the zip file, in the order in which they are streamed
+    """
+    return [name for _, name in get_zip_members(path, filename)]
+
+
+def get_zip_members(path: str, filename: str):
+    """
+    Parameters
+    ----------
+    path: str
+        the absolute path of the zip file
+    filename: str
+        the name of the zip file
+
+    Returns
+    -------
+    list of tuples with the address of a csv file for read_zip_member and its name,
+    in the order in which the files are streamed
+    """
+    with zipfile.ZipFile(path + "/" + filename, mode="r") as zip_file:
+        return get_deep_zip_members(zip_file, None, ())
+
+
+def get_deep_zip_members(zip_file: zipfile.ZipFile, name: str, address: tuple):
+    """
+    Parameters
+    ----------
+    zip_file: zipfile.ZipFile
+        an opened zip file
+    name: str
+        the name of the zip file or None for the uploaded zip file
+    address: tuple of str
+        the names of the nested zip files which lead to zip_file
+
+    Returns
+    -------
+    list of tuples with the address and the name of all csv files in the zip file
+    """
+    members = []
+    for file in zip_file.namelist():
+        if file.split(".")[-1] == "zip":
+            with open_nested_zip(zip_file, file) as nested_zip:
+                members.extend(
+                    get_deep_zip_members(nested_zip, file, address + (file,))
+                )
+        elif file.split(".")[-1] == "csv":
+            members.append(
+                (address + (file,), file if name is None else name + "/" + file)
+            )
+    return members
+
+
+def read_zip_member(
+    path: str, filename: str, address: tuple, chunksize: int = CHUNK_SIZE
+) -> Iterator[pd.DataFrame]:
+    """
+    Parameters
+    ----------
+    path: str
+        the absolute path of the zip file
+    filename: str
+        the name of the zip file
+    address: tuple of str
+        the names of the nested zip files and the name of the csv file, as returned by get_zip_members
+    chunksize: int
+        the maximal number of lines per chunk
+
+    Returns
+    -------
+    iterator of pd.Dataframe which contains the used columns of the csv file in chunks of chunksize lines
+    """
+    with ExitStack() as stack:
+        zip_file = stack.enter_context(zipfile.ZipFile(path + "/" + filename, mode="r"))
+        for nested in address[:-1]:
+            zip_file = stack.enter_context(open_nested_zip(zip_file, nested))
+        data = stack.enter_context(zip_file.open(address[-1]))
+        yield from read_csv_chunks(data, chunksize)
+
+
+def stream_csv(path: str, filename: str, chunksize: int = CHUNK_SIZE):
+    """
+    Parameters
+    ----------
+    path: str
+        the absolute path of the csv file
+    filename: str
+        the name of the csv file
+    chunksize: int
+        the maximal number of lines per chunk
+
+    Returns
+    -------
+    list with a tuple containing an iterator of pd.Dataframe chunks and the file name
+    """
+    return [(read_csv_chunks(path + "/" + filename, chunksize), filename)]
+
 
 def upload_zip(path: str, filename: str):
     """
@@ -17,24 +254,17 @@ def upload_zip(path: str, filename: str):
     -------
     list of tuples with a pd.Dataframe and the file names
     """
-    filepath = path + "/" + filename
-    df_lst = []
-    with zipfile.ZipFile(filepath, mode="r") as zip_file:
-        files = zip_file.namelist()
-        for file in files:
-            if file.split(".")[-1] == "zip":
-                df_lst.extend(deep_zip(BytesIO(zip_file.read(file)), file))
-            elif file.split(".")[-1] == "csv":
-                data = zip_file.open(file)
-                df_lst.append((pd.read_csv(data), file))
-    return df_lst
+    return [
+        (pd.concat(chunks, ignore_index=True), name)
+        for chunks, name in stream_zip(path, filename)
+    ]
 
 
-def deep_zip(zipfile_data: BytesIO, name: str):
+def deep_zip(zipfile_data: IO[bytes], name: str):
     """
     Parameters
     ----------
-    zipfile_data: BytesIO
+    zipfile_data: file-like object
         the byte representation of a zipfile
     name: str
         the name of the zip file
@@ -43,16 +273,11 @@ def deep_zip(zipfile_data: BytesIO, name: str):
     -------
     list of tuples with a pd.Dataframe and the file names
     """
-    df_lst = []
     with zipfile.ZipFile(zipfile_data) as zip_file:
-        files = zip_file.namelist()
-        for file in files:
-            if file.split(".")[-1] == "zip":
-                df_lst.extend(deep_zip(BytesIO(zip_file.read(file)), file))
-            elif file.split(".")[-1] == "csv":
-                data = zip_file.open(file)
-                df_lst.append((pd.read_csv(data), name + "/" + file))
-    return df_lst
+        return [
+            (pd.concat(chunks, ignore_index=True), file_name)
+            for chunks, file_name in stream_deep_zip(zip_file, name, CHUNK_SIZE)
+        ]
 
 
 def upload_csv(path: str, filename: str):
@@ -68,4 +293,6 @@ def upload_csv(path: str, filename: str):
     -------
     a tuple containing a pd.Dataframe and the file name
     """
-    return [(pd.read_csv(path + "/" + filename), filename)]
+    return [
+        (pd.concat(read_csv_chunks(path + "/" + filename), ignore_index=True), filename)
+    ]
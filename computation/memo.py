@@ -0,0 +1,242 @@
+"""
+This is memo.py.
+
+memo.py contains the result cache of the dashboard: loaded DataSessions and the results of their methods are kept in
+an LRU cache with a memory cap. Results belong to one generation of the data (see
+database.driver.get_generation), an upload or a reset of the database starts a new generation and clears the cache.
+
+Data frames are copied when they are returned, but a cached DataSessions is shared by all callers: its methods store
+computed columns on it, so a memoized method which stores new data measures its entry again, and callers must not
+change its data, e.g. with crop_data.
+"""
+import sys
+import threading
+from collections import OrderedDict
+from functools import wraps
+from typing import Callable, Hashable
+
+import numpy as np
+import pandas as pd
+
+# Memory cap of the cached results in bytes
+MAX_BYTES = 512 * 2**20
+
+
+def get_size(value) -> int:
+    """Return the approximate memory usage of a result.
+
+    Parameters
+    ----------
+    value
+        a data frame, a series, a tuple or list of them or an object with data frames as attributes
+
+    Returns
+    -------
+    int
+        memory usage in bytes
+    """
+    if isinstance(value, pd.DataFrame):
+        if len(value.columns) == 0:
+            return int(value.index.memory_usage(deep=True))
+        return int(value.memory_usage(index=True, deep=True).sum())
+    if isinstance(value, pd.Series):
+        return int(value.memory_usage(index=True, deep=True))
+    if isinstance(value, (tuple, list)):
+        return sum(get_size(item) for item in value)
+    if hasattr(value, "__dict__"):
+        return sum(
+            get_size(attribute)
+            for attribute in vars(value).values()
+            if isinstance(attribute, (pd.DataFrame, pd.Series))
+            or hasattr(attribute, "__dict__")
+        )
+    return sys.getsizeof(value)
+
+
+def copy_result(value):
+    """Return a copy of the data frames of a result, so callers can't change the cached result.
+
+    Other objects are returned as they are, they are shared by all callers.
+    """
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        return value.copy()
+    if isinstance(value, tuple):
+        return tuple(copy_result(item) for item in value)
+    return value
+
+
+def get_stored(value) -> tuple:
+    """Return the identities of the data frames stored on an object, they change when a method stores new data.
+    """
+    if not hasattr(value, "__dict__"):
+        return ()
+    return tuple(
+        (name, id(attribute), get_stored(attribute))
+        for name, attribute in vars(value).items()
+        if isinstance(attribute, (pd.DataFrame, pd.Series))
+        or hasattr(attribute, "__dict__")
+    )
+
+
+def freeze(value) -> Hashable:
+    """Return a hashable version of a method argument, lists, arrays and series become tuples.
+    """
+    if isinstance(value, (list, tuple, np.ndarray, pd.Index, pd.Series)):
+        return tuple(freeze(item) for item in value)
+    return value
+
+
+class ResultCache:
+    """LRU cache of results of one generation of the data with a memory cap.
+
+    Attributes
+    ----------
+    max_bytes : int
+        memory cap of the cached results, the least recently used results are evicted first
+    generation : int
+        generation of the data of the cached results
+    entries : OrderedDict
+        cached results and their size, from least to most recently used
+    size : int
+        memory usage of the cached results in bytes
+
+    Methods
+    -------
+    get(key, compute, generation)
+        return the cached result of a key or compute and cache it
+    resize(value)
+        measure the entries of an object again after it stored new data
+    evict()
+        remove the least recently used results until the cache is within its memory cap
+    clear()
+        remove all results
+    """
+
+    def __init__(self, max_bytes: int = MAX_BYTES):
+        """Create an empty cache.
+
+        Parameters
+        ----------
+        max_bytes : int
+            memory cap of the cached results
+        """
+        self.max_bytes = max_bytes
+        self.generation = None
+        self.entries = OrderedDict()
+        self.size = 0
+        self.lock = threading.Lock()
+
+    def get(self, key: Hashable, compute: Callable, generation: int):
+        """Return the result of a key.
+
+        The result is computed and cached if it isn't cached yet. Results of older generations are removed and results
+        of an older generation than the cached one aren't cached. The size of a result is measured when it is cached,
+        objects which store new data later are measured again by resize.
+
+        Parameters
+        ----------
+        key : Hashable
+            key of the result
+        compute : Callable
+            function without parameters which computes the result
+        generation : int
+            generation of the data of the result
+
+        Returns
+        -------
+        the result, data frames are copies
+        """
+        with self.lock:
+            if self.generation is None or generation > self.generation:
+                self.entries.clear()
+                self.size = 0
+                self.generation = generation
+            if generation == self.generation and key in self.entries:
+                self.entries.move_to_end(key)
+                return copy_result(self.entries[key][0])
+
+        value = compute()
+        size = get_size(value)
+        with self.lock:
+            if generation == self.generation and size <= self.max_bytes:
+                if key in self.entries:
+                    self.size -= self.entries.pop(key)[1]
+                self.entries[key] = (value, size)
+                self.size += size
+                self.evict()
+        return copy_result(value)
+
+    def resize(self, value) -> None:
+        """Measure the entries of an object again, e.g. of a DataSessions which stored computed columns.
+
+        Parameters
+        ----------
+        value
+            the cached object
+        """
+        with self.lock:
+            keys = [key for key, (cached, _) in self.entries.items() if cached is value]
+        if not keys:
+            return
+        size = get_size(value)
+        with self.lock:
+            for key in keys:
+                if key in self.entries and self.entries[key][0] is value:
+                    self.size += size - self.entries[key][1]
+                    self.entries[key] = (value, size)
+            self.evict()
+
+    def evict(self) -> None:
+        """Remove the least recently used results until the cache is within its memory cap, the lock is held.
+        """
+        while self.size > self.max_bytes:
+            self.size -= self.entries.popitem(last=False)[1][1]
+
+    def clear(self) -> None:
+        """Remove all results."""
+        with self.lock:
+            self.entries.clear()
+            self.size = 0
+
+
+# Cache of the dashboard process
+RESULTS = ResultCache()
+
+
+def memoize(method: Callable) -> Callable:
+    """Cache the results of a DataSessions method in RESULTS.
+
+    The results are cached for the cache_key of the object, whose first element is the generation of the data.
+    Methods of objects without cache_key are not cached. If the method stores new data on the object, the entries of
+    the object are measured again.
+
+    Parameters
+    ----------
+    method : Callable
+        method of DataSessions
+
+    Returns
+    -------
+    Callable
+        the method with cache
+    """
+
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        if self.cache_key is None:
+            return method(self, *args, **kwargs)
+        key = (
+            self.cache_key,
+            method.__name__,
+            freeze(args),
+            freeze(sorted(kwargs.items())),
+        )
+        stored = get_stored(self)
+        result = RESULTS.get(
+            key, lambda: method(self, *args, **kwargs), self.cache_key[0]
+        )
+        if get_stored(self) != stored:
+            RESULTS.resize(self)
+        return result
+
+    return wrapper
@@ -0,0 +1,178 @@
+"""
+This is rollups.py.
+
+rollups.py contains the token rollups: the number of sessions which use a feature per interval, identifier and
+cluster_id, and the CAS histogram: the number of sessions active at each 15min-timestamp per identifier and
+cluster_id. The token consumption and the concurrent active sessions are computed from them instead of every session.
+"""
+
+import numpy as np
+import pandas as pd
+from pandas.tseries.frequencies import to_offset
+
+from computation.features import decode_feature_masks
+
+# Intervals of the rollups, every interval divides the next one and a day
+ROLLUP_INTERVALS = ["15min", "H", "D"]
+
+
+def get_token_rollup(sessions: pd.DataFrame, features: pd.DataFrame) -> pd.DataFrame:
+    """Count the sessions which use each feature per interval of ROLLUP_INTERVALS.
+
+    A session belongs to the interval of its block_start. Sessions which end on the next day are counted
+    separately (spill = 1), because they are cut off if their day is the last day of a selected time interval.
+
+    Parameters
+    ----------
+    sessions : pd.DataFrame
+        sessions with the columns identifier, cluster_id, feature_mask, block_start and block_end as datetimes
+    features : pd.DataFrame
+        metered features
+
+    Returns
+    -------
+    pd.DataFrame
+        one row per identifier, cluster_id, interval, time, spill and feature with the number of sessions
+    """
+    spill = (
+        sessions["block_end"].dt.normalize() > sessions["block_start"].dt.normalize()
+    ).astype("int64")
+    rows, columns = np.nonzero(
+        decode_feature_masks(sessions["feature_mask"], features["bitmask"])
+    )
+    usage = pd.DataFrame(
+        {
+            "identifier": sessions["identifier"].to_numpy()[rows],
+            "cluster_id": sessions["cluster_id"].to_numpy()[rows],
+            "block_start": sessions["block_start"].to_numpy()[rows],
+            "spill": spill.to_numpy()[rows],
+            "feature": features["keyword"].to_numpy()[columns],
+        }
+    )
+
+    rollups = []
+    for interval in ROLLUP_INTERVALS:
+        rollup = (
+            usage.assign(time=usage["block_start"].dt.floor(interval))
+            .groupby(
+                ["identifier", "cluster_id", "time", "spill", "feature"], dropna=False
+            )
+            .size()
+            .reset_index(name="sessions")
+        )
+        rollup.insert(2, "interval", interval)
+        rollups.append(rollup)
+    return pd.concat(rollups, ignore_index=True)
+
+
+def get_cas_block_mask(block_start: pd.Series) -> pd.Series:
+    """Return which sessions include one of the 15min-timestamps.
+
+    Parameters
+    ----------
+    block_start : pd.Series
+        start of the sessions, as strings or datetimes
+
+    Returns
+    -------
+    pd.Series of bool
+        True for the sessions which include one of the 15min-timestamps
+    """
+    if pd.api.types.is_datetime64_any_dtype(block_start):
+        minute = block_start.dt.minute
+        second = block_start.dt.second
+    else:
+        minute = block_start.str[14:16].astype("int")
+        second = block_start.str[17:19].astype("int")
+    return (minute % 15 >= 10) | ((minute % 15 == 0) & (second == 0))
+
+
+def get_cas_histogram(sessions: pd.DataFrame) -> pd.DataFrame:
+    """Count the sessions which include a 15min-timestamp per 15min interval.
+
+    Like in get_token_rollup, sessions which end on the next day are counted separately (spill = 1).
+
+    Parameters
+    ----------
+    sessions : pd.DataFrame
+        sessions with the columns identifier, cluster_id, block_start and block_end as datetimes
+
+    Returns
+    -------
+    pd.DataFrame
+        one row per identifier, cluster_id, time and spill with the number of sessions
+    """
+    sessions = sessions[get_cas_block_mask(sessions["block_start"])]
+    spill = (
+        sessions["block_end"].dt.normalize() > sessions["block_start"].dt.normalize()
+    )
+    return (
+        pd.DataFrame(
+            {
+                "identifier": sessions["identifier"],
+                "cluster_id": sessions["cluster_id"],
+                "time": sessions["block_start"].dt.floor("15min"),
+                "spill": spill.astype("int64"),
+            }
+        )
+        .groupby(["identifier", "cluster_id", "time", "spill"], dropna=False)
+        .size()
+        .reset_index(name="sessions")
+    )
+
+
+def get_rollup_interval(interval: str):
+    """Return the coarsest interval of ROLLUP_INTERVALS whose intervals lie completely in the given intervals.
+
+    Parameters
+    ----------
+    interval : str
+        length of interval, a pandas offset alias
+
+    Returns
+    -------
+    str
+        interval of ROLLUP_INTERVALS or None, if the given interval is shorter than all of them
+    """
+    offset = to_offset(interval)
+    if not isinstance(offset, pd.offsets.Tick):
+        # weeks, months, ... consist of whole days
+        return ROLLUP_INTERVALS[-1]
+    for rollup_interval in reversed(ROLLUP_INTERVALS):
+        if offset.nanos % to_offset(rollup_interval).nanos == 0:
+            return rollup_interval
+    return None
+
+
+def get_token_cost(rollup: pd.DataFrame, features: pd.DataFrame) -> pd.DataFrame:
+    """Return the token cost of the rollup of one interval.
+
+    Parameters
+    ----------
+    rollup : pd.DataFrame
+        rows of get_token_rollup of one interval, the time as block_start
+    features : pd.DataFrame
+        metered features
+
+    Returns
+    -------
+    pd.DataFrame
+        one row per identifier, cluster_id and block_start with one column for the cost of each feature and a
+        column total with the cost of all features, like the sessions with token cost
+    """
+    feat_names = features["keyword"].tolist()
+    token_consumption = dict(zip(feat_names, features["token_consumption"]))
+    cost = rollup["sessions"].to_numpy() * rollup["feature"].map(token_consumption)
+    data = (
+        rollup.assign(cost=cost.fillna(0).astype("int64"))
+        .groupby(["identifier", "cluster_id", "block_start", "feature"], dropna=False)[
+            "cost"
+        ]
+        .sum()
+        .unstack("feature", fill_value=0)
+        .reindex(columns=feat_names, fill_value=0)
+        .reset_index()
+    )
+    data.columns.name = None
+    data["total"] = data[feat_names].sum(axis=1).astype(np.int64)
+    return data
@@ -0,0 +1,373 @@
+"""
+This is session_blocks.py.
+
+session_blocks.py contains the vectorized engine which turns pings into session blocks. The blocks of different
+cluster_ids are independent, so extract_session_blocks can split the pings by cluster_id over a pool of processes,
+which read the pings from shared memory.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
+import pandas as pd
+
+
+def extract_session_blocks(
+    pings: pd.DataFrame, block_length: int, workers: int = 1
+) -> pd.DataFrame:
+    """Create session blocks from pings.
+
+    A block is opened by the first ping of a (cluster_id, app_instance_id) pair and contains every following ping
+    of the same pair that happened before block_start + block_length. The next ping opens a new block.
+
+    Parameters
+    ----------
+    pings : pd.DataFrame
+        pings with the columns cluster_id, app_instance_id, time and feature_mask
+    block_length : int
+        length of a block in seconds
+    workers : int
+        number of processes, the pings are split by cluster_id if it is greater than 1
+
+    Returns
+    -------
+    pd.DataFrame
+        one row per block with the columns cluster_id, app_instance_id, feature_mask, block_start, block_end and
+        last_ping, the time columns are datetimes
+    """
+    if workers > 1 and pings["cluster_id"].nunique() > 1:
+        return extract_session_blocks_parallel(pings, block_length, workers)
+
+    data = pings.sort_values(by=["cluster_id", "app_instance_id", "time"])
+    data = data.reset_index(drop=True)  # make sure that indices exist correctly
+    time = pd.to_datetime(data["time"])
+
+    c_ids = data["cluster_id"].to_numpy()
+    a_ids = data["app_instance_id"].to_numpy()
+    timestamps = pd.DatetimeIndex(time).asi8
+    starts = get_block_starts(
+        timestamps, c_ids, a_ids, pd.Timedelta(seconds=block_length).value
+    )
+    ends = np.append(starts[1:], len(timestamps))
+    if len(starts) == 0:
+        return data.iloc[:0][["cluster_id", "app_instance_id", "feature_mask"]].assign(
+            block_start=time.iloc[:0],
+            block_end=time.iloc[:0],
+            last_ping=time.iloc[:0],
+        )
+
+    block_start = time.iloc[starts].reset_index(drop=True)
+    return pd.DataFrame(
+        {
+            "cluster_id": c_ids[starts],
+            "app_instance_id": a_ids[starts],
+            "feature_mask": np.bitwise_or.reduceat(
+                data["feature_mask"].to_numpy(), starts
+            ),
+            "block_start": block_start,
+            "block_end": block_start + pd.Timedelta(seconds=block_length),
+            "last_ping": time.iloc[ends - 1].reset_index(drop=True),
+        }
+    )
+
+
+def extract_session_blocks_parallel(
+    pings: pd.DataFrame, block_length: int, workers: int
+) -> pd.DataFrame:
+    """Create session blocks from pings in a pool of processes, see extract_session_blocks.
+
+    The cluster_ids and app_instance_ids are replaced by codes in their sort order and the cluster_ids are split into
+    consecutive ranges with about the same number of pings. The codes, the times and the feature masks are copied
+    into shared memory in the order of the ranges, every process extracts the blocks of one range. The ranges are
+    consecutive, so the blocks of the processes are concatenated in the order of extract_session_blocks.
+
+    Parameters
+    ----------
+    pings : pd.DataFrame
+        pings with the columns cluster_id, app_instance_id, time and feature_mask
+    block_length : int
+        length of a block in seconds
+    workers : int
+        number of processes
+
+    Returns
+    -------
+    pd.DataFrame
+        the blocks in the format of extract_session_blocks
+    """
+    time = pd.to_datetime(pings["time"])
+    c_codes, c_ids = pd.factorize(pings["cluster_id"], sort=True)
+    a_codes, a_ids = pd.factorize(pings["app_instance_id"], sort=True)
+
+    # consecutive ranges of cluster_ids with about the same number of pings
+    counts = np.cumsum(np.bincount(c_codes, minlength=len(c_ids)))
+    bounds = np.searchsorted(
+        counts, counts[-1] * np.arange(1, workers) / workers, side="left"
+    )
+    partition = np.searchsorted(bounds, np.arange(len(c_ids)), side="left")
+    order = np.argsort(partition[c_codes].astype(np.int16), kind="stable")
+    ranges = np.searchsorted(
+        partition[c_codes][order], np.arange(workers + 1), side="left"
+    )
+
+    memory = SharedMemory(create=True, size=max(4 * len(order) * 8, 1))
+    try:
+        columns = np.ndarray((4, len(order)), dtype=np.int64, buffer=memory.buf)
+        columns[0] = c_codes[order]
+        columns[1] = a_codes[order]
+        columns[2] = pd.DatetimeIndex(time).asi8[order]
+        columns[3] = pings["feature_mask"].to_numpy(dtype=np.int64)[order]
+        del columns
+
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            blocks = list(
+                pool.map(
+                    extract_partition,
+                    [memory.name] * workers,
+                    [len(order)] * workers,
+                    ranges[:-1],
+                    ranges[1:],
+                    [pd.Timedelta(seconds=block_length).value] * workers,
+                )
+            )
+    finally:
+        memory.close()
+        memory.unlink()
+
+    c_block, a_block, masks, starts, last_pings = (
+        np.concatenate(column) for column in zip(*blocks)
+    )
+    block_start = pd.Series(pd.to_datetime(starts)).dt.tz_localize(time.dt.tz)
+    return pd.DataFrame(
+        {
+            "cluster_id": c_ids[c_block],
+            "app_instance_id": a_ids[a_block],
+            "feature_mask": masks,
+            "block_start": block_start,
+            "block_end": block_start + pd.Timedelta(seconds=block_length),
+            "last_ping": pd.Series(pd.to_datetime(last_pings)).dt.tz_localize(
+                time.dt.tz
+            ),
+        }
+    )
+
+
+def extract_partition(
+    name: str, length: int, start: int, stop: int, block_length: int
+) -> tuple:
+    """Extract the blocks of a range of pings in shared memory, runs in a worker process.
+
+    Parameters
+    ----------
+    name : str
+        name of the shared memory with the cluster_id codes, app_instance_id codes, times and feature masks
+    length : int
+        number of pings in the shared memory
+    start : int
+        position of the first ping of the range
+    stop : int
+        position after the last ping of the range
+    block_length : int
+        length of a block in nanoseconds
+
+    Returns
+    -------
+    tuple of np.ndarray
+        cluster_id codes, app_instance_id codes, feature masks, starts and last pings of the blocks in sort order
+    """
+    memory = SharedMemory(name=name)
+    try:
+        columns = np.ndarray((4, length), dtype=np.int64, buffer=memory.buf)
+        c_codes, a_codes, timestamps, masks = columns[:, start:stop].copy()
+        del columns
+    finally:
+        memory.close()
+
+    order = np.lexsort((timestamps, a_codes, c_codes))
+    c_codes, a_codes = c_codes[order], a_codes[order]
+    timestamps, masks = timestamps[order], masks[order]
+    starts = get_block_starts(timestamps, c_codes, a_codes, block_length)
+    if len(starts) == 0:
+        return c_codes[:0], a_codes[:0], masks[:0], timestamps[:0], timestamps[:0]
+    ends = np.append(starts[1:], len(timestamps))
+    return (
+        c_codes[starts],
+        a_codes[starts],
+        np.bitwise_or.reduceat(masks, starts),
+        timestamps[starts],
+        timestamps[ends - 1],
+    )
+
+
+def get_block_starts(
+    timestamps: np.ndarray, c_ids: np.ndarray, a_ids: np.ndarray, block_length: int
+) -> np.ndarray:
+    """Return the positions of all pings which open a block.
+
+    The pings have to be sorted by cluster_id, app_instance_id and time.
+
+    A ping opens a block if it is the first of its (cluster_id, app_instance_id) pair, if the previous ping is at
+    least block_length earlier or if it is the first ping at or after the end of the previous block. The first two
+    cases are found directly, the last one by jumping from block start to block start inside of every run of dense
+    pings. All runs are jumped at the same time, so the loop only takes as many steps as the longest run has blocks.
+
+    Parameters
+    ----------
+    timestamps : np.ndarray of int
+        time of the pings, in any unit
+    c_ids : np.ndarray
+        cluster_id of the pings
+    a_ids : np.ndarray
+        app_instance_id of the pings
+    block_length : int
+        length of a block in the unit of timestamps
+
+    Returns
+    -------
+    np.ndarray of int
+        sorted positions of the pings which open a block
+    """
+    n = len(timestamps)
+    if n == 0:
+        return np.array([], dtype=int)
+    gaps = np.diff(timestamps)
+    run_head = np.ones(n, dtype=bool)
+    run_head[1:] = (c_ids[1:] != c_ids[:-1]) | (a_ids[1:] != a_ids[:-1])
+    run_head[1:] |= gaps >= block_length
+    heads = np.flatnonzero(run_head)
+
+    # shrink the numbers, so that the key below can't overflow
+    unit = np.gcd.reduce(np.append(gaps[~run_head[1:]], block_length))
+    block_length = block_length // unit
+
+    # sorted key over all pings, consecutive runs are block_length apart from each other
+    run_id = np.cumsum(run_head) - 1
+    relative = (timestamps - timestamps[heads][run_id]) // unit
+    span = relative[np.append(heads[1:], n) - 1] + block_length
+    offset = np.concatenate(([0], np.cumsum(span)[:-1]))
+    key = relative + offset[run_id]
+
+    # first ping at or after the end of a block opened by each ping
+    next_start = np.searchsorted(key, key + block_length, side="left")
+
+    run_end = np.append(heads[1:], n)
+    starts = [heads]
+    frontier = next_start[heads]
+    while frontier.size:
+        open_runs = frontier < run_end
+        frontier = frontier[open_runs]
+        run_end = run_end[open_runs]
+        starts.append(frontier)
+        frontier = next_start[frontier]
+
+    return np.sort(np.concatenate(starts))
+
+
+def get_late_groups(pings: pd.DataFrame, open_blocks: pd.DataFrame) -> pd.DataFrame:
+    """Find the (cluster_id, app_instance_id) pairs with pings before the last_ping of their open block.
+
+    The blocks of these pairs can't be resumed, since the late pings may fall into or between closed blocks.
+
+    Parameters
+    ----------
+    pings : pd.DataFrame
+        new pings with the columns cluster_id, app_instance_id and time
+    open_blocks : pd.DataFrame
+        open blocks with the columns cluster_id, app_instance_id and last_ping
+
+    Returns
+    -------
+    pd.DataFrame
+        the cluster_id and app_instance_id of the pairs with late pings
+    """
+    keys = ["cluster_id", "app_instance_id"]
+    time = pd.to_datetime(pings["time"], utc=True).dt.tz_localize(None)
+    carried = pings[keys].merge(open_blocks[keys + ["last_ping"]], on=keys, how="left")
+    last_ping = pd.to_datetime(carried["last_ping"], utc=True).dt.tz_localize(None)
+    late = time.to_numpy() < last_ping.to_numpy()
+    return pings[keys][late].drop_duplicates().reset_index(drop=True)
+
+
+def resume_session_blocks(
+    pings: pd.DataFrame, open_blocks: pd.DataFrame, block_length: int
+):
+    """Create session blocks from pings, continuing the open blocks of a previous extraction.
+
+    The last block of every (cluster_id, app_instance_id) pair is open, because later pings can still extend it.
+    An open block takes part in the extraction like a ping at its block_start, so the pings are only sorted and
+    scanned for the pairs that appear in them. Pings of a pair have to arrive in time order: the pairs with pings
+    before the last_ping of their open block (see get_late_groups) have to be extracted from all their pings instead.
+
+    All times are handled as UTC without time zone.
+
+    Parameters
+    ----------
+    pings : pd.DataFrame
+        new pings with the columns cluster_id, app_instance_id, time and feature_mask
+    open_blocks : pd.DataFrame
+        open blocks with the columns cluster_id, app_instance_id, feature_mask, block_start, block_end and
+        last_ping as datetimes
+    block_length : int
+        length of a block in seconds
+
+    Returns
+    -------
+    pd.DataFrame
+        blocks which are closed by the new pings
+    pd.DataFrame
+        open blocks after the new pings, one per (cluster_id, app_instance_id) pair
+    """
+    keys = ["cluster_id", "app_instance_id"]
+    time = pd.to_datetime(pings["time"], utc=True).dt.tz_localize(None)
+    data = pings[keys + ["feature_mask"]].assign(time=time, last_ping=time)
+    data = data.reset_index(drop=True)
+
+    touched = pd.MultiIndex.from_frame(open_blocks[keys]).isin(
+        pd.MultiIndex.from_frame(data[keys])
+    )
+    data = pd.concat(
+        [
+            open_blocks[touched][
+                keys + ["feature_mask", "block_start", "last_ping"]
+            ].rename(columns={"block_start": "time"}),
+            data,
+        ],
+        ignore_index=True,
+    )
+    data = data.sort_values(by=keys + ["time"], kind="stable")
+
+    c_ids = data["cluster_id"].to_numpy()
+    a_ids = data["app_instance_id"].to_numpy()
+    starts = get_block_starts(
+        data["time"].to_numpy(dtype="int64"),
+        c_ids,
+        a_ids,
+        pd.Timedelta(seconds=block_length).value,
+    )
+    if len(starts) == 0:
+        return open_blocks.iloc[:0], open_blocks
+
+    block_start = data["time"].iloc[starts].reset_index(drop=True)
+    blocks = pd.DataFrame(
+        {
+            "cluster_id": c_ids[starts],
+            "app_instance_id": a_ids[starts],
+            "feature_mask": np.bitwise_or.reduceat(
+                data["feature_mask"].to_numpy(), starts
+            ),
+            "block_start": block_start,
+            "block_end": block_start + pd.Timedelta(seconds=block_length),
+            "last_ping": pd.to_datetime(
+                np.maximum.reduceat(data["last_ping"].to_numpy(dtype="int64"), starts)
+            ),
+        }
+    )
+
+    # the last block of each pair stays open
+    is_open = np.ones(len(starts), dtype=bool)
+    is_open[:-1] = (c_ids[starts[1:]] != c_ids[starts[:-1]]) | (
+        a_ids[starts[1:]] != a_ids[starts[:-1]]
+    )
+    open_blocks = pd.concat([open_blocks[~touched], blocks[is_open]])
+    return blocks[~is_open].reset_index(drop=True), open_blocks.reset_index(drop=True)
@@ -0,0 +1,209 @@
+"""
+This is sketches.py.
+
+sketches.py contains the HyperLogLog sketches of the distinct values of a column, e.g. the app_instance_ids of a
+cluster_id or the resource_ids of a feature, per identifier, name and day. A sketch is a fixed number of registers
+which keep the largest number of leading zeros of the hashes of the values, so sketches are merged with a maximum and
+the distinct values of any union of identifiers and days are estimated from their merged sketch with a relative
+standard error of STANDARD_ERROR.
+"""
+
+import zlib
+
+import numpy as np
+import pandas as pd
+
+# Number of hash bits which select the register, a sketch has 2 ** PRECISION registers
+PRECISION = 12
+REGISTERS = 1 << PRECISION
+
+# Relative standard error of an estimate
+STANDARD_ERROR = 1.04 / np.sqrt(REGISTERS)
+
+
+def pack(registers: np.ndarray) -> bytes:
+    """Return the registers of a sketch as compressed bytes, sketches of few values are mostly zeros.
+    """
+    return zlib.compress(registers.astype(np.uint8).tobytes())
+
+
+def unpack(blobs) -> np.ndarray:
+    """Return the registers of packed sketches as an array with one row per sketch."""
+    registers = np.zeros((len(blobs), REGISTERS), dtype=np.uint8)
+    for i, blob in enumerate(blobs):
+        registers[i] = np.frombuffer(zlib.decompress(blob), dtype=np.uint8)
+    return registers
+
+
+def get_registers(values: pd.Series) -> tuple:
+    """Return the register and its candidate value of every value.
+
+    Parameters
+    ----------
+    values : pd.Series
+        values without missing values, they are hashed as strings
+
+    Returns
+    -------
+    np.ndarray
+        index of the register of every value
+    np.ndarray
+        number of leading zeros plus one of the remaining hash bits of every value
+    """
+    hashes = pd.util.hash_array(values.astype(str).to_numpy(dtype=object))
+    index = (hashes >> np.uint64(64 - PRECISION)).astype(np.int64)
+    rest = hashes & np.uint64((1 << (64 - PRECISION)) - 1)
+    # the remaining bits fit into a float exactly, so the exponent is their bit length
+    bit_length = np.frexp(rest.astype(np.float64))[1]
+    return index, (64 - PRECISION - bit_length + 1).astype(np.uint8)
+
+
+def get_sketches(
+    data: pd.DataFrame, name: str, value: str, time: str, keys: list = None
+) -> pd.DataFrame:
+    """Sketch the distinct values of a column per name and day.
+
+    Parameters
+    ----------
+    data : pd.DataFrame
+        rows with the columns name, value and time
+    name : str
+        column of the names, e.g. cluster_id
+    value : str
+        column of the counted values, e.g. app_instance_id
+    time : str
+        column of the times, as datetimes or strings, naive times are UTC
+    keys : list of str
+        further columns which identify a sketch, e.g. identifier
+
+    Returns
+    -------
+    pd.DataFrame
+        one row per keys, name and day with the packed sketch in the column registers
+    """
+    keys = list(keys or [])
+    data = data[keys + [name, value, time]].dropna()
+    groups = data[keys + [name]].assign(
+        day=pd.to_datetime(data[time], utc=True)
+        .dt.tz_localize(None)
+        .dt.normalize()
+        .to_numpy()
+    )
+    group_keys = keys + [name, "day"]
+    if len(data.index) == 0:
+        return (
+            groups.iloc[:0]
+            .assign(registers=pd.Series(dtype=object))
+            .rename(columns={name: "name"})
+        )
+
+    codes = groups.groupby(group_keys, sort=False).ngroup().to_numpy()
+    index, rank = get_registers(data[value])
+    # the last row of every run of a sketch and register has the largest rank
+    order = np.lexsort((rank, index, codes))
+    codes, index, rank = codes[order], index[order], rank[order]
+    last = np.ones(len(codes), dtype=bool)
+    last[:-1] = (codes[1:] != codes[:-1]) | (index[1:] != index[:-1])
+    registers = np.zeros((codes.max() + 1, REGISTERS), dtype=np.uint8)
+    registers[codes[last], index[last]] = rank[last]
+
+    sketches = groups.drop_duplicates(subset=group_keys).reset_index(drop=True)
+    sketches["registers"] = [pack(row) for row in registers]
+    return sketches.rename(columns={name: "name"})
+
+
+def merge_registers(sketches: pd.DataFrame, keys: list) -> tuple:
+    """Merge the sketches with the same keys.
+
+    Parameters
+    ----------
+    sketches : pd.DataFrame
+        sketches with the keys and the packed sketch in the column registers
+    keys : list of str
+        columns of the merged sketches, an empty list merges all sketches
+
+    Returns
+    -------
+    pd.DataFrame
+        the keys of the merged sketches, sorted
+    np.ndarray
+        the registers of the merged sketches, one row per sketch
+    """
+    if len(sketches.index) == 0:
+        return sketches[keys].iloc[:0], np.zeros((0, REGISTERS), dtype=np.uint8)
+    if keys:
+        grouped = sketches.groupby(keys)
+        codes = grouped.ngroup().to_numpy()
+        merged = grouped.size().reset_index()[keys]
+    else:
+        codes = np.zeros(len(sketches.index), dtype=np.int64)
+        merged = pd.DataFrame(index=[0])
+    order = np.argsort(codes, kind="stable")
+    starts = np.flatnonzero(np.diff(codes[order], prepend=-1))
+    registers = np.maximum.reduceat(
+        unpack(sketches["registers"].to_numpy()[order]), starts
+    )
+    return merged, registers
+
+
+def merge_sketches(sketches: pd.DataFrame, keys: list) -> pd.DataFrame:
+    """Merge the sketches with the same keys, see merge_registers.
+
+    Returns
+    -------
+    pd.DataFrame
+        one row per keys with the packed merged sketch in the column registers
+    """
+    merged, registers = merge_registers(sketches, keys)
+    merged["registers"] = pd.Series([pack(row) for row in registers], dtype=object)
+    return merged
+
+
+def estimate(registers: np.ndarray) -> np.ndarray:
+    """Estimate the number of distinct values of sketches.
+
+    Sketches with empty registers and a small estimate use linear counting, the 64 bit hashes make a correction of
+    large estimates unnecessary.
+
+    Parameters
+    ----------
+    registers : np.ndarray
+        one row of registers per sketch
+
+    Returns
+    -------
+    np.ndarray
+        estimated number of distinct values per sketch
+    """
+    alpha = 0.7213 / (1 + 1.079 / REGISTERS)
+    raw = (
+        alpha * REGISTERS**2 / np.sum(np.exp2(-registers.astype(np.float64)), axis=1)
+    )
+    zeros = np.sum(registers == 0, axis=1)
+    with np.errstate(divide="ignore"):
+        linear = REGISTERS * np.log(REGISTERS / zeros)
+    return np.where((raw <= 2.5 * REGISTERS) & (zeros > 0), linear, raw)
+
+
+def get_distinct_counts(sketches: pd.DataFrame, keys: list) -> pd.DataFrame:
+    """Estimate the distinct values of the union of the sketches with the same keys.
+
+    Parameters
+    ----------
+    sketches : pd.DataFrame
+        sketches with the keys and the packed sketch in the column registers
+    keys : list of str
+        columns of the counts, e.g. ["name"] for the union over all identifiers and days
+
+    Returns
+    -------
+    pd.DataFrame
+        one row per keys with the estimate in the column distinct and the bounds of two standard errors (about 95 %)
+        in the columns lower and upper
+    """
+    counts, registers = merge_registers(sketches, keys)
+    distinct = estimate(registers)
+    counts["distinct"] = np.round(distinct).astype(np.int64)
+    counts["lower"] = np.floor(distinct * (1 - 2 * STANDARD_ERROR)).astype(np.int64)
+    counts["upper"] = np.ceil(distinct * (1 + 2 * STANDARD_ERROR)).astype(np.int64)
+    return counts
@@ -0,0 +1,270 @@
+"""
+This is artifacts.py.
+
+artifacts.py contains the server-side store of the figures and tables of the feature usage tab. The browser only holds
+the key of a selection. The selection, its figures and its tables are saved under this key in a diskcache, which is
+shared by all processes of the dashboard. The key contains the generation of the data, so artifacts of outdated data
+are never used; they are evicted as the least recently used ones. After an upload, warm_up computes the artifacts of
+the selection of the new identifier in the background, so its first view is answered from the store. The PNG images
+of the export are saved under the hash of their figure, so an unchanged figure is rendered once.
+"""
+import hashlib
+import json
+import os
+
+import diskcache
+import pandas as pd
+
+import database.driver as driver
+from dash_app import background
+from vis.graph_vis import empty_fig
+from vis.rendering import render_pngs
+from vis.web_designs import DROPDOWN_OPTIONS
+
+ARTIFACTS_PATH = os.path.abspath("./cache/artifacts")
+
+artifacts = diskcache.Cache(ARTIFACTS_PATH, eviction_policy="least-recently-used")
+
+
+def get_key(view: dict) -> str:
+    """
+    Parameters
+    ----------
+    view : dict
+        a selection of the feature usage tab
+
+    Returns
+    -------
+    str:
+        the key of the selection for the current generation of the data
+    """
+    data = json.dumps(
+        {"generation": driver.get_generation(), "view": view}, sort_keys=True
+    )
+    return hashlib.sha1(data.encode()).hexdigest()
+
+
+def get_view_info(view: dict, rollup_days: tuple = None) -> dict:
+    """
+    Gets the properties of a selection which depend on its sessions,
+    they are computed when they are requested for the first time
+
+    Parameters
+    ----------
+    view : dict
+        the selection without graph settings
+    rollup_days : tuple
+        first and last day of the shared rollups, see background.load_sessions
+
+    Returns
+    -------
+    dict:
+        "empty" is True if the selected identifiers have no sessions,
+        "metered_days" is the number of metered days of the selection
+    """
+    key = f"info/{get_key(view)}"
+    info = artifacts.get(key)
+    if info is None:
+        sessions = background.get_sessions(view, rollup_days)
+        selected = sessions.data["identifier"].isin(view["file_select_value"])
+        info = {
+            "empty": not selected.any(),
+            "metered_days": len(sessions.data_pings.get_metered_days()),
+        }
+        artifacts.set(key, info)
+    return info
+
+
+def create_view(
+    filename: str,
+    file_select_value: list,
+    c_id: str,
+    first_date,
+    last_date,
+    graph_type: str,
+    multi_cluster: bool,
+    rollup_days: tuple = None,
+) -> str:
+    """
+    Creates and saves a selection of the feature usage tab
+
+    Parameters
+    ----------
+    filename : str
+        the name of the uploaded file
+    file_select_value : list of str
+        the selected file identifier
+    c_id : str
+        the selected cluster id, None for all cluster ids
+    first_date : date or str
+        the first selected day
+    last_date : date or str
+        the last selected day
+    graph_type : str
+        either "bar", "line" or "automatic"
+    multi_cluster : bool
+        True if cluster_id should be aggregated over all file identifier
+    rollup_days : tuple
+        first and last day of the shared rollups, see background.load_sessions
+
+    Returns
+    -------
+    str:
+        the key of the selection and its artifacts
+    """
+    # the sessions are loaded by day, so the times of the days don't change the selection
+    view = {
+        "filename": filename,
+        "file_select_value": file_select_value,
+        "c_id": c_id,
+        "first_date": str(first_date)[:10],
+        "last_date": str(last_date)[:10],
+    }
+    info = get_view_info(view, rollup_days)
+    if graph_type == "automatic" and not info["empty"]:
+        graph_type = "bar" if info["metered_days"] <= 2 else "line"
+    view["graph_type"] = graph_type
+    view["multi_cluster"] = multi_cluster
+    view["empty"] = info["empty"]
+    return save_view(view)
+
+
+def save_view(view: dict) -> str:
+    """
+    Saves a selection of the feature usage tab
+
+    Parameters
+    ----------
+    view : dict
+        the selection, as created by update_output_div
+
+    Returns
+    -------
+    str:
+        the key of the selection and its artifacts
+    """
+    key = get_key(view)
+    artifacts.set(key, view)
+    return key
+
+
+def get_artifact(key: str, dropdown_id: int, rollup_days: tuple = None):
+    """
+    Gets the figure and the table of a graph of a selection,
+    they are computed when they are requested for the first time
+
+    Parameters
+    ----------
+    key : str
+        the key of the selection, as returned by save_view
+    dropdown_id : int
+        the value of the selected entry of DROPDOWN_OPTIONS
+    rollup_days : tuple
+        first and last day of the shared rollups, see background.load_sessions
+
+    Returns
+    -------
+    plotly.express figure and pd.DataFrame with the additional data of the graph,
+    an empty figure and table if the selection isn't saved
+    """
+    if not key:
+        return empty_fig(), pd.DataFrame()
+    artifact = artifacts.get(f"{key}/{dropdown_id}")
+    if artifact is None:
+        view = artifacts.get(key)
+        if view is None:
+            return empty_fig(), pd.DataFrame()
+        artifact = background.get_view(view, dropdown_id, rollup_days)
+        artifacts.set(f"{key}/{dropdown_id}", artifact)
+    return artifact
+
+
+def get_zoomed_figure(key: str, dropdown_id: int, x_range: list, width: int = None):
+    """
+    Gets the figure of a graph of a selection for the visible range of a zoom
+
+    Parameters
+    ----------
+    key : str
+        the key of the selection, as returned by save_view
+    dropdown_id : int
+        the value of the selected entry of DROPDOWN_OPTIONS
+    x_range : list of str
+        first and last visible time of the graph
+    width : int
+        width of the graph in pixels, None if it isn't known
+
+    Returns
+    -------
+    plotly.express figure, None if the selection isn't saved or the graph can't be zoomed
+    """
+    view = artifacts.get(key)
+    if view is None:
+        return None
+    return background.get_zoomed_view(view, dropdown_id, x_range, width)
+
+
+def warm_up(
+    set_progress, filename: str, ident: str, graph_type: str, multi_cluster: bool
+) -> str:
+    """
+    Computes the artifacts of the selection of all days of an identifier
+
+    Parameters
+    ----------
+    set_progress : Function to show the progress
+    filename : str
+        the name of the uploaded file
+    ident : str
+        the identifier
+    graph_type : str
+        either "bar", "line" or "automatic"
+    multi_cluster : bool
+        True if cluster_id should be aggregated over all file identifier
+
+    Returns
+    -------
+    str:
+        the key of the selection
+    """
+    set_progress((f"Preparing graphs of {ident}: loading data",))
+    first_date, last_date = driver.get_time_range("session")
+    key = create_view(
+        filename, [ident], None, first_date, last_date, graph_type, multi_cluster
+    )
+    for i, option in enumerate(DROPDOWN_OPTIONS):
+        set_progress((f"Preparing graphs of {ident}: {i}/{len(DROPDOWN_OPTIONS)}",))
+        get_artifact(key, option["value"])
+    return key
+
+
+def get_pngs(figures: list, workers: int = None) -> list:
+    """
+    Gets the PNG images of figures, the images which aren't saved yet are rendered concurrently
+
+    Parameters
+    ----------
+    figures : list of plotly figures
+    workers : int
+        number of rendering processes, see vis.rendering.render_pngs
+
+    Returns
+    -------
+    list of bytes:
+        the PNG images in the order of the figures
+    """
+    figures = [fig.to_json() for fig in figures]
+    keys = ["png/" + hashlib.sha1(fig.encode()).hexdigest() for fig in figures]
+    images = [artifacts.get(key) for key in keys]
+    missing = [i for i, image in enumerate(images) if image is None]
+    for i, image in zip(missing, render_pngs([figures[i] for i in missing], workers)):
+        artifacts.set(keys[i], image)
+        images[i] = image
+    return images
+
+
+def clear() -> None:
+    """
+    Removes all artifacts
+    """
+    artifacts.clear()
@@ -1,11 +1,16 @@
 from datetime import date
+from functools import partial
 
 import dash_bootstrap_components as dbc
 import pandas as pd
 from dash import html
 
+import database.columnar as columnar
 import database.driver as driver
-from computation.data import DataSessions
+from computation.data import DataPings, DataSessions
+from computation.features import Features
+from computation.memo import RESULTS
+from computation.sketches import get_distinct_counts
 from vis.additional_data_vis import (
     get_cas_statistics,
     get_cluster_id_table,
@@ -14,41 +19,52 @@ from vis.additional_data_vis import (
     get_total_amount_table,
 )
 from vis.graph_vis import (
+    empty_fig,
     get_cas_cluster_id_comparison_graph,
     get_cas_graph,
     get_fpc_graph,
+    get_interval,
     get_multi_cas_graph,
     get_multi_files_graph,
     get_token_cluster_id_comparison_graph,
     get_token_graph,
 )
+from vis.web_designs import DROPDOWN_OPTIONS
 
 HIGH_PERF_MODE = True
 GRAPH_LINE_COLOR = "#FFFFFF"
 
+# Entries of DROPDOWN_OPTIONS which show a time series
+TIME_SERIES_GRAPHS = [
+    "Token Consumption",
+    "Concurrent Active Sessions",
+    "Cluster-ID Comparison (Token)",
+    "Cluster-ID Comparison (CAS)",
+    "File Comparison (Token)",
+    "File Comparison (CAS)",
+]
 
-def select_date(sel_date: str, df: pd.DataFrame, asc: bool, init_change: bool):
+
+def select_date(sel_date: str, time_range: tuple, asc: bool, init_change: bool):
     """
     Parameters
     ----------
     sel_date : String
         represents a date, selected in the calendar tool
-    df : pd.Dataframe
-        used to extract a date out of this dataframe
+    time_range : tuple of String
+        first and last block_start of the sessions, used if a new date should be loaded
     asc : boolean
         true if the date should be the beginning date and
         false if the date should be the ending date
     init_change : boolean
-        true if a new date should be loaded out of the dataframe
+        true if a new date should be loaded out of time_range
 
     Returns
     -------
     date.Date which represents a given date
     """
     if sel_date is None or init_change:
-        data = df.sort_values(
-            by="block_start", ascending=asc, ignore_index=True
-        ).block_start[0]
+        data = time_range[0] if asc else time_range[1]
     else:
         data = sel_date
         data = data.split("T")
@@ -113,11 +129,12 @@ def get_cluster_ids_of(identifier: list):
     Returns
     -------
     list of str
-        list of cluster ids
+        sorted list of cluster ids
     """
     c_ids = driver.get_df_from_db("cluster_ids")
     c_ids = c_ids[c_ids["identifier"].isin(identifier)]
-    c_ids = c_ids["cluster_id"].drop_duplicates()
+    # the rows are saved in the order in which the cluster ids appear in the uploads
+    c_ids = c_ids["cluster_id"].drop_duplicates().sort_values()
     return c_ids.to_numpy().tolist()
 
 
@@ -138,6 +155,53 @@ def get_license_data():
     return license_data
 
 
+def get_license_counts():
+    """
+    Return the number of cache generations per feature and license identifier
+
+    Returns
+    -------
+    pd.DataFrame
+        data frame with the columns feature_name, identifier and resources
+    """
+    return driver.get_license_counts()
+
+
+def get_distinct_values(kind: str, identifiers=None, start=None, end=None):
+    """
+    Return the estimated number of distinct app instances per cluster_id or distinct resources per loader
+    of the union of identifiers and days, merged from the sketches saved at upload
+
+    Parameter
+    ---------
+    kind : str
+        app_instances or resources
+    identifiers : list of str
+        identifier, None for all
+    start : date or str
+        first day, None for no limit
+    end : date or str
+        last day, None for no limit
+
+    Returns
+    -------
+    pd.DataFrame
+        data frame with the columns name, distinct, lower and upper, the bounds are two standard errors,
+        the last row with the name total is the union of all names
+    """
+    sketches = driver.get_sketches(kind, identifiers, start, end)
+    if kind == "resources":
+        # the license table shows the loader of a feature_name, the last part of its path
+        sketches["name"] = sketches["name"].str.rsplit("/", n=1).str[-1]
+    return pd.concat(
+        [
+            get_distinct_counts(sketches, ["name"]),
+            get_distinct_counts(sketches.assign(name="total"), ["name"]),
+        ],
+        ignore_index=True,
+    )
+
+
 def get_license_identifier():
     """
     Return license identifier
@@ -213,12 +277,239 @@ def set_type_of_last_identifier(type_name: str):
     driver.df_to_sql_replace(table, "identifier")
 
 
+def get_shared_rollup(
+    rollup_days: tuple, table_name: str, start=None, end=None, interval: str = None
+) -> pd.DataFrame:
+    """
+    Parameters
+    ----------
+    rollup_days : tuple
+        first and last day of the rollup which is shared by all selections within these days
+    table_name : String
+        the name of the rollup table, token_rollup or cas_histogram
+    start : date or String
+        the first day of the time interval, None for no limit
+    end : date or String
+        the last day of the time interval, None for no limit
+    interval : String
+        the interval of the rollup, None if the table has one interval
+
+    Returns
+    -------
+    pd.DataFrame with the rows of the rollup like driver.get_rollup,
+    selected from the rollup of rollup_days which is loaded once per generation and kept in the result cache
+    """
+    first_day, last_day = rollup_days
+    rollup = RESULTS.get(
+        ("rollup", table_name, interval, str(first_day), str(last_day)),
+        partial(driver.get_rollup, table_name, first_day, last_day, interval),
+        driver.get_generation(),
+    )
+    return driver.select_rollup_days(rollup, start, end)
+
+
+def load_sessions(
+    filename: str,
+    file_select_value: list,
+    c_id: str,
+    first_date,
+    last_date,
+    cache_key: tuple = None,
+    rollup_days: tuple = None,
+) -> DataSessions:
+    """
+    Parameters
+    ----------
+    filename : String
+        the name of the uploaded file
+    file_select_value : list of String
+        the selected file identifier
+    c_id : String
+        the selected cluster id, None for all cluster ids
+    first_date : date or String
+        the first selected day
+    last_date : date or String
+        the last selected day
+    cache_key : tuple
+        key of the selection in the result cache, None if the results shouldn't be cached
+    rollup_days : tuple
+        first and last day of the rollups which are loaded once and shared by all selections within these days,
+        None loads the rollups of the selection from the database
+
+    Returns
+    -------
+    DataSessions which contains the sessions and pings of the selected days,
+    loaded from the columnar store if it is complete, otherwise from the database
+    """
+    features = Features().get_data_features()
+    if columnar.is_complete():
+        sql_session = columnar.read("session", start=first_date, end=last_date)
+        sql_pings = columnar.read(
+            "pings", cluster_id=c_id, start=first_date, end=last_date
+        )
+    else:
+        sql_session = driver.get_filtered_df_from_db(
+            "session", start=first_date, end=last_date
+        )
+        sql_pings = driver.get_filtered_df_from_db(
+            "pings", cluster_id=c_id, start=first_date, end=last_date
+        )
+    data_pings = DataPings(
+        filename, sql_pings, features, c_id, driver.get_time_range("pings")
+    )
+    get_rollup = driver.get_rollup
+    if rollup_days is not None:
+        get_rollup = partial(get_shared_rollup, rollup_days)
+    token_rollup = None
+    if driver.check_if_table_exists("token_rollup"):
+        token_rollup = partial(get_rollup, "token_rollup", first_date, last_date)
+    cas_histogram = None
+    if driver.check_if_table_exists("cas_histogram"):
+        cas_histogram = partial(get_rollup, "cas_histogram", first_date, last_date)
+    return DataSessions(
+        sql_session,
+        data_pings,
+        features,
+        300,
+        file_select_value,
+        c_id,
+        token_rollup,
+        cas_histogram,
+        cache_key,
+    )
+
+
+def get_cache_key(view: dict, generation: int) -> tuple:
+    """
+    Parameters
+    ----------
+    view : dict
+        the selection of the feature usage tab, as stored by update_output_div
+    generation : int
+        the generation of the data
+
+    Returns
+    -------
+    tuple which is the key of the loaded data of the selection in the result cache
+    """
+    return (
+        generation,
+        view["filename"],
+        tuple(view["file_select_value"]),
+        view["c_id"],
+        view["first_date"],
+        view["last_date"],
+    )
+
+
+def get_sessions(view: dict, rollup_days: tuple = None) -> DataSessions:
+    """
+    Parameters
+    ----------
+    view : dict
+        the selection of the feature usage tab, as stored by update_output_div
+    rollup_days : tuple
+        first and last day of the shared rollups, see load_sessions
+
+    Returns
+    -------
+    DataSessions of the selection, loaded once per generation of the data and kept in the result cache
+    """
+    generation = driver.get_generation()
+    cache_key = get_cache_key(view, generation)
+    return RESULTS.get(
+        ("sessions", rollup_days) + cache_key,
+        partial(
+            load_sessions,
+            view["filename"],
+            view["file_select_value"],
+            view["c_id"],
+            view["first_date"],
+            view["last_date"],
+            cache_key,
+            rollup_days,
+        ),
+        generation,
+    )
+
+
+def get_view(view: dict, dropdown_id: int, rollup_days: tuple = None):
+    """
+    Parameters
+    ----------
+    view : dict
+        the selection of the feature usage tab, as stored by update_output_div
+    dropdown_id : int
+        the value of the selected entry of DROPDOWN_OPTIONS
+    rollup_days : tuple
+        first and last day of the shared rollups, see load_sessions
+
+    Returns
+    -------
+    plotly.express figure and pd.DataFrame with the additional data of the selected graph
+    """
+    if not view or view["empty"]:
+        return empty_fig(), pd.DataFrame()
+    return select_graph(
+        DROPDOWN_OPTIONS[dropdown_id]["label"],
+        get_sessions(view, rollup_days),
+        view["file_select_value"],
+        view["graph_type"],
+        view["multi_cluster"],
+        days=(view["first_date"], view["last_date"]),
+    )
+
+
+def get_zoomed_view(view: dict, dropdown_id: int, x_range: list, width: int = None):
+    """
+    Parameters
+    ----------
+    view : dict
+        the selection of the feature usage tab, as stored by update_output_div
+    dropdown_id : int
+        the value of the selected entry of DROPDOWN_OPTIONS
+    x_range : list of str
+        first and last visible time of the graph
+    width : int
+        width of the graph in pixels, None if it isn't known
+
+    Returns
+    -------
+    plotly.express figure of the selected graph which shows the visible days at an interval fitted to the width,
+    None if the graph isn't a time series or no selected day is visible
+    """
+    menu_entry = DROPDOWN_OPTIONS[dropdown_id]["label"]
+    if not view or view["empty"] or menu_entry not in TIME_SERIES_GRAPHS:
+        return None
+    start, end = pd.Timestamp(x_range[0]), pd.Timestamp(x_range[1])
+    first_date = max(str(start.date()), view["first_date"][:10])
+    last_date = min(str(end.date()), view["last_date"][:10])
+    if first_date > last_date:
+        return None
+    # the visible days are loaded as a selection of their own, so the rollups of these days answer the graph
+    zoomed_view = dict(view, first_date=first_date, last_date=last_date)
+    fig, _ = select_graph(
+        menu_entry,
+        get_sessions(zoomed_view),
+        view["file_select_value"],
+        view["graph_type"],
+        view["multi_cluster"],
+        interval=get_interval(start, end, width),
+        additional_data=False,
+    )
+    fig.update_xaxes(range=x_range)
+    return fig
+
+
 def select_graph(
     menu_entry: str,
     session: DataSessions,
     identifier: list,
     graph_type: str,
     multi_cluster: bool,
+    interval: str = None,
+    additional_data: bool = True,
+    days: tuple = None,
 ):
     """
     Parameters
@@ -229,6 +520,12 @@ def select_graph(
     graph_type: either "bar" or "line"
     multi_cluster: bool
         True if all data should be aggregated over all files
+    interval: str
+        interval of time series graphs, None for the default interval of the session
+    additional_data: bool
+        False if only the graph is needed, the additional data is empty then
+    days: tuple
+        first and last day of the session, None if the additional data shouldn't show estimated distinct values
 
     Returns
     -------
@@ -247,16 +544,19 @@ def select_graph(
 
     """select graph and additional data depending on parameter menu_entry"""
     if menu_entry == "Token Consumption":
-        fig = get_token_graph(session, graph_type=graph_type)
-        additional = get_total_amount_table(session, identifier)
+        fig = get_token_graph(session, graph_type=graph_type, interval=interval)
+        if additional_data:
+            additional = get_total_amount_table(session, identifier)
 
     elif menu_entry == "Product Usage":
         fig = get_fpc_graph(session)
-        additional = get_package_combination_table(session, identifier)
+        if additional_data:
+            additional = get_package_combination_table(session, identifier)
 
     elif menu_entry == "Concurrent Active Sessions":
-        fig = get_cas_graph(session, graph_type=graph_type)
-        additional = get_cas_statistics(session, identifier)
+        fig = get_cas_graph(session, graph_type=graph_type, interval=interval)
+        if additional_data:
+            additional = get_cas_statistics(session, identifier)
 
     elif menu_entry == "Cluster-ID Comparison (Token)":
         if multi_cluster:
@@ -264,8 +564,16 @@ def select_graph(
         else:
             c_ids = get_cluster_ids_of(identifier)
         c_ids = list(dict.fromkeys(c_ids))
-        fig = get_token_cluster_id_comparison_graph(session, c_ids, multi_cluster)
-        additional = get_cluster_id_table(session, multi_cluster)
+        fig = get_token_cluster_id_comparison_graph(
+            session, c_ids, multi_cluster, interval=interval
+        )
+        if additional_data:
+            distinct = None
+            if days is not None:
+                distinct = get_distinct_values(
+                    "app_instances", None if multi_cluster else identifier, *days
+                )
+            additional = get_cluster_id_table(session, multi_cluster, distinct)
 
     elif menu_entry == "Cluster-ID Comparison (CAS)":
         if multi_cluster:
@@ -273,14 +581,19 @@ def select_graph(
         else:
             c_ids = get_cluster_ids_of(identifier)
         c_ids = list(dict.fromkeys(c_ids))
-        fig = get_cas_cluster_id_comparison_graph(session, c_ids, multi_cluster)
+        fig = get_cas_cluster_id_comparison_graph(
+            session, c_ids, multi_cluster, interval=interval
+        )
 
     elif menu_entry == "File Comparison (Token)":
-        fig = get_multi_files_graph(session, idents, graph_type=graph_type)
-        additional = get_multi_total_amount_table(session, idents)
+        fig = get_multi_files_graph(
+            session, idents, graph_type=graph_type, interval=interval
+        )
+        if additional_data:
+            additional = get_multi_total_amount_table(session, idents)
 
     elif menu_entry == "File Comparison (CAS)":
-        fig = get_multi_cas_graph(session, idents)
+        fig = get_multi_cas_graph(session, idents, interval=interval)
 
     else:
         raise Exception('menu entry "', menu_entry, '" does not exist.')
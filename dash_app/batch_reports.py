@@ -0,0 +1,352 @@
+"""
+This is batch_reports.py.
+
+batch_reports.py creates the PowerPoint reports of the export without the dashboard: every job selects identifiers,
+a cluster id and a time interval, its graphs and tables are computed from the database like the feature usage tab
+computes them and its report is saved as pptx file. The jobs of the same identifiers are run one after another by one
+process, which loads the rollups of all their days once and shares them, and the groups of jobs run in a pool of
+processes.
+
+Run from the project root:
+    python -m dash_app.batch_reports jobs.csv [--output reports] [--workers 4]
+    python -m dash_app.batch_reports --month 2022-11
+
+The jobs file is a csv file with the columns identifiers (separated by ";"), cluster_id (empty for all cluster ids),
+start_date, end_date and optionally name, the name of the report file. Without a jobs file, --month creates one job
+per feature identifier for all days of the month.
+"""
+import argparse
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import pandas as pd
+
+import database.driver as driver
+import vis.prs_lib as prs_lib
+from computation.data import LicenseUsage
+from dash_app import artifacts, background
+from vis.additional_data_vis import get_license_usage_table
+from vis.web_designs import DROPDOWN_OPTIONS
+
+OUTPUT_PATH = "./reports"
+
+# Name of the file of the selections, the same for all jobs, so jobs with the same selection share their artifacts
+FILENAME = "batch"
+
+# Number of processes which create reports
+WORKERS = os.cpu_count() or 1
+
+
+def read_jobs(path: str) -> list:
+    """
+    Reads the jobs of a csv file
+
+    Parameters
+    ----------
+    path : str
+        the path of the csv file
+
+    Returns
+    -------
+    list of dict:
+        the jobs with the keys name, identifiers, c_id, start_date and end_date
+    """
+    table = pd.read_csv(path, dtype=str, keep_default_na=False)
+    jobs = []
+    for row in table.to_dict("records"):
+        identifiers = [ident.strip() for ident in row["identifiers"].split(";")]
+        jobs.append(
+            get_job(
+                [ident for ident in identifiers if ident],
+                row["cluster_id"].strip() or None,
+                row["start_date"].strip(),
+                row["end_date"].strip(),
+                row.get("name", "").strip() or None,
+            )
+        )
+    return jobs
+
+
+def get_month_jobs(month: str) -> list:
+    """
+    Creates the jobs of all feature identifier for a month
+
+    Parameters
+    ----------
+    month : str
+        the month as YYYY-mm
+
+    Returns
+    -------
+    list of dict:
+        one job per feature identifier with all cluster ids and all days of the month
+    """
+    first_day = pd.Period(month, freq="M").start_time.date()
+    last_day = pd.Period(month, freq="M").end_time.date()
+    return [
+        get_job([ident], None, str(first_day), str(last_day))
+        for ident in background.get_feature_identifier()
+    ]
+
+
+def get_job(
+    identifiers: list, c_id: str, start_date: str, end_date: str, name: str = None
+) -> dict:
+    """
+    Parameters
+    ----------
+    identifiers : list of str
+        the selected file identifier
+    c_id : str
+        the selected cluster id, None for all cluster ids
+    start_date : str
+        the first day as YYYY-mm-dd
+    end_date : str
+        the last day as YYYY-mm-dd
+    name : str
+        the name of the report file, None for a name of the identifiers, the cluster id and the days
+
+    Returns
+    -------
+    dict:
+        the job
+    """
+    if name is None:
+        name = "_".join(identifiers + ([c_id] if c_id else []) + [start_date, end_date])
+    return {
+        "name": name,
+        "identifiers": identifiers,
+        "c_id": c_id,
+        "start_date": start_date,
+        "end_date": end_date,
+    }
+
+
+def get_license_data(identifiers: list) -> dict:
+    """
+    Parameters
+    ----------
+    identifiers : list of str
+        the identifiers of a job
+
+    Returns
+    -------
+    dict:
+        the license usage table of the license identifiers among the identifiers, empty if there are none
+    """
+    license_identifier = [
+        ident for ident in background.get_license_identifier() if ident in identifiers
+    ]
+    if not license_identifier or not driver.check_if_table_exists("license"):
+        return {}
+    license_usage = LicenseUsage(None, counts=background.get_license_counts())
+    return get_license_usage_table(
+        license_usage,
+        license_identifier,
+        background.get_distinct_values("resources", license_identifier),
+    ).to_dict()
+
+
+def create_report(
+    job: dict,
+    output: str,
+    graph_type: str,
+    multi_cluster: bool,
+    rollup_days: tuple = None,
+    render_workers: int = None,
+) -> str:
+    """
+    Creates the report of a job
+
+    Parameters
+    ----------
+    job : dict
+        the job, see get_job
+    output : str
+        the directory of the report files
+    graph_type : str
+        either "bar", "line" or "automatic"
+    multi_cluster : bool
+        True if cluster_id should be aggregated over all file identifier
+    rollup_days : tuple
+        first and last day of the rollups which are shared by the jobs, None loads the rollups of the job
+    render_workers : int
+        number of processes which render the images, None for vis.rendering.WORKERS
+
+    Returns
+    -------
+    str:
+        the path of the report file
+    """
+    view_key = artifacts.create_view(
+        FILENAME,
+        job["identifiers"],
+        job["c_id"],
+        job["start_date"],
+        job["end_date"],
+        graph_type,
+        multi_cluster,
+        rollup_days,
+    )
+    graphs = [
+        artifacts.get_artifact(view_key, option["value"], rollup_days)
+        for option in DROPDOWN_OPTIONS
+    ]
+    images = artifacts.get_pngs([fig for fig, _ in graphs], render_workers)
+
+    report_statistics = {}
+    if driver.check_if_table_exists("report_statistics"):
+        report_statistics = driver.get_df_from_db("report_statistics")
+        report_statistics = (
+            report_statistics[report_statistics["Report"].isin(job["identifiers"])]
+            .reset_index(drop=True)
+            .to_dict()
+        )
+
+    report = prs_lib.create_presentation(
+        job["start_date"],
+        job["end_date"],
+        report_statistics,
+        [
+            (option["label"], additional.to_dict(), image)
+            for option, (_, additional), image in zip(DROPDOWN_OPTIONS, graphs, images)
+        ],
+        get_license_data(job["identifiers"]),
+    )
+    path = os.path.join(output, job["name"] + ".pptx")
+    with open(path, "wb") as file:
+        file.write(report)
+    return path
+
+
+def run_group(jobs: list, output: str, graph_type: str, multi_cluster: bool) -> list:
+    """
+    Creates the reports of jobs of the same identifiers one after another,
+    the rollups of all their days are loaded once and shared by the jobs
+
+    Parameters
+    ----------
+    jobs : list of dict
+        the jobs, see get_job
+    output : str
+        the directory of the report files
+    graph_type : str
+        either "bar", "line" or "automatic"
+    multi_cluster : bool
+        True if cluster_id should be aggregated over all file identifier
+
+    Returns
+    -------
+    list of Tuple(str, str, str):
+        the name of every job, the path of its report file or None and the error of a failed job or None
+    """
+    rollup_days = (
+        min(job["start_date"] for job in jobs),
+        max(job["end_date"] for job in jobs),
+    )
+    results = []
+    for job in jobs:
+        try:
+            # the process renders its images itself, the groups already use all cores
+            path = create_report(
+                job, output, graph_type, multi_cluster, rollup_days, render_workers=1
+            )
+            results.append((job["name"], path, None))
+        except Exception as error:
+            # a failed job doesn't stop the other reports of the batch
+            results.append((job["name"], None, repr(error)))
+    return results
+
+
+def run_jobs(
+    jobs: list,
+    output: str = OUTPUT_PATH,
+    graph_type: str = "automatic",
+    multi_cluster: bool = False,
+    workers: int = None,
+) -> list:
+    """
+    Creates the reports of jobs, the groups of jobs of the same identifiers run in a pool of processes
+
+    Parameters
+    ----------
+    jobs : list of dict
+        the jobs, see get_job
+    output : str
+        the directory of the report files
+    graph_type : str
+        either "bar", "line" or "automatic"
+    multi_cluster : bool
+        True if cluster_id should be aggregated over all file identifier
+    workers : int
+        number of processes, None for WORKERS
+
+    Returns
+    -------
+    list of Tuple(str, str, str):
+        the results of the jobs in the order in which they finished, see run_group
+    """
+    os.makedirs(output, exist_ok=True)
+    groups = {}
+    for job in jobs:
+        groups.setdefault(tuple(sorted(job["identifiers"])), []).append(job)
+
+    workers = min(workers or WORKERS, len(groups))
+    results = []
+    if workers <= 1:
+        for group in groups.values():
+            results += run_group(group, output, graph_type, multi_cluster)
+            print(f"{len(results)}/{len(jobs)} jobs finished", flush=True)
+        return results
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [
+            pool.submit(run_group, group, output, graph_type, multi_cluster)
+            for group in groups.values()
+        ]
+        for future in as_completed(futures):
+            results += future.result()
+            print(f"{len(results)}/{len(jobs)} jobs finished", flush=True)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("jobs", nargs="?", help="csv file of the jobs")
+    parser.add_argument("--month", help="one job per feature identifier, YYYY-mm")
+    parser.add_argument("--output", default=OUTPUT_PATH)
+    parser.add_argument("--workers", type=int, default=WORKERS)
+    parser.add_argument(
+        "--graph-type", choices=["automatic", "bar", "line"], default="automatic"
+    )
+    parser.add_argument(
+        "--multi-cluster",
+        action="store_true",
+        help="aggregate cluster_id data over all file identifier",
+    )
+    args = parser.parse_args()
+
+    if args.jobs:
+        jobs = read_jobs(args.jobs)
+    elif args.month:
+        jobs = get_month_jobs(args.month)
+    else:
+        parser.error("either a jobs file or --month is required")
+    if not driver.check_if_table_exists("session"):
+        parser.error("the database contains no feature data")
+
+    results = run_jobs(
+        jobs, args.output, args.graph_type, args.multi_cluster, args.workers
+    )
+    failed = [(name, error) for name, _, error in results if error is not None]
+    for name, error in failed:
+        print(f"{name} failed: {error}", file=sys.stderr)
+    print(f"{len(results) - len(failed)} reports saved to {args.output}")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
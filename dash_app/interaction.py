@@ -9,16 +9,12 @@ import diskcache
 import pandas as pd
 from dash import Dash, Input, Output, State, ctx, dash, dcc
 from dash.long_callback import DiskcacheLongCallbackManager
-from plotly.graph_objects import Figure
-from pptx import Presentation
-from pptx.util import Cm
 
+import database.columnar as columnar
 import database.driver as driver
 import vis.prs_lib as prs_lib
-from computation.data import DataPings, DataSessions, LicenseUsage
-from computation.features import Features
-from dash_app import background, upload
-from dash_app.upload import convert_report_to_df
+from computation.data import LicenseUsage
+from dash_app import artifacts, background, upload
 from vis.additional_data_vis import get_license_usage_table
 from vis.graph_vis import empty_fig
 from vis.web_designs import DROPDOWN_OPTIONS, tab_layout
@@ -47,6 +43,7 @@ du.configure_upload(app, UPLOAD_CACHE_PATH, use_upload_id=False)
         Output("dash-uploader", "isCompleted"),
         Output("filename", "data"),
         Output("filename_license", "data"),
+        Output("feature_identifiers", "data"),
     ],
     inputs=[
         Input("dash-uploader", "isCompleted"),
@@ -94,17 +91,15 @@ def load_data(
     bool which indicates if a download is complete
     str of the new feature file identifier
     str of the new license file identifier
+    list of str of the identifiers with new feature data
     """
 
     """Upload file"""
     if is_com:
         header_text = "Upload Report"
 
-        datagrams = convert_report_to_df(files[0])
         filename = files[0].split(".")[0]
-        names = []
-        for _, name in datagrams:
-            names.append(name)
+        names = upload.get_report_names(files[0])
 
         if ident_num == -1:
             set_progress(
@@ -133,15 +128,71 @@ def load_data(
                 )
 
         return upload.prepare_data(
-            set_progress, datagrams, filename, ident_num, ident_names
+            set_progress,
+            upload.decode_report(files[0], filename),
+            filename,
+            ident_num,
+            ident_names,
         )
-    return dash.no_update, dash.no_update, dash.no_update
+    return dash.no_update, dash.no_update, dash.no_update, dash.no_update
+
+
+@app.long_callback(
+    output=[Output("cache_ready", "children")],
+    inputs=[
+        Input("feature_identifiers", "data"),
+        State("filename", "data"),
+        State("graph-type", "value"),
+        State("multi_cluster", "value"),
+    ],
+    running=[(Output("cache_ready", "style"), {"display": "none"}, {})],
+    progress=[Output("cache_status", "children")],
+    progress_default=[""],
+    prevent_inital_call=True,
+)
+def warm_up_cache(
+    set_progress: Callable,
+    identifiers: list,
+    filename: str,
+    graph_type: str,
+    multi_cluster: list,
+):
+    """
+    Computes the graphs of the identifiers of an upload in the background,
+    so they are shown without waiting when an identifier is selected
+
+    Parameters
+    ----------
+    set_progress : Function to show the progress of the computation
+    identifiers : list of str
+        the identifiers with new feature data, empty if the upload added none
+    filename : str
+        the name of the uploaded file
+    graph_type : str
+        either "bar", "line" or "automatic"
+    multi_cluster : list of str
+        contains "Aggregate Cluster ID data" if cluster_id should be aggregated over all file identifier
+
+    Returns
+    -------
+    list of str which describes the state of the cache
+    """
+    if not identifiers or not driver.check_if_table_exists("session"):
+        return [dash.no_update]
+    for ident in identifiers:
+        artifacts.warm_up(
+            set_progress,
+            filename,
+            ident,
+            graph_type,
+            "Aggregate Cluster ID data" in multi_cluster,
+        )
+    return [f"Graphs of {', '.join(identifiers)} are ready"]
 
 
 @app.callback(
     Output(component_id="report-statistics-table", component_property="children"),
-    Output(component_id="graphs-store", component_property="children"),
-    Output("additions-store", "data"),
+    Output("view-store", "data"),
     Output("select-date", "start_date"),
     Output("select-date", "end_date"),
     Input("select-date", "start_date"),
@@ -213,68 +264,37 @@ def update_output_div(
             dash.no_update,  # time interval data
         )
     if driver.check_if_table_exists("session"):
-        features = Features().get_data_features()
-
         """set current cluster id"""
         c_id = None
         # if not (c_id_select == "All Cluster-IDs" or c_id_select == []):
         if not c_id_select == "All Cluster-IDs":
             c_id = c_id_select
 
-        """converting the dict containing all data back into a pd.Dataframe"""
-        sql_session = driver.get_df_from_db("session")
-        """create DataSessions object"""
-        data_pings = DataPings(filename, driver.get_df_from_db("pings"), features, c_id)
-        sessions = DataSessions(
-            sql_session, data_pings, features, 300, file_select_value, c_id
-        )
-
         """checking if new data is loaded and new initial dates should be set"""
         new_data = False
         if ctx.triggered_id == "filename" or ctx.triggered_id == "time-reset":
             new_data = True
 
         """setting the first and last dates for the represented data"""
-        first_date = background.select_date(start_date, sessions.data, True, new_data)
-        last_date = background.select_date(end_date, sessions.data, False, new_data)
-
-        """trim dataframe to selected time interval"""
-        sessions.crop_data(first_date, last_date)
-
-        empty_val = False
-        if (
-            len(
-                sessions.data[sessions.data["identifier"].isin(file_select_value)].index
-            )
-            == 0
-        ):
-            empty_val = True
+        session_range = driver.get_time_range("session")
+        first_date = background.select_date(start_date, session_range, True, new_data)
+        last_date = background.select_date(end_date, session_range, False, new_data)
 
-        """store data of current settings in database"""
-        if (graph_type == "automatic") and (not empty_val):
-            graph_type = "bar" if (len(data_pings.get_metered_days()) <= 2) else "line"
-
-        graphs = []
-        additions = dict()
         if "Aggregate Cluster ID data" in multi_cluster:
             multi_cluster_bool = True
         else:
             multi_cluster_bool = False
-        for option in DROPDOWN_OPTIONS:
-            dropdown_id = option["label"]
-            if empty_val:
-                fig = empty_fig()
-                additional = pd.DataFrame()
-            else:
-                fig, additional = background.select_graph(
-                    dropdown_id,
-                    sessions,
-                    file_select_value,
-                    graph_type,
-                    multi_cluster_bool,
-                )
-            graphs.append(dcc.Graph(figure=fig, className="graph"))
-            additions[str(option["value"])] = additional.to_dict()
+
+        """the graphs are computed when they are selected, see update_dropdown"""
+        view_key = artifacts.create_view(
+            filename,
+            file_select_value,
+            c_id,
+            first_date,
+            last_date,
+            graph_type,
+            multi_cluster_bool,
+        )
 
         """get values for file statistics"""
         report_statistics_table = background.get_report_statistics_table()
@@ -283,8 +303,7 @@ def update_output_div(
         report_statistics_table = background.get_report_statistics_table()
 
         """no data -> no updates for visuals"""
-        graphs = dash.no_update
-        additions = dash.no_update
+        view_key = dash.no_update
 
         """set first and last date"""
         first_date = start_date
@@ -292,8 +311,7 @@ def update_output_div(
 
     return (
         report_statistics_table,  # report-statistics-table
-        graphs,  # export data
-        additions,  # export data
+        view_key,  # key of the selection of the graphs
         first_date,  # time interval data
         last_date,  # time interval data
     )
@@ -318,10 +336,13 @@ def update_output_license(filename: str):
     dcc.Graph which represents the graph with the id 'graph3'
     """
     if driver.check_if_table_exists("license"):
-        license_data = background.get_license_data()
-        license_usage = LicenseUsage(license_data)
+        # the counts are aggregated in the database instead of loading all license rows
+        license_usage = LicenseUsage(None, counts=background.get_license_counts())
+        license_identifier = background.get_license_identifier()
         additional = get_license_usage_table(
-            license_usage, background.get_license_identifier()
+            license_usage,
+            license_identifier,
+            background.get_distinct_values("resources", license_identifier),
         )
         return (
             dbc.Table.from_dataframe(additional, style={"text-align": "right"}),
@@ -336,43 +357,123 @@ def update_output_license(filename: str):
     Output(component_id="graph2", component_property="children"),
     Output(component_id="graph_data1", component_property="children"),
     Output(component_id="graph_data2", component_property="children"),
-    Input("graphs-store", "children"),
-    Input("additions-store", "data"),
+    Input("view-store", "data"),
     Input(component_id="dropdown1", component_property="value"),
     Input(component_id="dropdown2", component_property="value"),
     prevent_inital_call=True,
 )
 def update_dropdown(
-    graphs: list,
-    additions: dict,
+    view_key: str,
     drop1: int,
     drop2: int,
 ):
-    if not graphs:
+    if not view_key:
         graph1 = empty_fig()
         graph2 = empty_fig()
         additional1 = ""
         additional2 = ""
     else:
-        graph1 = graphs[drop1]
+        fig, additional = artifacts.get_artifact(view_key, drop1)
+        graph1 = dcc.Graph(id="figure1", figure=fig, className="graph")
         additional1 = dbc.Table.from_dataframe(
-            pd.DataFrame.from_dict(additions[str(drop1)]), style={"text-align": "right"}
+            additional, style={"text-align": "right"}
         )
 
-        graph2 = graphs[drop2]
+        fig, additional = artifacts.get_artifact(view_key, drop2)
+        graph2 = dcc.Graph(id="figure2", figure=fig, className="graph")
         additional2 = dbc.Table.from_dataframe(
-            pd.DataFrame.from_dict(additions[str(drop2)]), style={"text-align": "right"}
+            additional, style={"text-align": "right"}
         )
     return graph1, graph2, additional1, additional2
 
 
+# Zoom range and width of a graph in pixels, from the relayoutData of the graph
+ZOOM_SCRIPT = """
+function(relayout, id) {
+    if (!relayout) {
+        return window.dash_clientside.no_update;
+    }
+    const graph = document.getElementById(id);
+    const width = graph ? graph.offsetWidth : null;
+    if (relayout["xaxis.autorange"]) {
+        return {range: null, width: width};
+    }
+    if ("xaxis.range[0]" in relayout) {
+        return {range: [relayout["xaxis.range[0]"], relayout["xaxis.range[1]"]], width: width};
+    }
+    if ("xaxis.range" in relayout) {
+        return {range: relayout["xaxis.range"], width: width};
+    }
+    return window.dash_clientside.no_update;
+}
+"""
+
+for graph_id in ["1", "2"]:
+    app.clientside_callback(
+        ZOOM_SCRIPT,
+        Output(f"zoom{graph_id}", "data"),
+        Input(f"figure{graph_id}", "relayoutData"),
+        State(f"figure{graph_id}", "id"),
+    )
+
+
+@app.callback(
+    Output("figure1", "figure"),
+    Output("figure2", "figure"),
+    Input("zoom1", "data"),
+    Input("zoom2", "data"),
+    State("view-store", "data"),
+    State("dropdown1", "value"),
+    State("dropdown2", "value"),
+)
+def update_zoom(zoom1: dict, zoom2: dict, view_key: str, drop1: int, drop2: int):
+    """
+    Recompute the visible range of a zoomed graph at an interval fitted to its width
+
+    Parameters
+    ----------
+    zoom1 : dict
+        visible range and width of the graph with the id 'figure1', the range is None if the graph is reset
+    zoom2 : dict
+        visible range and width of the graph with the id 'figure2'
+    view_key : str
+        the key of the selection of the graphs
+    drop1 : int
+        the value of the selected entry of 'dropdown1'
+    drop2 : int
+        the value of the selected entry of 'dropdown2'
+
+    Returns
+    -------
+    plotly.express figure of the graph with the id 'figure1' or dash.no_update
+    plotly.express figure of the graph with the id 'figure2' or dash.no_update
+    """
+    figures = [dash.no_update, dash.no_update]
+    if ctx.triggered_id == "zoom1":
+        index, zoom, dropdown_id = 0, zoom1, drop1
+    else:
+        index, zoom, dropdown_id = 1, zoom2, drop2
+    if not view_key or not zoom:
+        return figures
+
+    if zoom["range"] is None:
+        # the whole selection, as shown before the zoom
+        figures[index] = artifacts.get_artifact(view_key, dropdown_id)[0]
+    else:
+        fig = artifacts.get_zoomed_figure(
+            view_key, dropdown_id, zoom["range"], zoom["width"]
+        )
+        if fig is not None:
+            figures[index] = fig
+    return figures
+
+
 @app.callback(
     Output(component_id="exportFunc", component_property="data"),
     Input(component_id="export", component_property="n_clicks"),
     State("select-date", "start_date"),
     State("select-date", "end_date"),
-    State("graphs-store", "children"),
-    State("additions-store", "data"),
+    State("view-store", "data"),
     State("license-store", "data"),
     prevent_initial_call=True,
 )
@@ -380,53 +481,35 @@ def export_data(
     clicks: int,
     start_date: str,
     end_date: str,
-    graphs: list,
-    additions: dict,
+    view_key: str,
     license_data: dict,
 ):
     """Export presentation on button click."""
 
     if clicks is not None:
-        prs = Presentation("./assets/report_analysis_template.pptx")
-
-        # title slide
-        prs.slides[0].shapes[0].text = "Report Analysis"
-        prs.slides[0].shapes[1].text = start_date + " - " + end_date
-
-        # report Statistics slide
+        report_statistics = {}
         if driver.check_if_table_exists("report_statistics"):
-            report_statistics = driver.get_df_from_db("report_statistics")
-            slide = prs.slides.add_slide(prs.slide_layouts[4])
-            slide.shapes.title.text = "Report Statistics"
-            prs_lib.set_table(slide, report_statistics.to_dict(), Cm(5))
-
-        # graph & statistic slides
-        for option in DROPDOWN_OPTIONS:
-            dropdown_id = option["value"]
-            name = option["label"]
-
-            slide = prs.slides.add_slide(
-                prs.slide_layouts[2]
-                if additions[str(dropdown_id)]
-                else prs.slide_layouts[3]
-            )
-            slide.shapes.title.text = name
-
-            # save and set graph
-            graph_path = "./export/graphs/" + str(dropdown_id) + ".png"
-            Figure(graphs[dropdown_id]["props"]["figure"]).write_image(graph_path)
-            prs_lib.set_graph(slide, graph_path)
-
-            prs_lib.set_table(slide, additions[str(dropdown_id)])
-
-        # license usage slide
-        if license_data:
-            slide = prs.slides.add_slide(prs.slide_layouts[4])
-            slide.shapes.title.text = "License Usage"
-            prs_lib.set_table(slide, license_data)
-
-        prs.save("./export/report.pptx")
-        return dcc.send_file("./export/report.pptx")
+            report_statistics = driver.get_df_from_db("report_statistics").to_dict()
+
+        # the graphs are rendered together
+        graphs = [
+            artifacts.get_artifact(view_key, option["value"])
+            for option in DROPDOWN_OPTIONS
+        ]
+        images = artifacts.get_pngs([fig for fig, _ in graphs])
+        report = prs_lib.create_presentation(
+            start_date,
+            end_date,
+            report_statistics,
+            [
+                (option["label"], additional.to_dict(), image)
+                for option, (_, additional), image in zip(
+                    DROPDOWN_OPTIONS, graphs, images
+                )
+            ],
+            license_data,
+        )
+        return dcc.send_bytes(report, "report.pptx")
 
 
 @app.long_callback(
@@ -456,6 +539,8 @@ def reset_db(clicks: int):
     dash.no_update
     """
     driver.drop_all()
+    columnar.clear()
+    artifacts.clear()
     shutil.rmtree(UPLOAD_CACHE_PATH)
     sleep(1.5)
     return dash.no_update
@@ -574,7 +659,7 @@ def set_select_options(filename: str, file_select_value: str, clicks: int):
             c_ids = c_ids[c_ids["identifier"] == idents[-1]]
         else:
             c_ids = c_ids[c_ids["identifier"].isin(file_select_value)]
-        c_ids = c_ids["cluster_id"].drop_duplicates()
+        c_ids = c_ids["cluster_id"].drop_duplicates().sort_values()
         c_ids = c_ids.to_numpy().tolist()
         c_ids = ["All Cluster-IDs"] + c_ids
         if ctx.triggered_id == "filename":
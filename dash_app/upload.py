@@ -1,18 +1,44 @@
+import datetime as dt
 import os
-from time import sleep
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
 from typing import Callable
 
+import numpy as np
 import pandas as pd
 from dash import dash
 
+import database.columnar as columnar
 import database.driver as driver
 from computation.data import DataPings, DataSessions
 from computation.features import Features
-from computation.file_imports import upload_csv, upload_zip
+from computation.file_imports import (
+    get_zip_members,
+    get_zip_names,
+    read_zip_member,
+    stream_csv,
+    stream_zip,
+    upload_csv,
+    upload_zip,
+)
+from computation.rollups import get_cas_histogram, get_token_rollup
+from computation.session_blocks import get_late_groups
+from computation.sketches import get_sketches, merge_sketches
 from csv_config import feature_map, license_map
 
 UPLOAD_CACHE_PATH = os.path.abspath("./cache/upload_data/")
 
+# Number of processes which decode the csv files of an uploaded zip file
+WORKERS = os.cpu_count() or 1
+
+# Columns which identify a session block
+SESSION_KEYS = ["identifier", "cluster_id", "app_instance_id", "block_start"]
+# Columns which identify the pings of one app instance
+GROUP_KEYS = ["cluster_id", "app_instance_id"]
+# Columns which identify a distinct value sketch
+SKETCH_KEYS = ["identifier", "kind", "name", "day"]
+
 
 def convert_report_to_df(name: str):
     """
@@ -33,18 +59,183 @@ def convert_report_to_df(name: str):
         return upload_csv(UPLOAD_CACHE_PATH, name)
 
 
+def stream_report(name: str):
+    """
+    Parameters
+    ----------
+    name : String
+        the name of a file
+
+    Returns
+    -------
+    iterator of Tuple(iterator of pd.Dataframe, str) which represents the data in chunks combined with its name
+    """
+    filetype = name.split(".")[-1]
+    if filetype == "zip":
+        return stream_zip(UPLOAD_CACHE_PATH, name)
+
+    if filetype == "csv":
+        return stream_csv(UPLOAD_CACHE_PATH, name)
+
+
+def get_report_names(name: str):
+    """
+    Parameters
+    ----------
+    name : String
+        the name of a file
+
+    Returns
+    -------
+    list of str which represents the names of the csv files in the report, in the order of stream_report
+    """
+    filetype = name.split(".")[-1]
+    if filetype == "zip":
+        return get_zip_names(UPLOAD_CACHE_PATH, name)
+
+    if filetype == "csv":
+        return [name]
+
+
+def decode_chunks(chunks, filename: str, features: pd.DataFrame):
+    """
+    Decode the chunks of a file
+
+    Parameters
+    ----------
+    chunks : iterable of pd.DataFrame
+        the data of the file in chunks
+    filename : str
+        identifier of file
+    features : pd.DataFrame
+        metered features
+
+    Returns
+    -------
+    iterator of tuples with the type of the file ("License" or "Feature"), the decoded chunk and its number of lines,
+    a license chunk is decoded to a pd.DataFrame and a feature chunk to DataPings whose times are datetimes
+    """
+    for datagram in chunks:
+        if license_map["grant_id"] in datagram.columns:
+            yield "License", rename_columns(datagram, license_map), len(datagram.index)
+        else:
+            data_pings = DataPings(
+                filename, rename_columns(datagram, feature_map), features
+            )
+            # the times are parsed once here instead of by the session extraction and the database
+            data_pings.data = data_pings.data.assign(
+                time=pd.to_datetime(data_pings.data["time"], utc=True).dt.tz_localize(
+                    None
+                )
+            )
+            yield "Feature", data_pings, len(datagram.index)
+
+
+def decode_zip_member(
+    name: str, address: tuple, filename: str, features: pd.DataFrame
+) -> list:
+    """
+    Decode a csv file of an uploaded zip file, runs in a worker process
+
+    Parameters
+    ----------
+    name : str
+        the name of the zip file
+    address : tuple of str
+        the address of the csv file, as returned by get_zip_members
+    filename : str
+        identifier of file
+    features : pd.DataFrame
+        metered features
+
+    Returns
+    -------
+    list of tuples as returned by decode_chunks
+    """
+    return list(
+        decode_chunks(
+            read_zip_member(UPLOAD_CACHE_PATH, name, address), filename, features
+        )
+    )
+
+
+def decode_members(datagrams, filename: str):
+    """
+    Decode files one after another in this process
+
+    Parameters
+    ----------
+    datagrams : iterable of Tuple(iterable of pd.DataFrame, str)
+        data of the files in chunks, as returned by stream_report
+    filename : str
+        identifier of file
+
+    Returns
+    -------
+    iterator of Tuple(iterator of decoded chunks, str), see decode_chunks
+    """
+    features = Features().get_data_features()
+    for chunks, name in datagrams:
+        yield decode_chunks(chunks, filename, features), name
+
+
+def decode_report(name: str, filename: str):
+    """
+    Decode the files of an uploaded report,
+    the csv files of a zip file are decoded in parallel by WORKERS processes
+
+    Parameters
+    ----------
+    name : str
+        the name of the uploaded file
+    filename : str
+        identifier of file
+
+    Returns
+    -------
+    iterator of Tuple(iterable of decoded chunks, str) in the order of stream_report, see decode_chunks
+    """
+    members = []
+    if name.split(".")[-1] == "zip":
+        members = get_zip_members(UPLOAD_CACHE_PATH, name)
+    workers = min(WORKERS, len(members))
+    if workers <= 1:
+        # a single file is streamed chunk by chunk
+        yield from decode_members(stream_report(name), filename)
+        return
+
+    features = Features().get_data_features()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        for address, member in members:
+            pending.append(
+                (
+                    pool.submit(decode_zip_member, name, address, filename, features),
+                    member,
+                )
+            )
+            # decoded files wait for the writer, so only a few files are decoded ahead
+            if len(pending) >= 2 * workers:
+                future, member_name = pending.popleft()
+                yield future.result(), member_name
+        while pending:
+            future, member_name = pending.popleft()
+            yield future.result(), member_name
+
+
 def prepare_data(
-    set_progress: Callable, datagrams: list, filename: str, ident_num: int, ident_names
+    set_progress: Callable, members, filename: str, ident_num: int, ident_names
 ):
     """
-    Prepare data of feature file after upload of a feature file
+    Prepare data of feature file after upload of a feature file,
+    the decoded files are written to the database one after another by this process
 
     Parameter
     ---------
     set_progress : Callable
         progress bar
-    datagrams : list of Tuple(pd.DataFrame, str)
-        data of file
+    members : iterable of Tuple(iterable of decoded chunks, str)
+        decoded data of the files in chunks, as returned by decode_report or decode_members
     filename : str
         identifier of file
     ident_num : int
@@ -55,17 +246,27 @@ def prepare_data(
     bool which indicates if a download is complete
     str of the new feature file identifier
     str of the new license file identifier
+    list of str of the identifiers with new feature data
     """
 
     # 1. Convert Data
     feature_filename = dash.no_update
     license_filename = dash.no_update
+    feature_identifiers = []
 
     one_input = False
     if ident_num == -1:
         one_input = True
 
-    for datagram, name in datagrams:
+    features = Features().get_data_features()
+    # first and last metered day of the uploaded files of each identifier
+    uploaded_days = {}
+
+    # sketches which don't exist yet are computed for the saved data of all identifiers
+    if not driver.check_if_table_exists("sketches"):
+        backfill_sketches()
+
+    for chunks, name in members:
         if one_input:
             ident_num = 0
         else:
@@ -75,98 +276,135 @@ def prepare_data(
 
         header_text = "Uploading " + name
         set_progress((0, "0/5", header_text, "Converting Data", False, ""))
-        sleep(0.5)
 
-        if license_map["grant_id"] in datagram.columns:
+        # waits for the decoding of the file
+        chunks = iter(chunks)
+        chunk = next(chunks, None)
+        if chunk is None:
+            continue
+        if chunk[0] == "License":
             set_progress((60, "3/5", header_text, "Loading License Data", False, ""))
-            sleep(0.5)
-            datagram = rename_columns(datagram, license_map)
-
-            table = driver.get_df_from_db("identifier")
-            if (
-                table.loc[table["FileIdentifier"] == ident_name, "Type"].item()
-                == "unknown"
-            ):
-                table.loc[table["FileIdentifier"] == ident_name, "Type"] = "License"
-            else:
-                table.loc[
-                    table["FileIdentifier"] == ident_name, "Type"
-                ] = "Feature, License"
+
+            set_identifier_type(ident_name, "License")
             ident = ident_name
-            driver.df_to_sql_replace(table, "identifier")
 
-            license_data = datagram
-            license_data["identifier"] = ident
-            driver.df_to_sql_append(datagram, "license")
+            lines = 0
+            sketches = []
+            while chunk is not None:
+                _, license_data, chunk_lines = chunk
+                license_data["identifier"] = ident
+                driver.append_license(license_data)
+                sketches.append(
+                    get_sketches(
+                        license_data, "feature_name", "resource_id", "start_time"
+                    )
+                )
+
+                lines += chunk_lines
+                set_progress(
+                    (60, "3/5", header_text, f"Loaded {lines:,} Lines", False, "")
+                )
+                chunk = next(chunks, None)
+
+            save_sketches("resources", ident, sketches)
+
             set_progress(
                 (100, "5/5", header_text, "Loaded Data Successfully", False, "")
             )
-            sleep(0.5)
             license_filename = filename
         else:
-            set_progress(
-                (
-                    20,
-                    "1/5",
-                    header_text,
-                    "Getting Number of Lines and Features",
-                    False,
-                    "",
+            set_progress((40, "2/5", header_text, "Extracting DataSessions", False, ""))
+
+            # 2. Extract DataSessions chunk by chunk,
+            #    the open session blocks are carried from chunk to chunk and from upload to upload
+            ident = ident_name
+            open_blocks = get_empty_blocks()
+            # pairs with pings before their open block, they are extracted from all their pings after the file
+            late_groups = pd.DataFrame(columns=GROUP_KEYS)
+            cluster_ids = []
+            lines = 0
+            metered_lines = 0
+            days = []
+            sketches = []
+            while chunk is not None:
+                _, data_pings, chunk_lines = chunk
+                df_pings = data_pings.data.copy()
+                df_pings["identifier"] = ident
+                driver.df_to_sql_append(df_pings, "pings")
+                sketches.append(
+                    get_sketches(
+                        data_pings.data, "cluster_id", "app_instance_id", "time"
+                    )
                 )
-            )
-            sleep(0.5)
-            datagram = rename_columns(datagram, feature_map)
 
-            # 2. Get Features
-            features = Features().get_data_features()
-            set_progress((40, "2/5", header_text, "Extracting DataPings", False, ""))
-            sleep(0.5)
+                cluster_ids.append(data_pings.data["cluster_id"].drop_duplicates())
+                if len(data_pings.data.index) > 0:
+                    metered_lines += len(data_pings.data.index)
+                    metered_days = data_pings.get_metered_days()
+                    days.extend([metered_days[0], metered_days[-1]])
+
+                # 3. Set aside the pings of pairs which can't be resumed
+                open_blocks = get_open_blocks(ident, data_pings.data, open_blocks)
+                late_groups = pd.concat(
+                    [late_groups, get_late_groups(data_pings.data, open_blocks)],
+                    ignore_index=True,
+                ).drop_duplicates()
+                data_pings.data = data_pings.data[
+                    ~is_in_groups(data_pings.data, late_groups)
+                ]
+                open_blocks = open_blocks[~is_in_groups(open_blocks, late_groups)]
+
+                # 4. Extract Session Blocks which are closed by this chunk
+                data_session = DataSessions(
+                    pd.DataFrame([]), data_pings, features, 300, ""
+                )
+                open_blocks = data_session.resume_session_blocks(open_blocks)
+                df_session = data_session.data.copy()
+                df_session["identifier"] = ident
+                driver.df_to_sql_upsert(df_session, "session", SESSION_KEYS)
+
+                lines += chunk_lines
+                set_progress(
+                    (
+                        60,
+                        "3/5",
+                        header_text,
+                        f"Extracted Sessions of {lines:,} Lines",
+                        False,
+                        "",
+                    )
+                )
+                chunk = next(chunks, None)
 
-            # 3. Extract DataPings
-            data_pings = DataPings(filename, datagram, features)
-            set_progress((60, "3/5", header_text, "Extracting DataSessions", False, ""))
-            sleep(0.5)
+            if len(late_groups.index) > 0:
+                set_progress(
+                    (70, "3/5", header_text, "Extracting Late Sessions", False, "")
+                )
+                late_blocks, late_days = extract_groups(ident, late_groups, features)
+                open_blocks = pd.concat([open_blocks, late_blocks], ignore_index=True)
+                # the sessions of these pairs may change on every day of their pings
+                uploaded_days.setdefault(ident, []).extend(late_days)
 
-            # 4. Extract DataSessions
-            data_session = DataSessions(pd.DataFrame([]), data_pings, features, 300, "")
             set_progress(
-                (80, "4/5", header_text, "Extracting Session Blocks", False, "")
+                (80, "4/5", header_text, "Saving Open Session Blocks", False, "")
             )
 
-            # 5. Extract Session Blocks
-            data_session.extract_session_blocks()
-
-            df_session = data_session.data.copy()
-            df_pings = data_pings.data.copy()
-
-            table = driver.get_df_from_db("identifier").copy()
-            if (
-                table.loc[table["FileIdentifier"] == ident_name, "Type"].item()
-                == "unknown"
-            ):
-                table.loc[table["FileIdentifier"] == ident_name, "Type"] = "Feature"
-            else:
-                table.loc[
-                    table["FileIdentifier"] == ident_name, "Type"
-                ] = "Feature, License"
-
-            ident = ident_name
-            driver.df_to_sql_replace(table, "identifier")
-
+            # the open blocks are sessions too
+            df_session = open_blocks.copy()
             df_session["identifier"] = ident
-            df_pings["identifier"] = ident
-            driver.df_to_sql_append(df_session, "session")
-            driver.filter_duplicates("session")
+            driver.df_to_sql_upsert(df_session, "session", SESSION_KEYS)
+            driver.set_open_blocks(open_blocks, ident)
+            save_sketches("app_instances", ident, sketches)
 
-            driver.df_to_sql_append(df_pings, "pings")
-            driver.filter_duplicates("pings")
+            set_identifier_type(ident_name, "Feature")
 
             # Calculate and save report statistics
-            report_statistics(data_pings, ident_name)
+            if days:
+                report_statistics(ident_name, metered_lines, min(days), max(days))
+                uploaded_days.setdefault(ident, []).extend([min(days), max(days)])
 
             # Calculate and save ClusterID statistics
-            cluster_ids = data_session.get_cluster_ids()
-            cluster_ids = cluster_ids.to_frame()
+            cluster_ids = pd.concat(cluster_ids).drop_duplicates().to_frame()
             cluster_ids["identifier"] = ident
             driver.df_to_sql_append(cluster_ids, "cluster_ids")
 
@@ -174,22 +412,282 @@ def prepare_data(
             set_progress(
                 (100, "5/5", header_text, "Loaded Data Successfully", False, "")
             )
-            sleep(0.5)
             feature_filename = filename
+            if ident not in feature_identifiers:
+                feature_identifiers.append(ident)
+
+    # 5. Update the columnar store and the rollups once per identifier, not once per file
+    for ident, days in uploaded_days.items():
+        set_progress((100, "5/5", "Uploading " + ident, "Updating Rollups", False, ""))
+        columnar.update(ident, min(days), max(days))
+        update_rollups(ident, min(days), max(days), features)
+
+    # results computed from the previous data are outdated
+    driver.bump_generation()
+
+    return (
+        False,
+        feature_filename,
+        license_filename,
+        feature_identifiers or dash.no_update,
+    )
 
-    return False, feature_filename, license_filename
+
+def get_empty_blocks() -> pd.DataFrame:
+    """
+    Returns
+    -------
+    pd.DataFrame
+        session blocks without rows
+    """
+    return pd.DataFrame(
+        columns=GROUP_KEYS + ["feature_mask", "block_start", "block_end", "last_ping"]
+    )
+
+
+def is_in_groups(df: pd.DataFrame, groups: pd.DataFrame) -> np.ndarray:
+    """
+    Parameters
+    ----------
+    df : pd.DataFrame
+        rows with the columns cluster_id and app_instance_id
+    groups : pd.DataFrame
+        the cluster_id and app_instance_id of pairs
+
+    Returns
+    -------
+    np.ndarray
+        True for the rows of df which belong to one of the pairs
+    """
+    return pd.MultiIndex.from_frame(df[GROUP_KEYS]).isin(
+        pd.MultiIndex.from_frame(groups[GROUP_KEYS])
+    )
+
+
+def extract_groups(ident: str, groups: pd.DataFrame, features: pd.DataFrame):
+    """
+    Extract the session blocks of (cluster_id, app_instance_id) pairs again from all their saved pings,
+    replacing their saved sessions
+
+    Parameters
+    ----------
+    ident : str
+        identifier of the uploaded file
+    groups : pd.DataFrame
+        the cluster_id and app_instance_id of the pairs
+    features : pd.DataFrame
+        metered features
+
+    Returns
+    -------
+    pd.DataFrame
+        open session blocks of the pairs, one per pair
+    list of dt.Date
+        first and last day of the pings of the pairs
+    """
+    data_pings = DataPings(
+        "", driver.get_rows_of_groups("pings", ident, groups), features
+    )
+    data_session = DataSessions(pd.DataFrame([]), data_pings, features, 300, "")
+    open_blocks = data_session.resume_session_blocks(get_empty_blocks())
+    df_session = data_session.data.copy()
+    df_session["identifier"] = ident
+    # blocks of the old extraction may start at other times
+    driver.delete_rows_of_groups("session", ident, groups)
+    driver.df_to_sql_upsert(df_session, "session", SESSION_KEYS)
+    metered_days = data_pings.get_metered_days()
+    return open_blocks, [metered_days[0], metered_days[-1]]
+
+
+def get_open_blocks(ident: str, pings: pd.DataFrame, open_blocks: pd.DataFrame):
+    """
+    Complete the open session blocks with the saved open blocks of the app instances
+    which appear in the pings for the first time
+
+    Parameters
+    ----------
+    ident : str
+        identifier of the uploaded file
+    pings : pd.DataFrame
+        pings of the current chunk
+    open_blocks : pd.DataFrame
+        open session blocks of the previous chunks
+
+    Returns
+    -------
+    pd.DataFrame
+        open session blocks of the previous chunks and of the new app instances
+    """
+    groups = pings[GROUP_KEYS].drop_duplicates()
+    groups = groups[
+        ~pd.MultiIndex.from_frame(groups).isin(
+            pd.MultiIndex.from_frame(open_blocks[GROUP_KEYS])
+        )
+    ]
+    if len(groups.index) == 0:
+        return open_blocks
+    return pd.concat(
+        [open_blocks, driver.get_open_blocks(ident, groups)], ignore_index=True
+    )
+
+
+def update_rollups(ident: str, first_day, last_day, features: pd.DataFrame):
+    """
+    Recompute the token rollup and the CAS histogram of the days of an upload,
+    a rollup which doesn't exist yet is computed for all identifiers
+
+    Parameters
+    ----------
+    ident : str
+        identifier of the uploaded file
+    first_day : dt.Date
+        first metered day of the uploaded file
+    last_day : dt.Date
+        last metered day of the uploaded file
+    features : pd.DataFrame
+        metered features
+    """
+    rollup_functions = {
+        "token_rollup": partial(get_token_rollup, features=features),
+        "cas_histogram": get_cas_histogram,
+    }
+    sessions = {}
+    for table_name, get_rollup in rollup_functions.items():
+        if driver.check_if_table_exists(table_name):
+            # a session which is continued by the upload may start on the day before
+            days = [(ident, first_day - dt.timedelta(days=1), last_day)]
+        else:
+            days = []
+            for identifier in driver.get_identifiers("session"):
+                first, last = driver.get_time_range("session", [identifier])
+                days.append((identifier, first, last))
+
+        rollups = []
+        for key in days:
+            if key not in sessions:
+                sessions[key] = driver.get_encoded_df_from_db("session", *key)
+                for column in ["block_start", "block_end"]:
+                    sessions[key][column] = pd.to_datetime(
+                        sessions[key][column], unit="s"
+                    )
+            rollups.append(get_rollup(sessions[key]))
+
+        # the table is only created when the rollups of all identifiers are computed
+        for (identifier, first, last), rollup in zip(days, rollups):
+            driver.set_rollup(table_name, rollup, identifier, first, last)
+
+
+def save_sketches(kind: str, ident: str, sketches: list):
+    """
+    Merge the distinct value sketches of an upload with the saved sketches of their days
+
+    Parameters
+    ----------
+    kind : str
+        kind of the sketches, app_instances or resources
+    ident : str
+        identifier of the uploaded file
+    sketches : list of pd.DataFrame
+        sketches of the chunks of the upload, as returned by get_sketches
+    """
+    sketches = pd.concat(sketches, ignore_index=True)
+    if len(sketches.index) == 0:
+        return
+    saved = driver.get_sketches(
+        kind, [ident], sketches["day"].min(), sketches["day"].max()
+    )
+    saved["day"] = pd.to_datetime(saved["day"])
+    sketches = merge_sketches(
+        pd.concat([saved, sketches], ignore_index=True), ["name", "day"]
+    )
+    sketches["identifier"] = ident
+    sketches["kind"] = kind
+    driver.df_to_sql_upsert(sketches, "sketches", SKETCH_KEYS)
+
+
+def backfill_sketches():
+    """
+    Sketch the distinct app instances of the saved pings and the distinct resources of the saved license rows
+    of all identifiers, the rows are read 30 days at a time
+    """
+    for identifier, pings in read_windows("pings", "time"):
+        sketch = get_sketches(pings, "cluster_id", "app_instance_id", "time")
+        save_sketches("app_instances", identifier, [sketch])
+
+    for identifier, rows in read_windows("license", "start_time", dictionaries=True):
+        sketch = get_sketches(rows, "feature_name", "resource_id", "start_time")
+        save_sketches("resources", identifier, [sketch])
+
+    # the table exists from now on, even without data
+    driver.get_sketches("app_instances")
+
+
+def read_windows(table_name: str, time: str, dictionaries: bool = False):
+    """
+    Read the rows of a table per identifier 30 days at a time
+
+    Parameters
+    ----------
+    table_name : str
+        pings or license
+    time : str
+        the start column of the rows, it is converted to datetimes
+    dictionaries : bool
+        True to read the values of the dictionary-encoded columns, see driver.get_encoded_df_from_db
+
+    Yields
+    ------
+    Tuple(str, pd.DataFrame)
+        the identifier and the rows which start in a window of 30 days
+    """
+    for identifier in driver.get_identifiers(table_name):
+        first, last = driver.get_time_range(table_name, [identifier])
+        for start in pd.date_range(first[:10], last[:10], freq="30D"):
+            rows = driver.get_encoded_df_from_db(
+                table_name,
+                identifier,
+                start,
+                start + dt.timedelta(days=29),
+                dictionaries,
+            )
+            rows[time] = pd.to_datetime(rows[time], unit="s")
+            yield identifier, rows
+
+
+def set_identifier_type(ident_name: str, type_name: str):
+    """
+    Set the type of an identifier in the database,
+    an identifier which already has another type becomes "Feature, License"
+
+    Parameters
+    ----------
+    ident_name : str
+        the identifier
+    type_name : str
+        either "Feature" or "License"
+    """
+    table = driver.get_df_from_db("identifier").copy()
+    if table.loc[table["FileIdentifier"] == ident_name, "Type"].item() == "unknown":
+        table.loc[table["FileIdentifier"] == ident_name, "Type"] = type_name
+    else:
+        table.loc[table["FileIdentifier"] == ident_name, "Type"] = "Feature, License"
+    driver.df_to_sql_replace(table, "identifier")
 
 
-def report_statistics(data_pings: DataPings, ident_name: str):
+def report_statistics(ident_name: str, lines: int, first_day, last_day):
     """
     Calculate and save report statistics
 
     Parameters
     ----------
-    data_pings : DataPings
-        DataPings of the uploaded file
     ident_name : str
         Identifier of the uploaded file
+    lines : int
+        number of metered pings of the uploaded file
+    first_day : dt.Date
+        first metered day of the uploaded file
+    last_day : dt.Date
+        last metered day of the uploaded file
     """
 
     # Calculate and save report statistics
@@ -202,11 +700,10 @@ def report_statistics(data_pings: DataPings, ident_name: str):
     report_statistics.set_index("Report", inplace=True)
 
     # Calculate statistics
-    lines = f"{len(data_pings.get_pings().index):,}".replace(",", " ")
-    sequence_of_days = data_pings.get_sequence_of_days()
-    total_days = str(len(sequence_of_days))
-    earliest_cal_day = str(sequence_of_days[0])
-    last_cal_day = str(sequence_of_days[-1])
+    lines = f"{lines:,}".replace(",", " ")
+    total_days = str((last_day - first_day).days + 1)
+    earliest_cal_day = str(first_day)
+    last_cal_day = str(last_day)
 
     # Append or update statistics in report_statistics
     if ident_name in report_statistics.index:
@@ -0,0 +1,242 @@
+"""
+This is columnar.py.
+
+columnar.py contains an optional columnar copy of the session and ping data in cache/columnar.
+
+Every identifier has one parquet file per table and month. Timestamps are stored as datetime64 (UTC without time
+zone), cluster_id and app_instance_id as categoricals. The files are written by the upload from the database, which
+stays the source of the data. Reading needs pyarrow; without pyarrow AVAILABLE is False and the store is removed on
+the next upload, so an outdated copy is never used.
+"""
+
+import os
+import shutil
+from urllib.parse import quote
+
+import pandas as pd
+
+import database.driver as driver
+import database.schema as schema
+
+try:
+    import pyarrow.parquet as pq
+except ImportError:
+    pq = None
+
+AVAILABLE = pq is not None
+ROOT = os.path.abspath("./cache/columnar")
+
+# Tables of the store
+TABLES = ["session", "pings"]
+# Columns stored as categoricals
+CATEGORICAL_COLUMNS = ["cluster_id", "app_instance_id"]
+# File which marks that the store contains all data of the database
+COMPLETE_FILE = "complete"
+
+
+def is_complete() -> bool:
+    """
+    Returns
+    -------
+    bool:
+        True if the store can be read and contains all data of the database
+    """
+    return AVAILABLE and os.path.exists(os.path.join(ROOT, COMPLETE_FILE))
+
+
+def clear() -> None:
+    """
+    Removes the store
+    """
+    shutil.rmtree(ROOT, ignore_errors=True)
+
+
+def get_months(first_day, last_day) -> list:
+    """
+    Parameters
+    ----------
+    first_day: date or str
+        the first day
+    last_day: date or str
+        the last day
+
+    Returns
+    -------
+    list of pd.Period:
+        the months from the month of first_day to the month of last_day
+    """
+    return list(
+        pd.period_range(
+            pd.Period(str(first_day)[:7], freq="M"),
+            pd.Period(str(last_day)[:7], freq="M"),
+        )
+    )
+
+
+def get_path(table_name: str, identifier: str, month: pd.Period) -> str:
+    """
+    Parameters
+    ----------
+    table_name: str
+        the name of the table
+    identifier: str
+        the file identifier
+    month: pd.Period
+        the month
+
+    Returns
+    -------
+    str:
+        the path of the parquet file of the identifier and month
+    """
+    return os.path.join(
+        ROOT, table_name, quote(identifier, safe=""), f"{month}.parquet"
+    )
+
+
+def write_partitions(table_name: str, identifier: str, first_day, last_day) -> None:
+    """
+    Copies the rows of an identifier which start between two days from the database into the store,
+    the files of all months in between are rewritten
+
+    Parameters
+    ----------
+    table_name: str
+        the name of the table
+    identifier: str
+        the file identifier
+    first_day: date or str
+        the first day
+    last_day: date or str
+        the last day
+    """
+    for month in get_months(first_day, last_day):
+        df = driver.get_encoded_df_from_db(
+            table_name, identifier, month.start_time, month.end_time
+        )
+        path = get_path(table_name, identifier, month)
+        if len(df.index) == 0:
+            if os.path.exists(path):
+                os.remove(path)
+            continue
+
+        for column in schema.TIME_COLUMNS[table_name]:
+            df[column] = pd.to_datetime(df[column], unit="s")
+        for column in CATEGORICAL_COLUMNS:
+            df[column] = df[column].astype("category")
+
+        # readers of another process see either the old or the new file
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        df.to_parquet(path + ".tmp", index=False)
+        os.replace(path + ".tmp", path)
+
+
+def update(identifier: str, first_day, last_day) -> None:
+    """
+    Updates the store after an upload,
+    the store is built from the whole database if it is not complete yet
+
+    Parameters
+    ----------
+    identifier: str
+        the file identifier of the upload
+    first_day: date or str
+        the first day of the upload
+    last_day: date or str
+        the last day of the upload
+    """
+    if not AVAILABLE:
+        clear()
+        return
+    if not is_complete():
+        clear()
+        for table_name in TABLES:
+            for ident in driver.get_identifiers(table_name):
+                first, last = driver.get_time_range(table_name, [ident])
+                write_partitions(table_name, ident, first, last)
+        os.makedirs(ROOT, exist_ok=True)
+        open(os.path.join(ROOT, COMPLETE_FILE), "w").close()
+        return
+
+    # a session which is continued by the upload may start on the day before
+    first_day = pd.Timestamp(str(first_day)[:10]) - pd.Timedelta(days=1)
+    for table_name in TABLES:
+        write_partitions(table_name, identifier, first_day, last_day)
+
+
+def read(
+    table_name: str,
+    identifiers: list = None,
+    cluster_id: str = None,
+    start=None,
+    end=None,
+) -> pd.DataFrame:
+    """
+    Reads the rows of a table which match the filters,
+    only the files of the wanted identifiers and months are opened
+
+    Parameters
+    ----------
+    table_name: str
+        the name of the table
+    identifiers: list of str
+        the wanted file identifiers, None for all
+    cluster_id: str
+        the wanted cluster id, None for all
+    start: date or str
+        the first day of the wanted interval, rows have to start at or after its beginning
+    end: date or str
+        the last day of the wanted interval, rows have to end at or before its end
+
+    Returns
+    -------
+    pd.Dataframe:
+        the matching rows in the order they were written,
+        the timestamps as datetime64 and cluster_id and app_instance_id as categoricals
+    """
+    table_path = os.path.join(ROOT, table_name)
+    if identifiers is None:
+        folders = os.listdir(table_path) if os.path.exists(table_path) else []
+    else:
+        folders = [quote(identifier, safe="") for identifier in identifiers]
+
+    files = []
+    for folder in folders:
+        folder = os.path.join(table_path, folder)
+        if not os.path.exists(folder):
+            continue
+        for file in sorted(os.listdir(folder)):
+            if not file.endswith(".parquet"):
+                continue
+            month = pd.Period(file[: -len(".parquet")], freq="M")
+            if start is not None and month.end_time < pd.Timestamp(str(start)[:10]):
+                continue
+            if end is not None and month.start_time > pd.Timestamp(str(end)[:10]):
+                continue
+            files.append(os.path.join(folder, file))
+
+    start_column, end_column = schema.RANGE_COLUMNS[table_name]
+    filters = []
+    if cluster_id is not None:
+        filters.append(("cluster_id", "=", cluster_id))
+    if start is not None:
+        filters.append((start_column, ">=", pd.Timestamp(str(start)[:10])))
+    if end is not None:
+        filters.append((end_column, "<=", pd.Timestamp(str(end)[:10] + " 23:59:59")))
+
+    columns = ["id"] + list(schema.TABLES[table_name])
+    if not files:
+        df = pd.DataFrame({column: pd.Series(dtype="object") for column in columns})
+        for column in schema.TIME_COLUMNS[table_name]:
+            df[column] = pd.Series(dtype="datetime64[ns]")
+        for column in CATEGORICAL_COLUMNS:
+            df[column] = pd.Series(dtype="category")
+        return df.drop(columns="id")
+
+    df = (
+        pq.ParquetDataset(files, filters=filters or None, memory_map=True)
+        .read(columns=columns, use_pandas_metadata=True)
+        .to_pandas()
+    )
+    df = df.sort_values(by="id", ignore_index=True)
+    return df.drop(columns="id")
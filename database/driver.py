@@ -1,35 +1,66 @@
 import os
 import sqlite3
+import threading
 from sqlite3 import Connection
 
 import pandas as pd
 import sqlalchemy
 
-connection: Connection = None
+import database.schema as schema
+
 PATH = os.path.abspath("./cache/data_table.db")
 
+# Connections of the threads, every thread of every process gets its own connection
+local = threading.local()
+# Engines of the processes by (process id, path)
+engines = {}
+
 
 def create_con() -> Connection:
     """
     Creates a connection to the database
-    with the path specified in PATH
+    with the path specified in PATH for the current thread,
+    the connection is kept open and returned by get_con
 
     Returns
     -------
     Connection:
         the connection to the database
     """
-    global connection
-    con = sqlite3.connect(PATH, check_same_thread=False)
-    connection = con
+    con = sqlite3.connect(PATH, timeout=30)
+    # readers don't block the writer and the writer doesn't block readers
+    con.execute("PRAGMA journal_mode=WAL")
+    con.execute("PRAGMA synchronous=NORMAL")
+    schema.migrate(con)
+    local.connection = con
+    local.key = (os.getpid(), PATH)
     return con
 
 
+def get_con() -> Connection:
+    """
+    Returns the open connection of the current thread,
+    a new connection is created if the thread has none yet,
+    the process was forked or PATH has changed
+
+    Returns
+    -------
+    Connection:
+        the connection to the database
+    """
+    if getattr(local, "key", None) != (os.getpid(), PATH):
+        return create_con()
+    return local.connection
+
+
 def close_con() -> None:
     """
-    Closes the current open connection to the database
+    Closes the open connection of the current thread
     """
-    connection.close()
+    if getattr(local, "key", None) == (os.getpid(), PATH):
+        local.connection.close()
+    local.key = None
+    local.connection = None
 
 
 def df_to_sql_append(df: pd.DataFrame, name: str) -> None:
@@ -43,9 +74,20 @@ def df_to_sql_append(df: pd.DataFrame, name: str) -> None:
     name: String
         the name of the table
     """
-    create_con()
-    df.to_sql(name=name, con=connection, if_exists="append", index=False)
-    close_con()
+    connection = get_con()
+    if name in schema.TABLES:
+        schema.create_table(connection, name)
+        df = schema.encode(df, name)
+        df = schema.encode_dictionaries(connection, df, name)
+        df.to_sql(
+            name=name,
+            con=connection,
+            if_exists="append",
+            index=False,
+            method=schema.insert_rows,
+        )
+    else:
+        df.to_sql(name=name, con=connection, if_exists="append", index=False)
 
 
 def df_to_sql_replace(df: pd.DataFrame, name: str) -> None:
@@ -59,36 +101,89 @@ def df_to_sql_replace(df: pd.DataFrame, name: str) -> None:
     name: String
         the name of the table
     """
-    create_con()
-    df.to_sql(name=name, con=connection, if_exists="replace", index=False)
-    close_con()
+    connection = get_con()
+    if name in schema.TABLES:
+        # keep the schema of the table
+        schema.create_table(connection, name)
+        connection.execute(f"DELETE FROM {name}")
+        connection.commit()
+        df_to_sql_append(df, name)
+    else:
+        df.to_sql(name=name, con=connection, if_exists="replace", index=False)
+
+
+def df_to_sql_upsert(df: pd.DataFrame, name: str, keys: list) -> None:
+    """
+    Appends the dataframe to the current database table,
+    rows of the table with the same keys as a row of the dataframe are replaced
+
+    Parameters
+    ----------
+    df: pd.Dataframe
+        the data to be written
+    name: String
+        the name of the table
+    keys: list of str
+        the columns which identify a row
+    """
+    if (
+        name in schema.UNIQUE_KEYS
+        and set(keys) == set(schema.UNIQUE_KEYS[name][0])
+        and schema.UNIQUE_KEYS[name][1] == "REPLACE"
+    ):
+        # the unique key of the table replaces the rows while inserting
+        df_to_sql_append(df, name)
+        return
+    if not check_if_table_exists(name):
+        df_to_sql_append(df, name)
+        return
+
+    connection = get_con()
+    current_data = schema.encode(df, name) if name in schema.TABLES else df
+    current_data.to_sql(
+        name="current_data", con=connection, if_exists="replace", index=False
+    )
+    key_columns = ", ".join(keys)
+    connection.execute(
+        f"DELETE FROM {name} WHERE ({key_columns}) IN (SELECT {key_columns} FROM"
+        " current_data)"
+    )
+    connection.commit()
+    df_to_sql_append(df, name)
+    drop_current_table()
 
 
 def drop_all() -> None:
     """
     Drops all existing tables
     """
-    cursor = create_con().cursor()
+    cursor = get_con().cursor()
 
     cursor.execute("drop table if exists pings")
     cursor.execute("drop table if exists session")
     cursor.execute("drop table if exists license")
+    cursor.execute("drop table if exists license_features")
+    cursor.execute("drop table if exists license_resources")
+    cursor.execute("drop table if exists license_first_resources")
+    cursor.execute("drop table if exists license_counts")
+    cursor.execute("drop table if exists sketches")
     cursor.execute("drop table if exists identifier")
     cursor.execute("drop table if exists cluster_ids")
     cursor.execute("drop table if exists report_statistics")
-
-    close_con()
+    cursor.execute("drop table if exists open_blocks")
+    cursor.execute("drop table if exists token_rollup")
+    cursor.execute("drop table if exists cas_histogram")
 
     drop_current_table()
+    bump_generation()
 
 
 def drop_current_table() -> None:
     """
     Drops the current_data table
     """
-    cursor = create_con().cursor()
+    cursor = get_con().cursor()
     cursor.execute("drop table if exists current_data")
-    close_con()
 
 
 def get_engine() -> sqlalchemy.engine.Engine:
@@ -96,11 +191,15 @@ def get_engine() -> sqlalchemy.engine.Engine:
     Returns
     -------
     sqlalchemy.engine:
-        the engine to the database with the path specified in PATH
+        the engine to the database with the path specified in PATH,
+        the engine is created once per process
     """
-    return sqlalchemy.create_engine(
-        "sqlite:///" + PATH, execution_options={"sqlite_raw_colnames": True}
-    )
+    key = (os.getpid(), PATH)
+    if key not in engines:
+        engines[key] = sqlalchemy.create_engine(
+            "sqlite:///" + PATH, execution_options={"sqlite_raw_colnames": True}
+        )
+    return engines[key]
 
 
 def check_if_table_exists(table_name: str) -> bool:
@@ -115,13 +214,11 @@ def check_if_table_exists(table_name: str) -> bool:
     -------
     True if the table exits, False if the table does not exist
     """
-    cursor = create_con().cursor()
+    cursor = get_con().cursor()
     tables = cursor.execute(
         "SELECT name FROM sqlite_master WHERE type='table' AND name=?;", (table_name,)
     )
-    ret = bool(tables.fetchone())
-    close_con()
-    return ret
+    return bool(tables.fetchone())
 
 
 def get_df_from_db(table_name: str) -> pd.DataFrame:
@@ -138,12 +235,196 @@ def get_df_from_db(table_name: str) -> pd.DataFrame:
     pd.Dataframe:
         the data of the database table
     """
-    create_con()
-    df = pd.read_sql_table(table_name, get_engine())
-    close_con()
+    connection = get_con()
+    if table_name in schema.TABLES:
+        columns, joins = get_dictionary_joins(table_name)
+        df = pd.read_sql_query(
+            f"SELECT {columns} FROM {table_name}{joins} ORDER BY {table_name}.id",
+            connection,
+        )
+        df = schema.decode(df, table_name)
+    else:
+        df = pd.read_sql_query(f"SELECT * FROM {table_name}", connection)
     return df
 
 
+def get_dictionary_joins(table_name: str) -> tuple:
+    """
+    Gets the columns and the joins of a query which reads the values of the dictionary-encoded columns of a table
+
+    Parameter
+    ---------
+    table_name: String
+        the name of the table
+
+    Returns
+    -------
+    String:
+        the columns of the table, dictionary-encoded columns are read from their dictionary table
+    String:
+        the joins of the dictionary tables
+    """
+    dictionaries = schema.DICTIONARIES.get(table_name, {})
+    columns = ", ".join(
+        f"{dictionaries.get(column, table_name)}.{column}"
+        for column in schema.TABLES[table_name]
+    )
+    joins = "".join(
+        f" LEFT JOIN {dictionary} ON {dictionary}.id = {table_name}.{column}"
+        for column, dictionary in dictionaries.items()
+    )
+    return columns, joins
+
+
+def get_filtered_df_from_db(
+    table_name: str,
+    identifiers: list = None,
+    cluster_id: str = None,
+    start=None,
+    end=None,
+) -> pd.DataFrame:
+    """
+    Gets the rows of a database table which match the filters,
+    the filters are evaluated by the database and use its indexes
+
+    Parameter
+    ---------
+    table_name: String
+        the name of the table, one of the tables with a time span in schema.RANGE_COLUMNS
+    identifiers: list of String
+        the wanted file identifiers, None for all
+    cluster_id: String
+        the wanted cluster id, None for all
+    start: date or String
+        the first day of the wanted interval, rows have to start at or after its beginning,
+        None for no limit
+    end: date or String
+        the last day of the wanted interval, rows have to end at or before its end,
+        None for no limit
+
+    Returns
+    -------
+    pd.Dataframe:
+        the matching rows of the database table in the order they were written
+    """
+    start_column, end_column = schema.RANGE_COLUMNS[table_name]
+    conditions = []
+    params = []
+    if identifiers is not None:
+        conditions.append(f"identifier IN ({', '.join('?' * len(identifiers))})")
+        params.extend(identifiers)
+    if cluster_id is not None:
+        conditions.append("cluster_id = ?")
+        params.append(cluster_id)
+    if start is not None:
+        conditions.append(f"{start_column} >= ?")
+        params.append(schema.encode_day(start, end_of_day=False))
+    if end is not None:
+        conditions.append(f"{end_column} <= ?")
+        params.append(schema.encode_day(end, end_of_day=True))
+
+    query = f"SELECT {', '.join(schema.TABLES[table_name])} FROM {table_name}"
+    if conditions:
+        query += " WHERE " + " AND ".join(conditions)
+    connection = get_con()
+    df = pd.read_sql_query(query + " ORDER BY id", connection, params=params)
+    return schema.decode(df, table_name)
+
+
+def get_encoded_df_from_db(
+    table_name: str, identifier: str, first_day, last_day, dictionaries: bool = False
+) -> pd.DataFrame:
+    """
+    Gets the rows of an identifier which start between two days,
+    the timestamps stay seconds since epoch
+
+    Parameter
+    ---------
+    table_name: String
+        the name of the table, one of the tables with a time span in schema.RANGE_COLUMNS
+    identifier: String
+        the file identifier
+    first_day: date or String
+        the first day (inclusive)
+    last_day: date or String
+        the last day (inclusive)
+    dictionaries: bool
+        True to read the values of the dictionary-encoded columns instead of their ids
+
+    Returns
+    -------
+    pd.Dataframe:
+        the rows with the column id, in the order they were written
+    """
+    start_column = schema.RANGE_COLUMNS[table_name][0]
+    columns, joins = ", ".join(schema.TABLES[table_name]), ""
+    if dictionaries:
+        columns, joins = get_dictionary_joins(table_name)
+    return pd.read_sql_query(
+        (
+            f"SELECT {table_name}.id, {columns} FROM {table_name}{joins} WHERE"
+            f" {table_name}.identifier = ? AND {table_name}.{start_column} BETWEEN ?"
+            f" AND ? ORDER BY {table_name}.id"
+        ),
+        get_con(),
+        params=(
+            identifier,
+            schema.encode_day(first_day, end_of_day=False),
+            schema.encode_day(last_day, end_of_day=True),
+        ),
+    )
+
+
+def get_identifiers(table_name: str) -> list:
+    """
+    Gets the file identifiers which have rows in a database table
+
+    Parameter
+    ---------
+    table_name: String
+        the name of the table
+
+    Returns
+    -------
+    list of String:
+        the file identifiers
+    """
+    if not check_if_table_exists(table_name):
+        return []
+    rows = get_con().execute(f"SELECT DISTINCT identifier FROM {table_name}")
+    return [row[0] for row in rows.fetchall()]
+
+
+def get_time_range(table_name: str, identifiers: list = None) -> tuple:
+    """
+    Gets the first and the last start time of the rows of a database table
+
+    Parameter
+    ---------
+    table_name: String
+        the name of the table, one of the tables with a time span in schema.RANGE_COLUMNS
+    identifiers: list of String
+        the file identifiers of the used rows, None for all
+
+    Returns
+    -------
+    tuple of String:
+        the first and the last start time in the format of the application,
+        None if the table is empty
+    """
+    start_column = schema.RANGE_COLUMNS[table_name][0]
+    query = f"SELECT MIN({start_column}), MAX({start_column}) FROM {table_name}"
+    params = []
+    if identifiers is not None:
+        query += f" WHERE identifier IN ({', '.join('?' * len(identifiers))})"
+        params.extend(identifiers)
+    connection = get_con()
+    first, last = connection.execute(query, params).fetchone()
+    time_format = schema.TIME_COLUMNS[table_name][start_column]
+    times = schema.format_epoch(pd.Series([first, last], dtype="float"), time_format)
+    return tuple(times)
+
+
 def filter_duplicates(table_name: str, identifier=None):
     """
     Filters all duplicates in a database table
@@ -156,6 +437,13 @@ def filter_duplicates(table_name: str, identifier=None):
         a subset of the table which should be used to filter the duplicates
     """
 
+    if table_name in schema.TABLES:
+        # delete all but the last row of every group of duplicates
+        if identifier is None:
+            identifier = list(schema.TABLES[table_name])
+        schema.remove_duplicates(get_con(), table_name, identifier, keep_last=True)
+        return
+
     df = get_df_from_db(table_name)
     if identifier is None:
         identifier = df.columns
@@ -177,10 +465,388 @@ def get_last_input(table_name: str):
     String
         last input in a datatable
     """
-    cursor = create_con().cursor()
+    cursor = get_con().cursor()
     last = cursor.execute(
         "SELECT * FROM " + table_name + " ORDER BY ROWID DESC LIMIT 1"
     ).fetchall()
 
-    close_con()
     return last[0][0]
+
+
+def get_open_blocks(identifier: str, groups: pd.DataFrame) -> pd.DataFrame:
+    """
+    Gets the open session blocks of an identifier
+
+    Parameter
+    ---------
+    identifier: String
+        the file identifier
+    groups: pd.Dataframe
+        the cluster_id and app_instance_id of the wanted blocks
+
+    Returns
+    -------
+    pd.Dataframe:
+        the open session blocks of the groups which have one
+    """
+    columns = [
+        "cluster_id",
+        "app_instance_id",
+        "feature_mask",
+        "block_start",
+        "block_end",
+        "last_ping",
+    ]
+    if not check_if_table_exists("open_blocks"):
+        return pd.DataFrame(columns=columns)
+    connection = get_con()
+    groups[["cluster_id", "app_instance_id"]].to_sql(
+        name="current_data", con=connection, if_exists="replace", index=False
+    )
+    df = pd.read_sql_query(
+        "SELECT "
+        + ", ".join(columns)
+        + " FROM open_blocks WHERE identifier = ? AND (cluster_id, app_instance_id) IN"
+        " (SELECT cluster_id, app_instance_id FROM current_data)",
+        connection,
+        params=(identifier,),
+    )
+    drop_current_table()
+    return schema.decode(df, "open_blocks")
+
+
+def get_rows_of_groups(
+    table_name: str, identifier: str, groups: pd.DataFrame
+) -> pd.DataFrame:
+    """
+    Gets the rows of an identifier which belong to (cluster_id, app_instance_id) pairs
+
+    Parameter
+    ---------
+    table_name: String
+        the name of a table with the columns identifier, cluster_id and app_instance_id, e.g. pings
+    identifier: String
+        the file identifier
+    groups: pd.Dataframe
+        the cluster_id and app_instance_id of the wanted rows
+
+    Returns
+    -------
+    pd.Dataframe:
+        the rows of the groups in the order they were written
+    """
+    connection = get_con()
+    groups[["cluster_id", "app_instance_id"]].to_sql(
+        name="current_data", con=connection, if_exists="replace", index=False
+    )
+    df = pd.read_sql_query(
+        (
+            f"SELECT {', '.join(schema.TABLES[table_name])} FROM {table_name} WHERE"
+            " identifier = ? AND (cluster_id, app_instance_id) IN (SELECT cluster_id,"
+            " app_instance_id FROM current_data) ORDER BY id"
+        ),
+        connection,
+        params=(identifier,),
+    )
+    drop_current_table()
+    return schema.decode(df, table_name)
+
+
+def delete_rows_of_groups(
+    table_name: str, identifier: str, groups: pd.DataFrame
+) -> None:
+    """
+    Deletes the rows of an identifier which belong to (cluster_id, app_instance_id) pairs
+
+    Parameter
+    ---------
+    table_name: String
+        the name of a table with the columns identifier, cluster_id and app_instance_id, e.g. session
+    identifier: String
+        the file identifier
+    groups: pd.Dataframe
+        the cluster_id and app_instance_id of the deleted rows
+    """
+    if not check_if_table_exists(table_name):
+        return
+    connection = get_con()
+    groups[["cluster_id", "app_instance_id"]].to_sql(
+        name="current_data", con=connection, if_exists="replace", index=False
+    )
+    connection.execute(
+        (
+            f"DELETE FROM {table_name} WHERE identifier = ? AND (cluster_id,"
+            " app_instance_id) IN (SELECT cluster_id, app_instance_id FROM"
+            " current_data)"
+        ),
+        (identifier,),
+    )
+    connection.commit()
+    drop_current_table()
+
+
+def set_open_blocks(df: pd.DataFrame, identifier: str) -> None:
+    """
+    Saves the open session blocks of an identifier,
+    replacing the previous open blocks of the same cluster_id and app_instance_id
+
+    Parameter
+    ---------
+    df: pd.Dataframe
+        the open session blocks
+    identifier: String
+        the file identifier
+    """
+    df = df.copy()
+    df["identifier"] = identifier
+    df_to_sql_upsert(df, "open_blocks", ["identifier", "cluster_id", "app_instance_id"])
+
+
+def get_rollup(
+    table_name: str, start=None, end=None, interval: str = None
+) -> pd.DataFrame:
+    """
+    Gets the rows of a rollup table for the sessions of a time interval,
+    like get_filtered_df_from_db for the sessions, sessions which end after the last day are left out
+
+    Parameter
+    ---------
+    table_name: String
+        the name of the rollup table, token_rollup or cas_histogram
+    start: date or String
+        the first day of the time interval, None for no limit
+    end: date or String
+        the last day of the time interval, None for no limit
+    interval: String
+        the interval of the rollup, one of computation.rollups.ROLLUP_INTERVALS, None if the table has one interval
+
+    Returns
+    -------
+    pd.Dataframe:
+        the rows of the rollup with the time in the format of the application
+    """
+    conditions = []
+    params = []
+    if interval is not None:
+        conditions.append("interval = ?")
+        params.append(interval)
+    if start is not None:
+        conditions.append("time >= ?")
+        params.append(schema.encode_day(start, end_of_day=False))
+    if end is not None:
+        conditions.append("time <= ? AND NOT (spill = 1 AND time >= ?)")
+        params.append(schema.encode_day(end, end_of_day=True))
+        params.append(schema.encode_day(end, end_of_day=False))
+
+    query = f"SELECT {', '.join(schema.TABLES[table_name])} FROM {table_name}"
+    if conditions:
+        query += " WHERE " + " AND ".join(conditions)
+    df = pd.read_sql_query(query + " ORDER BY id", get_con(), params=params)
+    return schema.decode(df, table_name)
+
+
+def get_token_rollup(interval: str, start=None, end=None) -> pd.DataFrame:
+    """
+    Gets the token rollup of an interval for the sessions of a time interval
+
+    Parameter
+    ---------
+    interval: String
+        the interval of the rollup, one of computation.rollups.ROLLUP_INTERVALS
+    start: date or String
+        the first day of the time interval, None for no limit
+    end: date or String
+        the last day of the time interval, None for no limit
+
+    Returns
+    -------
+    pd.Dataframe:
+        the rows of the rollup with the time in the format of the application
+    """
+    return get_rollup("token_rollup", start, end, interval)
+
+
+def select_rollup_days(df: pd.DataFrame, start=None, end=None) -> pd.DataFrame:
+    """
+    Selects the rows of a loaded rollup for the sessions of a time interval, like get_rollup selects them in the table
+
+    Parameter
+    ---------
+    df: pd.Dataframe
+        the rows of a rollup, as returned by get_rollup
+    start: date or String
+        the first day of the time interval, None for no limit
+    end: date or String
+        the last day of the time interval, None for no limit
+
+    Returns
+    -------
+    pd.Dataframe:
+        the rows of the time interval
+    """
+    # the times are strings in the format of the application, so they compare like the seconds in the table
+    selected = pd.Series(True, index=df.index)
+    if start is not None:
+        selected &= df["time"] >= str(start)[:10] + " 00:00:00"
+    if end is not None:
+        selected &= df["time"] <= str(end)[:10] + " 23:59:59"
+        selected &= ~((df["spill"] == 1) & (df["time"] >= str(end)[:10] + " 00:00:00"))
+    return df[selected].reset_index(drop=True)
+
+
+def set_rollup(
+    table_name: str, df: pd.DataFrame, identifier: str, first_day, last_day
+) -> None:
+    """
+    Saves a rollup of an identifier for the sessions which start between two days,
+    replacing the previous rollup of these days
+
+    Parameter
+    ---------
+    table_name: String
+        the name of the rollup table, token_rollup or cas_histogram
+    df: pd.Dataframe
+        the rollup
+    identifier: String
+        the file identifier
+    first_day: date or String
+        the first day (inclusive)
+    last_day: date or String
+        the last day (inclusive)
+    """
+    connection = get_con()
+    schema.create_table(connection, table_name)
+    connection.execute(
+        f"DELETE FROM {table_name} WHERE identifier = ? AND time BETWEEN ? AND ?",
+        (
+            identifier,
+            schema.encode_day(first_day, end_of_day=False),
+            schema.encode_day(last_day, end_of_day=True),
+        ),
+    )
+    connection.commit()
+    df = df.copy()
+    df["identifier"] = identifier
+    df_to_sql_append(df, table_name)
+
+
+def get_sketches(
+    kind: str, identifiers: list = None, start=None, end=None
+) -> pd.DataFrame:
+    """
+    Gets the distinct value sketches of a kind for the days of a time interval
+
+    Parameter
+    ---------
+    kind: String
+        the kind of the sketches, app_instances or resources
+    identifiers: list of String
+        the wanted file identifiers, None for all
+    start: date or String
+        the first day of the time interval, None for no limit
+    end: date or String
+        the last day of the time interval, None for no limit
+
+    Returns
+    -------
+    pd.Dataframe:
+        the columns identifier, name, day and registers, empty if no sketches were saved
+    """
+    connection = get_con()
+    schema.create_table(connection, "sketches")
+    conditions = ["kind = ?"]
+    params = [kind]
+    if identifiers is not None:
+        conditions.append(f"identifier IN ({', '.join('?' * len(identifiers))})")
+        params.extend(identifiers)
+    if start is not None:
+        conditions.append("day >= ?")
+        params.append(schema.encode_day(start, end_of_day=False))
+    if end is not None:
+        conditions.append("day <= ?")
+        params.append(schema.encode_day(end, end_of_day=True))
+
+    df = pd.read_sql_query(
+        "SELECT identifier, name, day, registers FROM sketches WHERE "
+        + " AND ".join(conditions),
+        connection,
+        params=params,
+    )
+    return schema.decode(df, "sketches")
+
+
+def get_generation() -> int:
+    """
+    Returns
+    -------
+    int:
+        the generation of the data, it changes whenever data is uploaded or deleted
+    """
+    if not check_if_table_exists("metadata"):
+        return 0
+    row = (
+        get_con()
+        .execute("SELECT value FROM metadata WHERE key = 'generation'")
+        .fetchone()
+    )
+    return row[0] if row else 0
+
+
+def bump_generation() -> None:
+    """
+    Increments the generation of the data,
+    results computed from older generations are outdated
+    """
+    connection = get_con()
+    schema.create_table(connection, "metadata")
+    connection.execute(
+        "INSERT INTO metadata (key, value) VALUES ('generation', 1)"
+        " ON CONFLICT(key) DO UPDATE SET value = value + 1"
+    )
+    connection.commit()
+
+
+def append_license(df: pd.DataFrame) -> None:
+    """
+    Appends license rows to the license table
+    and adds them to the number of cache generations per identifier and feature_name
+
+    Parameters
+    ----------
+    df: pd.Dataframe
+        the license rows with their identifier
+    """
+    connection = get_con()
+    schema.create_table(connection, "license")
+    last_id = connection.execute("SELECT COALESCE(MAX(id), 0) FROM license").fetchone()[
+        0
+    ]
+    df_to_sql_append(df, "license")
+    schema.update_license_counts(connection, last_id)
+
+
+def get_license_counts() -> pd.DataFrame:
+    """
+    Gets the number of cache generations per identifier and feature_name of the license table,
+    a resource_id is counted once per identifier for the feature_name of its first row
+
+    The counts are kept up to date by append_license, so reading them doesn't depend on the number of license rows
+
+    Returns
+    -------
+    pd.Dataframe:
+        the columns feature_name, identifier and resources, every feature_name has at least one row (with the
+        identifier None if none of its rows is the first of a resource_id), sorted by the first row of the
+        feature_name
+    """
+    connection = get_con()
+    schema.create_table(connection, "license_features")
+    schema.create_table(connection, "license_counts")
+    query = """
+        SELECT license_features.feature_name, license_counts.identifier,
+            COALESCE(license_counts.resources, 0) AS resources
+        FROM license_features
+        LEFT JOIN license_counts ON license_counts.feature_name = license_features.id
+        ORDER BY license_features.id, license_counts.identifier
+    """
+    return pd.read_sql_query(query, connection)
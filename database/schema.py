@@ -0,0 +1,596 @@
+"""
+This is schema.py.
+
+schema.py contains the explicit schema of the tables which are written by the upload.
+Timestamps are stored as integer seconds since epoch (UTC) and converted back into the
+string format of the application when they are read.
+"""
+
+from sqlite3 import Connection
+
+import numpy as np
+import pandas as pd
+
+# Version of the schema, saved in the user_version of the database
+SCHEMA_VERSION = 5
+
+# String formats of the timestamp columns
+SESSION_TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+PING_TIME_FORMAT = "%Y-%m-%dT%H:%M:%SZ"
+
+# Columns of the tables, without the primary key column id
+TABLES = {
+    "session": {
+        "identifier": "TEXT NOT NULL",
+        "cluster_id": "TEXT",
+        "app_instance_id": "TEXT",
+        "feature_mask": "INTEGER",
+        "block_start": "INTEGER",
+        "block_end": "INTEGER",
+        "last_ping": "INTEGER",
+    },
+    "open_blocks": {
+        "identifier": "TEXT NOT NULL",
+        "cluster_id": "TEXT",
+        "app_instance_id": "TEXT",
+        "feature_mask": "INTEGER",
+        "block_start": "INTEGER",
+        "block_end": "INTEGER",
+        "last_ping": "INTEGER",
+    },
+    "pings": {
+        "identifier": "TEXT NOT NULL",
+        "cluster_id": "TEXT",
+        "app_instance_id": "TEXT",
+        "time": "INTEGER",
+        "feature_mask": "INTEGER",
+    },
+    "license": {
+        "identifier": "TEXT NOT NULL",
+        "grant_id": "TEXT",
+        "feature_name": "INTEGER",
+        "cluster_id": "TEXT",
+        "resource_id": "INTEGER",
+        "service_id": "TEXT",
+        "start_time": "INTEGER",
+        "end_time": "INTEGER",
+    },
+    "cluster_ids": {
+        "identifier": "TEXT NOT NULL",
+        "cluster_id": "TEXT",
+    },
+    "token_rollup": {
+        "identifier": "TEXT NOT NULL",
+        "cluster_id": "TEXT",
+        "interval": "TEXT",
+        "time": "INTEGER",
+        "spill": "INTEGER",
+        "feature": "TEXT",
+        "sessions": "INTEGER",
+    },
+    "cas_histogram": {
+        "identifier": "TEXT NOT NULL",
+        "cluster_id": "TEXT",
+        "time": "INTEGER",
+        "spill": "INTEGER",
+        "sessions": "INTEGER",
+    },
+    "metadata": {
+        "key": "TEXT NOT NULL",
+        "value": "INTEGER",
+    },
+    "license_features": {
+        "feature_name": "TEXT NOT NULL",
+    },
+    "license_resources": {
+        "resource_id": "TEXT NOT NULL",
+    },
+    "license_first_resources": {
+        "identifier": "TEXT NOT NULL",
+        "resource_id": "INTEGER",
+        "feature_name": "INTEGER",
+    },
+    "license_counts": {
+        "identifier": "TEXT NOT NULL",
+        "feature_name": "INTEGER",
+        "resources": "INTEGER",
+    },
+    "sketches": {
+        "identifier": "TEXT NOT NULL",
+        "kind": "TEXT NOT NULL",
+        "name": "TEXT",
+        "day": "INTEGER",
+        "registers": "BLOB",
+    },
+}
+
+# Dictionary-encoded columns: table -> {column: dictionary table},
+# the column holds the id of the value in the column of the same name of the dictionary table
+DICTIONARIES = {
+    "license": {
+        "feature_name": "license_features",
+        "resource_id": "license_resources",
+    },
+}
+
+# Indexes of the tables: name -> (table, columns)
+INDEXES = {
+    "session_identifier_cluster_start": (
+        "session",
+        ["identifier", "cluster_id", "block_start"],
+    ),
+    "session_start": ("session", ["block_start"]),
+    "pings_time": ("pings", ["time"]),
+    "license_identifier_feature": ("license", ["identifier", "feature_name"]),
+    "cluster_ids_identifier": ("cluster_ids", ["identifier"]),
+    "token_rollup_interval_time": ("token_rollup", ["interval", "time"]),
+    "token_rollup_identifier_time": ("token_rollup", ["identifier", "time"]),
+    "cas_histogram_time": ("cas_histogram", ["time"]),
+    "cas_histogram_identifier_time": ("cas_histogram", ["identifier", "time"]),
+    "sketches_kind_day": ("sketches", ["kind", "day"]),
+}
+
+# Indexes of older versions which are replaced by the unique keys
+DROPPED_INDEXES = [
+    "open_blocks_identifier_group",
+    "pings_identifier_time",
+    "license_identifier_resource",
+]
+
+# Unique keys of the tables: table -> (columns, resolution of a conflict while inserting),
+# REPLACE keeps the new row, IGNORE keeps the existing row
+UNIQUE_KEYS = {
+    "session": (
+        ["identifier", "cluster_id", "app_instance_id", "block_start"],
+        "REPLACE",
+    ),
+    "open_blocks": (["identifier", "cluster_id", "app_instance_id"], "REPLACE"),
+    "pings": (
+        ["identifier", "time", "cluster_id", "app_instance_id", "feature_mask"],
+        "IGNORE",
+    ),
+    "cluster_ids": (["identifier", "cluster_id"], "IGNORE"),
+    "metadata": (["key"], "REPLACE"),
+    "license_features": (["feature_name"], "IGNORE"),
+    "license_resources": (["resource_id"], "IGNORE"),
+    "license_first_resources": (["identifier", "resource_id"], "IGNORE"),
+    "license_counts": (["identifier", "feature_name"], "REPLACE"),
+    "sketches": (["identifier", "kind", "name", "day"], "REPLACE"),
+}
+
+# Timestamp columns of the tables and their string format in the application
+TIME_COLUMNS = {
+    "session": {
+        "block_start": SESSION_TIME_FORMAT,
+        "block_end": SESSION_TIME_FORMAT,
+        "last_ping": SESSION_TIME_FORMAT,
+    },
+    "open_blocks": {
+        "block_start": SESSION_TIME_FORMAT,
+        "block_end": SESSION_TIME_FORMAT,
+        "last_ping": SESSION_TIME_FORMAT,
+    },
+    "pings": {"time": PING_TIME_FORMAT},
+    "license": {"start_time": PING_TIME_FORMAT, "end_time": PING_TIME_FORMAT},
+    "cluster_ids": {},
+    "token_rollup": {"time": SESSION_TIME_FORMAT},
+    "cas_histogram": {"time": SESSION_TIME_FORMAT},
+    "metadata": {},
+    "license_features": {},
+    "license_resources": {},
+    "license_first_resources": {},
+    "license_counts": {},
+    "sketches": {"day": SESSION_TIME_FORMAT},
+}
+
+# Columns with the start and the end of the time span of a row
+RANGE_COLUMNS = {
+    "session": ("block_start", "block_end"),
+    "open_blocks": ("block_start", "block_end"),
+    "pings": ("time", "time"),
+    "license": ("start_time", "end_time"),
+}
+
+
+def create_table(con: Connection, name: str, commit: bool = True) -> None:
+    """
+    Creates a table of the schema and its indexes if they don't exist
+
+    Parameters
+    ----------
+    con: Connection
+        the connection to the database
+    name: str
+        the name of the table
+    commit: bool
+        False to leave the changes in the open transaction
+    """
+    columns = ", ".join(f"{col} {col_type}" for col, col_type in TABLES[name].items())
+    con.execute(
+        f"CREATE TABLE IF NOT EXISTS {name} (id INTEGER PRIMARY KEY, {columns})"
+    )
+    for index_name, (table, index_columns) in INDEXES.items():
+        if table == name:
+            con.execute(
+                f"CREATE INDEX IF NOT EXISTS {index_name} ON {table}"
+                f" ({', '.join(index_columns)})"
+            )
+    if name in UNIQUE_KEYS:
+        con.execute(
+            f"CREATE UNIQUE INDEX IF NOT EXISTS {name}_unique ON {name}"
+            f" ({', '.join(UNIQUE_KEYS[name][0])})"
+        )
+    if commit:
+        con.commit()
+
+
+def insert_rows(table, con, keys: list, data_iter) -> None:
+    """
+    Inserts rows into a table of the schema,
+    used as method of DataFrame.to_sql
+
+    A row with the same unique key as an existing row is resolved as specified in UNIQUE_KEYS,
+    so the costs of an insert only depend on the number of inserted rows
+
+    Parameters
+    ----------
+    table: pandas.io.sql.SQLiteTable
+        the table in pandas
+    con: Cursor
+        the cursor of the connection to the database
+    keys: list of str
+        the names of the columns
+    data_iter: iterable of tuple
+        the values of the rows
+    """
+    con.executemany(get_insert_statement(table.name, keys), data_iter)
+
+
+def get_insert_statement(name: str, keys: list) -> str:
+    """
+    Parameters
+    ----------
+    name: str
+        the name of the table
+    keys: list of str
+        the names of the columns
+
+    Returns
+    -------
+    str:
+        the statement which inserts a row into the table, resolving conflicts as specified in UNIQUE_KEYS
+    """
+    resolution = ""
+    if name in UNIQUE_KEYS:
+        resolution = " OR " + UNIQUE_KEYS[name][1]
+    return (
+        f"INSERT{resolution} INTO {name} ({', '.join(keys)})"
+        f" VALUES ({', '.join('?' * len(keys))})"
+    )
+
+
+def remove_duplicates(
+    con: Connection, name: str, columns: list, keep_last: bool, commit: bool = True
+):
+    """
+    Deletes all but one row of every group of rows with the same values in the columns
+
+    Parameters
+    ----------
+    con: Connection
+        the connection to the database
+    name: str
+        the name of the table
+    columns: list of str
+        the columns which identify a row
+    keep_last: bool
+        True if the last written row of a group should be kept, False for the first one
+    commit: bool
+        False to leave the changes in the open transaction
+    """
+    aggregate = "MAX" if keep_last else "MIN"
+    con.execute(
+        f"DELETE FROM {name} WHERE id NOT IN"
+        f" (SELECT {aggregate}(id) FROM {name} GROUP BY {', '.join(columns)})"
+    )
+    if commit:
+        con.commit()
+
+
+def encode(df: pd.DataFrame, name: str) -> pd.DataFrame:
+    """
+    Converts the timestamp columns of a dataframe into seconds since epoch
+
+    Parameters
+    ----------
+    df: pd.Dataframe
+        the data in the format of the application
+    name: str
+        the name of the table
+
+    Returns
+    -------
+    pd.Dataframe:
+        the data in the format of the table
+    """
+    df = df.copy()
+    for column in TIME_COLUMNS[name]:
+        if column in df.columns:
+            time = pd.to_datetime(df[column], utc=True)
+            df[column] = (time.astype("int64") // 10**9).where(time.notna())
+    return df
+
+
+def encode_dictionaries(
+    con: Connection, df: pd.DataFrame, name: str, commit: bool = True
+) -> pd.DataFrame:
+    """
+    Replaces the values of the dictionary-encoded columns of a dataframe by their ids,
+    values which are not in the dictionaries yet are added in the order of their first row
+
+    Parameters
+    ----------
+    con: Connection
+        the connection to the database
+    df: pd.Dataframe
+        the data with the values of the columns
+    name: str
+        the name of the table
+    commit: bool
+        False to leave the added values in the open transaction
+
+    Returns
+    -------
+    pd.Dataframe:
+        the data with the ids of the values, missing values stay missing
+    """
+    df = df.copy()
+    con.execute("CREATE TEMP TABLE IF NOT EXISTS dictionary_values (value TEXT)")
+    for column, dictionary in DICTIONARIES.get(name, {}).items():
+        if column not in df.columns:
+            continue
+        create_table(con, dictionary, commit)
+        values = df[column].where(df[column].isna(), df[column].astype(str))
+        unique = [(value,) for value in pd.unique(values.dropna())]
+        con.executemany(
+            f"INSERT OR IGNORE INTO {dictionary} ({column}) VALUES (?)", unique
+        )
+        con.execute("DELETE FROM dictionary_values")
+        con.executemany("INSERT INTO dictionary_values (value) VALUES (?)", unique)
+        ids = dict(
+            con.execute(
+                f"SELECT {dictionary}.{column}, {dictionary}.id FROM dictionary_values"
+                f" JOIN {dictionary} ON {dictionary}.{column} = dictionary_values.value"
+            ).fetchall()
+        )
+        df[column] = values.map(ids).astype("Int64")
+    if commit:
+        con.commit()
+    return df
+
+
+def update_license_counts(
+    con: Connection, last_id: int = 0, commit: bool = True
+) -> None:
+    """
+    Adds the license rows after last_id to the number of cache generations per identifier and feature_name
+
+    A resource_id is counted once per identifier, for the feature_name of its first row,
+    so the costs only depend on the number of new rows
+
+    Parameters
+    ----------
+    con: Connection
+        the connection to the database
+    last_id: int
+        the largest id of the license rows which are already counted
+    commit: bool
+        False to leave the changes in the open transaction
+    """
+    create_table(con, "license_first_resources", commit)
+    create_table(con, "license_counts", commit)
+    first_id = con.execute(
+        "SELECT COALESCE(MAX(id), 0) FROM license_first_resources"
+    ).fetchone()[0]
+    con.execute(
+        (
+            "INSERT OR IGNORE INTO license_first_resources (identifier, resource_id,"
+            " feature_name) SELECT identifier, resource_id, feature_name FROM license"
+            " WHERE id > ? AND resource_id IS NOT NULL ORDER BY id"
+        ),
+        (last_id,),
+    )
+    con.execute(
+        (
+            "INSERT INTO license_counts (identifier, feature_name, resources) SELECT"
+            " identifier, feature_name, COUNT(*) FROM license_first_resources WHERE id"
+            " > ? AND feature_name IS NOT NULL GROUP BY identifier, feature_name ON"
+            " CONFLICT (identifier, feature_name) DO UPDATE SET resources = resources +"
+            " excluded.resources"
+        ),
+        (first_id,),
+    )
+    if commit:
+        con.commit()
+
+
+def encode_day(day, end_of_day: bool) -> int:
+    """
+    Converts a day into seconds since epoch
+
+    Parameters
+    ----------
+    day: date or str
+        the day, only the first ten characters (YYYY-mm-dd) of its string representation are used
+    end_of_day: bool
+        True for the last second of the day (23:59:59), False for the first one (00:00:00)
+
+    Returns
+    -------
+    int:
+        seconds since epoch
+    """
+    time = " 23:59:59" if end_of_day else " 00:00:00"
+    return int(pd.Timestamp(str(day)[:10] + time, tz="UTC").timestamp())
+
+
+def decode(df: pd.DataFrame, name: str) -> pd.DataFrame:
+    """
+    Converts the timestamp columns of a dataframe from seconds since epoch into strings
+
+    Parameters
+    ----------
+    df: pd.Dataframe
+        the data in the format of the table
+    name: str
+        the name of the table
+
+    Returns
+    -------
+    pd.Dataframe:
+        the data in the format of the application
+    """
+    for column, time_format in TIME_COLUMNS[name].items():
+        if column in df.columns:
+            df[column] = format_epoch(df[column], time_format)
+    return df
+
+
+def format_epoch(seconds: pd.Series, time_format: str) -> pd.Series:
+    """
+    Formats seconds since epoch as SESSION_TIME_FORMAT or PING_TIME_FORMAT
+
+    np.datetime_as_string is much faster than strftime, the results only differ in
+    the separator between date and time and the suffix
+
+    Parameters
+    ----------
+    seconds: pd.Series
+        seconds since epoch, may contain missing values
+    time_format: str
+        either SESSION_TIME_FORMAT or PING_TIME_FORMAT
+
+    Returns
+    -------
+    pd.Series:
+        the formatted timestamps, None for missing values
+    """
+    valid = seconds.notna().to_numpy()
+    values = seconds.to_numpy()[valid].astype("int64").astype("datetime64[s]")
+    # one row of characters per timestamp: YYYY-mm-ddTHH:MM:SS
+    strings = np.datetime_as_string(values, unit="s").astype("U19")
+    chars = strings.view("U1").reshape(-1, 19)
+    if time_format == SESSION_TIME_FORMAT:
+        chars[:, 10] = " "
+    else:
+        chars = np.concatenate([chars, np.full((len(chars), 1), "Z")], axis=1)
+    strings = np.full(len(seconds), None, dtype=object)
+    strings[valid] = chars.copy().view(f"U{chars.shape[1]}").ravel()
+    return pd.Series(strings, index=seconds.index)
+
+
+def migrate(con: Connection) -> None:
+    """
+    Converts the tables of a database created before the schema existed
+    and updates the indexes of the tables of older schema versions,
+    duplicates of the unique keys are removed before the unique indexes are created,
+    the dictionary-encoded columns of older versions are encoded
+
+    The old tables were created by DataFrame.to_sql and contain the timestamps as strings.
+    They are copied chunk by chunk into tables of the schema.
+
+    All steps run in one transaction which holds the write lock of the database, so connections of other threads
+    and processes wait for the migration instead of starting it a second time, and a failed migration leaves the
+    database unchanged.
+
+    Parameters
+    ----------
+    con: Connection
+        the connection to the database
+    """
+    if get_version(con) >= SCHEMA_VERSION:
+        return
+
+    con.execute("BEGIN IMMEDIATE")
+    try:
+        # another connection may have migrated the database while this one waited for the lock
+        if get_version(con) < SCHEMA_VERSION:
+            migrate_tables(con)
+            con.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        con.commit()
+    except BaseException:
+        con.rollback()
+        raise
+
+
+def get_version(con: Connection) -> int:
+    """
+    Parameters
+    ----------
+    con: Connection
+        the connection to the database
+
+    Returns
+    -------
+    int:
+        the schema version of the database, 0 for a database created before the schema existed
+    """
+    return con.execute("PRAGMA user_version").fetchone()[0]
+
+
+def migrate_tables(con: Connection) -> None:
+    """
+    Runs the steps of migrate in the open transaction of the connection
+
+    Parameters
+    ----------
+    con: Connection
+        the connection to the database
+    """
+    for index_name in DROPPED_INDEXES:
+        con.execute(f"DROP INDEX IF EXISTS {index_name}")
+
+    for name in TABLES:
+        types = {
+            row[1]: row[2]
+            for row in con.execute(f"PRAGMA table_info({name})").fetchall()
+        }
+        columns = list(types)
+        if not columns:
+            continue
+        # tables of older versions store the values of the dictionary-encoded columns
+        encoded = "id" in columns and all(
+            types.get(column) != "TEXT" for column in DICTIONARIES.get(name, {})
+        )
+        if encoded:
+            # add the indexes of newer versions
+            if name in UNIQUE_KEYS:
+                key, resolution = UNIQUE_KEYS[name]
+                remove_duplicates(con, name, key, resolution == "REPLACE", False)
+            create_table(con, name, False)
+            continue
+        con.execute(f"ALTER TABLE {name} RENAME TO legacy_{name}")
+        create_table(con, name, False)
+        used_columns = [col for col in columns if col in TABLES[name]]
+        for chunk in pd.read_sql_query(
+            f"SELECT {', '.join(used_columns)} FROM legacy_{name}"
+            + (" ORDER BY id" if "id" in columns else ""),
+            con,
+            chunksize=100_000,
+        ):
+            # only the tables created before the schema existed contain timestamps as strings
+            if "id" not in columns:
+                chunk = encode(chunk, name)
+            chunk = encode_dictionaries(con, chunk, name, False)
+            # DataFrame.to_sql would commit the transaction
+            con.executemany(
+                get_insert_statement(name, list(chunk.columns)),
+                chunk.astype(object)
+                .where(chunk.notna(), None)
+                .itertuples(index=False, name=None),
+            )
+        con.execute(f"DROP TABLE legacy_{name}")
+        # the indexes of older versions were renamed with the table
+        create_table(con, name, False)
+        if name == "license":
+            update_license_counts(con, commit=False)
@@ -0,0 +1,21 @@
+from functools import partial
+
+import pytest
+
+import computation.file_imports as file_imports
+import database.columnar as columnar
+import database.driver as driver
+from dash_app import upload
+
+
+@pytest.fixture
+def database(tmp_path, monkeypatch):
+    """An empty database, the csv files are read in chunks of 1000 lines."""
+    monkeypatch.setattr(driver, "PATH", str(tmp_path / "data_table.db"))
+    monkeypatch.setattr(columnar, "ROOT", str(tmp_path / "columnar"))
+    monkeypatch.setattr(upload, "UPLOAD_CACHE_PATH", str(tmp_path))
+    monkeypatch.setattr(
+        upload, "stream_csv", partial(file_imports.stream_csv, chunksize=1000)
+    )
+    yield tmp_path
+    driver.close_con()
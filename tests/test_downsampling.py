@@ -0,0 +1,27 @@
+"""
+Tests of the downsampling of time series: naive and time zone aware times have to keep the same points.
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from vis.downsampling import downsample
+
+
+@pytest.mark.parametrize("method", ["minmax", "lttb"])
+def test_time_zone_aware_times(method):
+    rng = np.random.default_rng(0)
+    naive = pd.DataFrame(
+        {
+            "time": pd.date_range("2022-10-01", periods=5000, freq="15min"),
+            "total": rng.random(5000),
+        }
+    )
+    aware = naive.assign(time=naive["time"].dt.tz_localize("UTC"))
+
+    expected = downsample(naive, "time", ["total"], method=method, budget=500)
+    result = downsample(aware, "time", ["total"], method=method, budget=500)
+    assert len(expected.index) <= 500
+    pd.testing.assert_frame_equal(
+        result, expected.assign(time=expected["time"].dt.tz_localize("UTC"))
+    )
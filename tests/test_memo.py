@@ -0,0 +1,41 @@
+"""
+Tests of the result cache: a cached object which stores computed data later is measured again, so the cache stays
+within its memory cap.
+"""
+import pandas as pd
+
+import computation.memo as memo
+from computation.memo import ResultCache, get_size, memoize
+
+
+class Lazy:
+    """An object which stores a computed column like DataSessions."""
+
+    def __init__(self, cache_key: tuple):
+        self.cache_key = cache_key
+        self.data = pd.DataFrame({"value": range(1000)})
+        self.computed = None
+
+    @memoize
+    def get_total(self):
+        if self.computed is None:
+            self.computed = self.data.assign(double=self.data["value"] * 2)
+        return self.computed["double"].sum()
+
+
+def test_cached_object_is_measured_again(monkeypatch):
+    cache = ResultCache()
+    monkeypatch.setattr(memo, "RESULTS", cache)
+    first = cache.get(("lazy", 1), lambda: Lazy((1, "first")), 1)
+    size = cache.size
+
+    assert first.get_total() == 999000
+    assert cache.entries[("lazy", 1)][1] == get_size(first) > size
+    assert cache.size == sum(entry[1] for entry in cache.entries.values())
+
+    # a second object which stores its column exceeds the cap, the least recently used entry is evicted
+    cache.max_bytes = cache.size + size
+    second = cache.get(("lazy", 2), lambda: Lazy((1, "second")), 1)
+    second.get_total()
+    assert ("lazy", 1) not in cache.entries
+    assert cache.size <= cache.max_bytes
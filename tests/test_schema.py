@@ -0,0 +1,146 @@
+"""
+Tests of the migration of databases created before the schema existed: their tables were written by DataFrame.to_sql
+with the timestamps as strings, the first connection has to convert them into the tables of the schema.
+"""
+import sqlite3
+
+import pandas as pd
+
+import database.driver as driver
+import database.schema as schema
+from computation.data import LicenseUsage
+
+SESSIONS = pd.DataFrame(
+    {
+        "cluster_id": ["c1", "c1", "c2", "c1"],
+        "app_instance_id": ["a1", "a2", "a1", "a1"],
+        "feature_mask": [1, 3, 2, 5],
+        "block_start": [
+            "2022-10-01 10:00:00",
+            "2022-10-01 11:00:00",
+            "2022-10-02 09:30:00",
+            "2022-10-01 10:00:00",
+        ],
+        "block_end": [
+            "2022-10-01 10:05:00",
+            "2022-10-01 11:10:00",
+            "2022-10-02 09:35:00",
+            "2022-10-01 10:10:00",
+        ],
+        "last_ping": [
+            "2022-10-01 10:00:00",
+            "2022-10-01 11:05:00",
+            "2022-10-02 09:30:00",
+            "2022-10-01 10:05:00",
+        ],
+        "identifier": "rep",
+    }
+)
+
+PINGS = pd.DataFrame(
+    {
+        "cluster_id": ["c1", "c1", "c2", "c1"],
+        "app_instance_id": ["a1", "a2", "a1", "a1"],
+        "time": [
+            "2022-10-01T10:00:00Z",
+            "2022-10-01T11:05:00Z",
+            "2022-10-02T09:30:00Z",
+            "2022-10-01T10:00:00Z",
+        ],
+        "feature_mask": [1, 3, 2, 1],
+        # columns which aren't part of the schema are dropped
+        "product": ["x", "y", "z", "x"],
+        "identifier": "rep",
+    }
+)
+
+LICENSE = pd.DataFrame(
+    {
+        "grant_id": ["g1", "g1", "g2", "g2"],
+        "feature_name": ["path/A", "path/B", "path/A", "path/A"],
+        "cluster_id": ["c1", "c1", "c2", "c2"],
+        "resource_id": ["r1", "r1", "r2", "r3"],
+        "service_id": ["s1", "s1", "s2", "s2"],
+        "start_time": [
+            "2022-10-01T10:00:00Z",
+            "2022-10-01T10:30:00Z",
+            "2022-10-02T08:00:00Z",
+            "2022-10-03T08:00:00Z",
+        ],
+        "end_time": [
+            "2022-10-01T10:10:00Z",
+            "2022-10-01T10:40:00Z",
+            "2022-10-02T08:10:00Z",
+            "2022-10-03T08:10:00Z",
+        ],
+        "identifier": "lic",
+    }
+)
+
+
+def create_baseline_database(path: str) -> None:
+    """Write the tables like the uploads of the versions before the schema."""
+    con = sqlite3.connect(path)
+    SESSIONS.to_sql("session", con, index=False)
+    PINGS.to_sql("pings", con, index=False)
+    LICENSE.to_sql("license", con, index=False)
+    pd.DataFrame({"cluster_id": ["c1", "c2"], "identifier": "rep"}).to_sql(
+        "cluster_ids", con, index=False
+    )
+    con.close()
+
+
+def test_migration_of_baseline_database(database):
+    create_baseline_database(driver.PATH)
+
+    con = driver.get_con()
+    assert schema.get_version(con) == schema.SCHEMA_VERSION
+    assert not [
+        row
+        for row in con.execute("SELECT name FROM sqlite_master").fetchall()
+        if row[0].startswith("legacy_")
+    ]
+
+    # the later of the two sessions with the same key is kept
+    sessions = driver.get_df_from_db("session")
+    expected = SESSIONS.iloc[[1, 2, 3]][list(schema.TABLES["session"])]
+    pd.testing.assert_frame_equal(
+        sessions.sort_values("block_start").reset_index(drop=True),
+        expected.sort_values("block_start").reset_index(drop=True),
+        check_dtype=False,
+    )
+    assert con.execute("SELECT typeof(block_start) FROM session").fetchone() == (
+        "integer",
+    )
+
+    # the first of the duplicated pings is kept
+    pings = driver.get_df_from_db("pings")
+    pd.testing.assert_frame_equal(
+        pings,
+        PINGS.iloc[:3][list(schema.TABLES["pings"])],
+        check_dtype=False,
+    )
+
+    # the license rows are dictionary-encoded and counted
+    license_data = driver.get_df_from_db("license")
+    pd.testing.assert_frame_equal(
+        license_data,
+        LICENSE[list(schema.TABLES["license"])],
+        check_dtype=False,
+    )
+    assert con.execute(
+        "SELECT typeof(feature_name), typeof(resource_id) FROM license"
+    ).fetchone() == ("integer", "integer")
+    counts = driver.get_license_counts()
+    expected_counts = LicenseUsage(license_data).get_license_counts()
+    pd.testing.assert_frame_equal(
+        counts.sort_values("feature_name").reset_index(drop=True),
+        expected_counts.sort_values("feature_name").reset_index(drop=True),
+        check_dtype=False,
+    )
+
+    # a second connection finds the migrated database
+    driver.close_con()
+    con = driver.get_con()
+    assert schema.get_version(con) == schema.SCHEMA_VERSION
+    pd.testing.assert_frame_equal(driver.get_df_from_db("session"), sessions)
@@ -0,0 +1,31 @@
+"""
+Tests of DataSessions loaded with the rollups of the database: their results have to match the results computed
+from the sessions.
+"""
+import pandas as pd
+from test_upload import get_pings, upload_pings
+
+from dash_app import background
+
+
+def load_sessions(first_date: str, last_date: str, rollups: bool):
+    sessions = background.load_sessions("rep", ["rep"], None, first_date, last_date)
+    assert sessions.token_rollup is not None and sessions.cas_histogram is not None
+    if not rollups:
+        sessions.token_rollup = None
+        sessions.cas_histogram = None
+    return sessions
+
+
+def test_crop_data(database):
+    upload_pings(database, get_pings(3000, "2022-10-01", 3, seed=0), "a.csv", "rep")
+
+    cropped = load_sessions("2022-10-01", "2022-10-03", rollups=True)
+    cropped.crop_data("2022-10-02", "2022-10-02")
+    expected = load_sessions("2022-10-01", "2022-10-03", rollups=False)
+    expected.crop_data("2022-10-02", "2022-10-02")
+
+    for method in ["get_token_consumption", "get_cas"]:
+        pd.testing.assert_frame_equal(
+            getattr(cropped, method)("H"), getattr(expected, method)("H")
+        )
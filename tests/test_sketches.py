@@ -0,0 +1,134 @@
+"""
+Tests of the distinct values of the tables, which are estimated from the sketches saved at upload: the exact
+number of distinct values has to lie within the bounds of the estimate.
+"""
+import numpy as np
+import pandas as pd
+
+import database.driver as driver
+from computation.data import LicenseUsage
+from computation.sketches import get_sketches
+from dash_app import background, upload
+from vis.additional_data_vis import get_license_usage_table
+
+
+def get_pings(rows: int, seed: int) -> pd.DataFrame:
+    """Return pings of many app instances of few cluster ids on three days."""
+    rng = np.random.default_rng(seed)
+    seconds = rng.integers(0, 3 * 86400, rows)
+    return pd.DataFrame(
+        {
+            "cluster_id": "c" + pd.Series(rng.integers(0, 3, rows)).astype(str),
+            "app_instance_id": "a"
+            + pd.Series(rng.integers(0, 20000, rows)).astype(str),
+            "time": pd.Timestamp("2022-10-01") + pd.to_timedelta(seconds, unit="s"),
+        }
+    )
+
+
+def save_pings(pings: pd.DataFrame, ident: str) -> None:
+    """Save the sketches of pings in two chunks like an upload."""
+    for chunk in np.array_split(pings, 2):
+        upload.save_sketches(
+            "app_instances",
+            ident,
+            [get_sketches(chunk, "cluster_id", "app_instance_id", "time")],
+        )
+
+
+def assert_within_bounds(distinct: pd.DataFrame, exact: pd.Series) -> None:
+    distinct = distinct.set_index("name")
+    assert list(distinct.index) == list(exact.index)
+    assert (distinct["lower"] <= exact).all()
+    assert (exact <= distinct["upper"]).all()
+
+
+def test_app_instances_of_identifiers_and_days(database):
+    first, second = get_pings(40000, seed=0), get_pings(40000, seed=1)
+    save_pings(first, "first")
+    save_pings(second, "second")
+
+    for identifiers, pings in [
+        (["first"], first),
+        (None, pd.concat([first, second])),
+    ]:
+        pings = pings[pings["time"] < pd.Timestamp("2022-10-03")]
+        exact = pings.groupby("cluster_id")["app_instance_id"].nunique()
+        exact["total"] = pings["app_instance_id"].nunique()
+        assert_within_bounds(
+            background.get_distinct_values(
+                "app_instances", identifiers, "2022-10-01", "2022-10-02"
+            ),
+            exact,
+        )
+
+
+def test_license_table_of_distinct_resources(database):
+    rng = np.random.default_rng(2)
+    rows = pd.DataFrame(
+        {
+            "identifier": rng.choice(["lic1", "lic2"], 6000),
+            "feature_name": "path/"
+            + pd.Series(rng.choice(["A", "B", "C"], 6000)).astype(str),
+            "resource_id": "r" + pd.Series(rng.integers(0, 3000, 6000)).astype(str),
+            "start_time": pd.Timestamp("2022-10-01")
+            + pd.to_timedelta(rng.integers(0, 86400, 6000), unit="s"),
+        }
+    )
+    for ident, data in rows.groupby("identifier"):
+        upload.save_sketches(
+            "resources",
+            ident,
+            [get_sketches(data, "feature_name", "resource_id", "start_time")],
+        )
+
+    distinct = background.get_distinct_values("resources", ["lic1", "lic2"])
+    exact = rows.groupby(rows["feature_name"].str[5:])["resource_id"].nunique()
+    exact["total"] = rows["resource_id"].nunique()
+    assert_within_bounds(distinct, exact)
+
+    table = get_license_usage_table(
+        LicenseUsage(rows), ["lic1", "lic2"], distinct
+    ).set_index("Loader")
+    counts = distinct.set_index("name")
+    assert table.loc["A", "Distinct Resources"] == "{:,} ({:,} - {:,})".format(
+        *counts.loc["A", ["distinct", "lower", "upper"]]
+    ).replace(",", " ")
+    assert table.loc["Total", "Distinct Resources"].startswith(
+        f"{counts.loc['total', 'distinct']:,}".replace(",", " ")
+    )
+
+
+def test_backfill_of_license_rows(database):
+    rng = np.random.default_rng(3)
+    rows = pd.DataFrame(
+        {
+            "identifier": "lic",
+            "grant_id": "g",
+            "feature_name": "path/"
+            + pd.Series(rng.choice(["A", "B"], 3000)).astype(str),
+            "cluster_id": "c",
+            "resource_id": pd.Series(rng.integers(0, 2000, 3000)).astype(str),
+            "service_id": "s",
+            "start_time": (
+                pd.Timestamp("2022-09-01")
+                + pd.to_timedelta(rng.integers(0, 70 * 86400, 3000), unit="s")
+            ).strftime("%Y-%m-%dT%H:%M:%SZ"),
+        }
+    )
+    rows["end_time"] = rows["start_time"]
+    driver.append_license(rows)
+    upload.save_sketches(
+        "resources",
+        "lic",
+        [get_sketches(rows, "feature_name", "resource_id", "start_time")],
+    )
+    uploaded = driver.get_sketches("resources")
+
+    driver.get_con().execute("DELETE FROM sketches")
+    upload.backfill_sketches()
+    backfilled = driver.get_sketches("resources")
+    pd.testing.assert_frame_equal(
+        backfilled.sort_values(["name", "day"]).reset_index(drop=True),
+        uploaded.sort_values(["name", "day"]).reset_index(drop=True),
+    )
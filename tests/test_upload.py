@@ -0,0 +1,91 @@
+"""
+Tests of the session extraction of uploads, which continues the session blocks from chunk to chunk and from upload
+to upload: the saved sessions have to match an extraction of all pings at once.
+"""
+import os
+
+import numpy as np
+import pandas as pd
+
+import database.driver as driver
+from computation.data import DataPings
+from computation.features import FEATURE_BITMASKS, Features
+from computation.session_blocks import extract_session_blocks
+from dash_app import upload
+
+COLUMNS = ["cluster_id", "app_instance_id", "feature_mask", "block_start", "last_ping"]
+
+
+def get_pings(rows: int, start: str, days: int, seed: int) -> pd.DataFrame:
+    """Return pings of few app instances in random order."""
+    rng = np.random.default_rng(seed)
+    seconds = rng.integers(0, days * 86400, rows)
+    return pd.DataFrame(
+        {
+            "cluster_id": "c" + pd.Series(rng.integers(0, 4, rows)).astype(str),
+            "app_instance_id": "a" + pd.Series(rng.integers(0, 12, rows)).astype(str),
+            "time": (pd.Timestamp(start) + pd.to_timedelta(seconds, unit="s")).strftime(
+                "%Y-%m-%dT%H:%M:%SZ"
+            ),
+            "feature_mask": rng.choice(list(FEATURE_BITMASKS.values()), rows),
+        }
+    )
+
+
+def upload_pings(directory, pings: pd.DataFrame, name: str, ident: str) -> tuple:
+    """Upload pings as csv file of an identifier, return the outputs of prepare_data."""
+    pings.to_csv(os.path.join(directory, name), index=False)
+    identifiers = pd.DataFrame({"FileIdentifier": [ident], "Type": ["unknown"]})
+    if driver.check_if_table_exists("identifier"):
+        identifiers = pd.concat(
+            [driver.get_df_from_db("identifier"), identifiers], ignore_index=True
+        ).drop_duplicates(subset=["FileIdentifier"])
+    driver.df_to_sql_replace(identifiers, "identifier")
+    return upload.prepare_data(
+        lambda progress: None, upload.decode_report(name, ident), ident, -1, [ident]
+    )
+
+
+def get_expected_sessions(pings: pd.DataFrame) -> pd.DataFrame:
+    """Extract the sessions of all pings at once."""
+    data = DataPings("", pings, Features().get_data_features()).data
+    blocks = extract_session_blocks(data, 300)
+    for column in ["block_start", "last_ping"]:
+        blocks[column] = (
+            pd.to_datetime(blocks[column], utc=True).dt.tz_localize(None).astype(str)
+        )
+    return sort_sessions(blocks)
+
+
+def sort_sessions(sessions: pd.DataFrame) -> pd.DataFrame:
+    sessions = sessions[COLUMNS].astype({"feature_mask": "int64"})
+    return sessions.sort_values(COLUMNS[:4]).reset_index(drop=True)
+
+
+def test_unsorted_file_of_several_chunks(database):
+    pings = get_pings(5000, "2022-10-01", 2, seed=0)
+    upload_pings(database, pings, "unsorted.csv", "rep")
+
+    sessions = sort_sessions(driver.get_df_from_db("session"))
+    pd.testing.assert_frame_equal(sessions, get_expected_sessions(pings))
+
+
+def test_earlier_day_after_later_day(database):
+    later = get_pings(1500, "2022-10-02", 1, seed=1).sort_values("time")
+    earlier = get_pings(1500, "2022-10-01", 1, seed=2).sort_values("time")
+    upload_pings(database, later, "later.csv", "rep")
+    upload_pings(database, earlier, "earlier.csv", "rep")
+
+    sessions = sort_sessions(driver.get_df_from_db("session"))
+    pd.testing.assert_frame_equal(
+        sessions, get_expected_sessions(pd.concat([earlier, later]))
+    )
+
+
+def test_identifiers_of_reupload(database):
+    upload_pings(database, get_pings(500, "2022-10-01", 1, seed=3), "old.csv", "old")
+    upload_pings(database, get_pings(500, "2022-10-02", 1, seed=4), "new.csv", "new")
+    outputs = upload_pings(
+        database, get_pings(500, "2022-10-03", 1, seed=5), "old2.csv", "old"
+    )
+    assert outputs[-1] == ["old"]
@@ -82,7 +82,9 @@ def get_cas_statistics(session: DataSessions, identifier):
     return data
 
 
-def get_license_usage_table(license_data: LicenseUsage, license_identifier: list):
+def get_license_usage_table(
+    license_data: LicenseUsage, license_identifier: list, distinct=None
+):
     """
     Gets the data of the license usage
 
@@ -92,6 +94,9 @@ def get_license_usage_table(license_data: LicenseUsage, license_identifier: list
         LicenseUsage which represent the data used for the computation
     license_identifier:
         List of all license identifier
+    distinct: pd.DataFrame
+        estimated distinct resources per loader of all license identifier, as returned by
+        dash_app.background.get_distinct_values, None for no column of distinct resources
 
     Returns
     -------
@@ -104,7 +109,11 @@ def get_license_usage_table(license_data: LicenseUsage, license_identifier: list
     for ident in license_identifier:
         df[ident] = data[ident]
     df["Total"] = data["Total"]
-    return apply_thousand_seperator(df)
+    df = apply_thousand_seperator(df)
+    if distinct is not None:
+        # a resource used by several identifier is counted once
+        df["Distinct Resources"] = get_distinct_column(df["Loader"], distinct)
+    return df
 
 
 def get_multi_total_amount_table(session: DataSessions, idents):
@@ -124,7 +133,7 @@ def get_multi_total_amount_table(session: DataSessions, idents):
     return apply_thousand_seperator(data)
 
 
-def get_cluster_id_table(session: DataSessions, multi=False):
+def get_cluster_id_table(session: DataSessions, multi=False, distinct=None):
     """
     Parameter
     ---------
@@ -132,6 +141,9 @@ def get_cluster_id_table(session: DataSessions, multi=False):
          DataSession which represents the session which should be used for computation
     multi: bool
         True if cluster_id should be aggregated over all file identifier
+    distinct: pd.DataFrame
+        estimated distinct app instances per cluster_id of the session, as returned by
+        dash_app.background.get_distinct_values, None for no column of app instances
 
     Returns
     -------
@@ -142,8 +154,41 @@ def get_cluster_id_table(session: DataSessions, multi=False):
     data = session.get_multi_total_token_amount(
         session.get_cluster_ids(), "cluster_id", multi
     )
+    data = apply_thousand_seperator(data)
+    if distinct is not None:
+        data["App Instances"] = get_distinct_column(data["cluster_id"], distinct)
+    return data
 
-    return apply_thousand_seperator(data)
+
+def get_distinct_column(names: pd.Series, distinct: pd.DataFrame) -> pd.Series:
+    """
+    Parameter
+    ---------
+    names: pd.Series
+        the names of the rows of a table, the last row is the total of all names
+    distinct: pd.DataFrame
+        the columns name, distinct, lower and upper, as returned by dash_app.background.get_distinct_values
+
+    Returns
+    -------
+    pd.Series:
+        the estimated number of distinct values of every name with its bounds, e.g. 1 234 (1 190 - 1 280)
+    """
+    distinct = apply_thousand_seperator(
+        distinct[["name", "distinct", "lower", "upper"]].copy()
+    )
+    text = (
+        distinct["distinct"]
+        + " ("
+        + distinct["lower"]
+        + " - "
+        + distinct["upper"]
+        + ")"
+    )
+    text.index = distinct["name"]
+    names = names.copy()
+    names.iloc[-1] = "total"
+    return names.map(text).fillna("0")
 
 
 def apply_thousand_seperator(df: pd.DataFrame):
@@ -0,0 +1,135 @@
+"""
+This is downsampling.py.
+
+downsampling.py reduces the points of the time series of the graphs to a budget per trace. The browser renders at
+most a few thousand points per trace in a useful way, so long time intervals are downsampled before they are handed
+to plotly. Two methods are available: min-max keeps the smallest and the largest value of every bucket, so all peaks
+(e.g. the CAS maxima) stay visible; LTTB (largest triangle three buckets) keeps the point of every bucket which spans
+the largest triangle with its neighbours and preserves the shape of the series. Only lines are downsampled: a bar
+stands for a whole interval, so bar graphs use a coarser interval instead (see vis.graph_vis.get_bar_interval).
+"""
+import numpy as np
+import pandas as pd
+
+# Maximum number of points per trace
+POINT_BUDGET = 2000
+
+
+def get_minmax_indices(y: np.ndarray, budget: int) -> np.ndarray:
+    """Return the indices of the points which min-max downsampling keeps.
+
+    The points are split into budget // 2 buckets of the same size, the first and the last point and the smallest and
+    the largest value of every bucket are kept.
+
+    Parameters
+    ----------
+    y : np.ndarray
+        values of the series
+    budget : int
+        maximum number of points
+
+    Returns
+    -------
+    np.ndarray
+        sorted indices of the kept points
+    """
+    n = len(y)
+    buckets = max((budget - 2) // 2, 1)
+    bucket = np.arange(n) * buckets // n
+    order = np.lexsort((np.nan_to_num(y), bucket))
+    last = np.flatnonzero(np.diff(bucket[order], append=buckets))
+    first = np.concatenate([[0], last[:-1] + 1])
+    return np.unique(np.concatenate([[0, n - 1], order[first], order[last]]))
+
+
+def get_lttb_indices(x: np.ndarray, y: np.ndarray, budget: int) -> np.ndarray:
+    """Return the indices of the points which LTTB downsampling keeps.
+
+    Parameters
+    ----------
+    x : np.ndarray
+        positions of the points, as numbers
+    y : np.ndarray
+        values of the series
+    budget : int
+        maximum number of points
+
+    Returns
+    -------
+    np.ndarray
+        sorted indices of the kept points
+    """
+    n = len(y)
+    y = np.nan_to_num(y.astype(np.float64))
+    x = x.astype(np.float64)
+    # the first and the last point are kept, the others are split into budget - 2 buckets
+    edges = np.linspace(1, n - 1, max(budget - 2, 1) + 1).astype(np.int64)
+    indices = np.empty(len(edges) + 1, dtype=np.int64)
+    indices[0] = 0
+    indices[-1] = n - 1
+    previous = 0
+    for i in range(len(edges) - 1):
+        start, end = edges[i], edges[i + 1]
+        if i + 2 < len(edges):
+            following = slice(end, edges[i + 2])
+            next_x, next_y = x[following].mean(), y[following].mean()
+        else:
+            next_x, next_y = x[-1], y[-1]
+        # twice the area of the triangles of the previous kept point, the candidates and the next bucket
+        area = np.abs(
+            (x[previous] - next_x) * (y[start:end] - y[previous])
+            - (x[previous] - x[start:end]) * (next_y - y[previous])
+        )
+        previous = start + int(np.argmax(area))
+        indices[i + 1] = previous
+    return np.unique(indices)
+
+
+def downsample(
+    data: pd.DataFrame,
+    x: str,
+    columns: list,
+    method: str = "minmax",
+    budget: int = POINT_BUDGET,
+) -> pd.DataFrame:
+    """Reduce the rows of a time series frame to a budget of points per trace.
+
+    Every column is downsampled on its own with a share of the budget, the rows kept for any column are returned, so
+    each trace has at most budget points and keeps its own peaks.
+
+    Parameters
+    ----------
+    data : pd.DataFrame
+        time series with one row per time
+    x : str
+        name of the time column
+    columns : list of str
+        names of the columns which are shown as traces
+    method : str
+        "minmax" or "lttb"
+    budget : int
+        maximum number of points per trace
+
+    Returns
+    -------
+    pd.DataFrame
+        data itself if it has at most budget rows, otherwise the kept rows sorted by time
+    """
+    if len(data.index) <= budget or len(columns) == 0:
+        return data
+    if not data[x].is_monotonic_increasing:
+        data = data.sort_values(x)
+    share = max(budget // len(columns), 4)
+    if pd.api.types.is_datetime64_any_dtype(data[x]):
+        # nanoseconds since epoch, for naive and time zone aware times
+        positions = pd.DatetimeIndex(data[x]).asi8
+    else:
+        positions = data[x].to_numpy()
+    kept = []
+    for column in columns:
+        values = data[column].to_numpy(dtype=np.float64)
+        if method == "lttb":
+            kept.append(get_lttb_indices(positions, values, share))
+        else:
+            kept.append(get_minmax_indices(values, share))
+    return data.iloc[np.unique(np.concatenate(kept))]
@@ -1,7 +1,17 @@
+import pandas as pd
 import plotly.express as px
+from pandas.tseries.frequencies import to_offset
 from plotly.graph_objs import Figure
 
 from computation.data import DataSessions
+from vis.downsampling import POINT_BUDGET, downsample
+
+# Intervals of the time series graphs, from fine to coarse
+GRAPH_INTERVALS = ["15min", "30min", "H", "2H", "3H", "6H", "12H", "D", "7D"]
+# Minimal width of one interval of a time series graph in pixels
+PIXELS_PER_INTERVAL = 3
+# Width of a graph in pixels, if it isn't known
+GRAPH_WIDTH = 900
 
 
 def empty_fig():
@@ -19,30 +29,92 @@ def empty_fig():
     return fig
 
 
-def get_token_graph(session: DataSessions, graph_type: str) -> Figure:
+def get_default_interval(session: DataSessions) -> str:
+    """
+    Parameters
+    ----------
+    session: DataSession
+
+    Returns
+    -------
+    str
+        interval of the time series graphs of the whole session, 15 minutes for up to three days, otherwise one day
+    """
+    if session.get_amount_of_days() <= 3:
+        return "15min"
+    return "D"
+
+
+def get_interval(start: pd.Timestamp, end: pd.Timestamp, width: int = None) -> str:
+    """
+    Parameters
+    ----------
+    start: first visible time of a graph
+    end: last visible time of a graph
+    width: width of the graph in pixels, GRAPH_WIDTH if it is None
+
+    Returns
+    -------
+    str
+        finest interval of GRAPH_INTERVALS whose intervals between start and end fit into the width of the graph
+    """
+    intervals = max((width or GRAPH_WIDTH) // PIXELS_PER_INTERVAL, 1)
+    for interval in GRAPH_INTERVALS:
+        if (end - start) / pd.Timedelta(to_offset(interval)) <= intervals:
+            return interval
+    return GRAPH_INTERVALS[-1]
+
+
+def get_bar_interval(time: pd.Series, interval: str) -> str:
+    """
+    Parameters
+    ----------
+    time: times of the bars of a time series with the interval
+    interval: interval of the time series
+
+    Returns
+    -------
+    str
+        interval itself if the time series has at most POINT_BUDGET bars, otherwise the finest interval of
+        GRAPH_INTERVALS with at most POINT_BUDGET bars; bars aren't downsampled, since dropping a bar hides its
+        interval
+    """
+    if len(time.index) <= POINT_BUDGET:
+        return interval
+    return get_interval(time.min(), time.max(), POINT_BUDGET * PIXELS_PER_INTERVAL)
+
+
+def get_token_graph(
+    session: DataSessions, graph_type: str, interval: str = None
+) -> Figure:
     """
     Parameters
     ----------
     session: DataSession
     graph_type: either "bar" or "line"
+    interval: interval of the time series, get_default_interval if it is None
 
     Returns
     -------
     plotly.express
         figure (px.line) which shows the token usage for each product by time
     """
-    if session.get_amount_of_days() <= 3:
-        data = session.get_token_consumption(interval="15min")
-    else:
-        data = session.get_token_consumption()
+    interval = interval or get_default_interval(session)
+    data = session.get_token_consumption(interval=interval)
 
     if graph_type == "bar":
+        coarser = get_bar_interval(data["time"], interval)
+        if coarser != interval:
+            data = session.get_token_consumption(interval=coarser)
         fig = px.bar(
             data,
             x="time",
             y=["Viewing", "DMU", "Collaboration", "total"],
         )
     else:
+        data = downsample(
+            data, "time", ["Viewing", "DMU", "Collaboration", "total"], method="lttb"
+        )
         fig = px.line(
             data,
             x="time",
@@ -76,30 +148,35 @@ def get_fpc_graph(session: DataSessions) -> Figure:
     return fig
 
 
-def get_cas_graph(session: DataSessions, graph_type: str) -> Figure:
+def get_cas_graph(
+    session: DataSessions, graph_type: str, interval: str = None
+) -> Figure:
     """
     Parameters
     ----------
     session: DataSession
     graph_type: either "bar" or "line"
+    interval: interval of the time series, get_default_interval if it is None
 
     Returns
     -------
     plotly.express
         figure (px.line) which shows the number of concurrent active sessions by time
     """
-    if session.get_amount_of_days() <= 3:
-        data = session.get_cas(interval="15min")
-    else:
-        data = session.get_cas()
+    interval = interval or get_default_interval(session)
+    data = session.get_cas(interval=interval)
 
     if graph_type == "bar":
+        coarser = get_bar_interval(data["time"], interval)
+        if coarser != interval:
+            data = session.get_cas(interval=coarser)
         fig = px.bar(
             data,
             x="time",
             y="amount",
         )
     else:
+        data = downsample(data, "time", ["amount"])
         fig = px.line(
             data,
             x="time",
@@ -113,7 +190,7 @@ def get_cas_graph(session: DataSessions, graph_type: str) -> Figure:
 
 
 def get_token_cluster_id_comparison_graph(
-    session: DataSessions, cluster_ids: list, multi_cluster=False
+    session: DataSessions, cluster_ids: list, multi_cluster=False, interval=None
 ):
     """
     Parameters
@@ -122,20 +199,21 @@ def get_token_cluster_id_comparison_graph(
     cluster_ids: list or array containing all cluster ids
     multi_cluster: bool
         True if cluster_id should be aggregated over all file identifier
+    interval: str
+        interval of the time series, get_default_interval if it is None
 
     Returns
     -------
     plotly.express
         figure (px.line) which shows the total token usage for each file identifier
     """
-    if session.get_amount_of_days() <= 3:
-        data = session.get_selector_comparison_data(
-            cluster_ids, "cluster_id", interval="15min", multi_cluster=multi_cluster
-        )
-    else:
-        data = session.get_selector_comparison_data(
-            cluster_ids, "cluster_id", multi_cluster=multi_cluster
-        )
+    data = session.get_selector_comparison_data(
+        cluster_ids,
+        "cluster_id",
+        interval=interval or get_default_interval(session),
+        multi_cluster=multi_cluster,
+    )
+    data = downsample(data, "time", cluster_ids, method="lttb")
 
     fig = px.line(
         data,
@@ -150,7 +228,7 @@ def get_token_cluster_id_comparison_graph(
 
 
 def get_cas_cluster_id_comparison_graph(
-    session: DataSessions, cluster_ids: list, multi_cluster=False
+    session: DataSessions, cluster_ids: list, multi_cluster=False, interval=None
 ):
     """
     Parameters
@@ -159,20 +237,21 @@ def get_cas_cluster_id_comparison_graph(
     cluster_ids: list or array containing all cluster ids
     multi_cluster: bool
         True if cluster_id should be aggregated over all file identifier
+    interval: str
+        interval of the time series, get_default_interval if it is None
 
     Returns
     -------
     plotly.express
         figure (px.line) which shows the total token usage for each file identifier
     """
-    if session.get_amount_of_days() <= 3:
-        data = session.get_multi_cas(
-            cluster_ids, "cluster_id", interval="15min", multi_cluster=multi_cluster
-        )
-    else:
-        data = session.get_multi_cas(
-            cluster_ids, "cluster_id", multi_cluster=multi_cluster
-        )
+    data = session.get_multi_cas(
+        cluster_ids,
+        "cluster_id",
+        interval=interval or get_default_interval(session),
+        multi_cluster=multi_cluster,
+    )
+    data = downsample(data, "time", cluster_ids)
 
     fig = px.line(
         data,
@@ -185,7 +264,7 @@ def get_cas_cluster_id_comparison_graph(
 
 
 def get_multi_files_graph(
-    session: DataSessions, idents: list, graph_type: str
+    session: DataSessions, idents: list, graph_type: str, interval: str = None
 ) -> Figure:
     """
     Parameters
@@ -193,26 +272,29 @@ def get_multi_files_graph(
     session: DataSession
     idents: list or array containing all identifier
     graph_type: either "bar" or "line"
+    interval: interval of the time series, get_default_interval if it is None
 
     Returns
     -------
     plotly.express
         figure (px.line) which shows the total token usage for each file identifier
     """
-    if session.get_amount_of_days() <= 3:
-        data = session.get_selector_comparison_data(
-            idents, "identifier", interval="15min"
-        )
-    else:
-        data = session.get_selector_comparison_data(idents, "identifier")
+    interval = interval or get_default_interval(session)
+    data = session.get_selector_comparison_data(idents, "identifier", interval=interval)
 
     if graph_type == "bar":
+        coarser = get_bar_interval(data["time"], interval)
+        if coarser != interval:
+            data = session.get_selector_comparison_data(
+                idents, "identifier", interval=coarser
+            )
         fig = px.bar(
             data,
             x="time",
             y=idents,
         )
     else:
+        data = downsample(data, "time", idents, method="lttb")
         fig = px.line(
             data,
             x="time",
@@ -227,7 +309,7 @@ def get_multi_files_graph(
     return fig
 
 
-def get_multi_cas_graph(session: DataSessions, idents) -> Figure:
+def get_multi_cas_graph(session: DataSessions, idents, interval: str = None) -> Figure:
     """
     Parameters
     ----------
@@ -235,16 +317,18 @@ def get_multi_cas_graph(session: DataSessions, idents) -> Figure:
          DataSession
     idents:
         list or array containing all identifier
+    interval:
+        interval of the time series, get_default_interval if it is None
 
     Returns
     -------
     plotly.express
         figure (px.line) which shows the total token usage for each file identifier
     """
-    if session.get_amount_of_days() <= 3:
-        data = session.get_multi_cas(idents, "identifier", interval="15min")
-    else:
-        data = session.get_multi_cas(idents, "identifier")
+    data = session.get_multi_cas(
+        idents, "identifier", interval=interval or get_default_interval(session)
+    )
+    data = downsample(data, "time", idents)
     fig = px.line(
         data,
         x="time",
@@ -1,19 +1,79 @@
+import io
+
 import pandas as pd
+from pptx import Presentation
 from pptx.enum.shapes import PP_PLACEHOLDER
 from pptx.enum.text import PP_ALIGN
+from pptx.util import Cm
 
 # Light Style 1 - Accent 6
 TABLE_STYLE = "{68D230F3-CF80-4859-8CE7-A43EE81993B5}"
 
+TEMPLATE_PATH = "./assets/report_analysis_template.pptx"
+
+
+def create_presentation(
+    start_date: str,
+    end_date: str,
+    report_statistics: dict,
+    graphs: list,
+    license_data: dict,
+) -> bytes:
+    """
+    Create the report presentation from the template.
+
+    Parameters
+    ----------
+    start_date : the first day of the report
+    end_date : the last day of the report
+    report_statistics : the contents of the report statistics table, no slide if it is empty
+    graphs : list of tuple(str, dict, bytes) with the name, the contents of the table and the PNG image of every graph
+    license_data : the contents of the license usage table, no slide if it is empty
+
+    Returns
+    -------
+    bytes of the pptx file
+    """
+    prs = Presentation(TEMPLATE_PATH)
+
+    # title slide
+    prs.slides[0].shapes[0].text = "Report Analysis"
+    prs.slides[0].shapes[1].text = start_date + " - " + end_date
+
+    # report Statistics slide
+    if report_statistics:
+        slide = prs.slides.add_slide(prs.slide_layouts[4])
+        slide.shapes.title.text = "Report Statistics"
+        set_table(slide, report_statistics, Cm(5))
+
+    # graph & statistic slides
+    for name, additional, image in graphs:
+        slide = prs.slides.add_slide(
+            prs.slide_layouts[2] if additional else prs.slide_layouts[3]
+        )
+        slide.shapes.title.text = name
+        set_graph(slide, io.BytesIO(image))
+        set_table(slide, additional)
+
+    # license usage slide
+    if license_data:
+        slide = prs.slides.add_slide(prs.slide_layouts[4])
+        slide.shapes.title.text = "License Usage"
+        set_table(slide, license_data)
+
+    report = io.BytesIO()
+    prs.save(report)
+    return report.getvalue()
+
 
-def set_graph(slide, img_path: str):
+def set_graph(slide, img):
     """
     Add a graph to a slides PicturePlaceholder.
 
     Parameters
     ----------
     slide : the slide where the table is to be added to
-    img_path : the graphs location
+    img : the graphs location or a file-like object with the image
 
     Returns
     -------
@@ -21,7 +81,7 @@ def set_graph(slide, img_path: str):
     """
     for shape in slide.shapes:
         if shape.placeholder_format.type == PP_PLACEHOLDER.PICTURE:
-            shape.insert_picture(img_path)
+            shape.insert_picture(img)
 
 
 def set_table(slide, additional: dict, column_width=None):
@@ -0,0 +1,87 @@
+"""
+This is rendering.py.
+
+rendering.py renders figures to PNG images for the export. Kaleido handles one image at a time per process and needs
+seconds to start, so the images are rendered by a pool of processes which is started once and kept: every process
+starts its Kaleido when it is created and reuses it for all following images. With one worker the images are
+rendered in the calling process, whose Kaleido is kept as well.
+"""
+
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import plotly.io as pio
+
+# Number of processes which render images
+WORKERS = os.cpu_count() or 1
+
+# Started pools of rendering processes per number of processes
+pools = {}
+
+
+def start_kaleido():
+    """Start Kaleido in a new process of the pool by rendering an empty image."""
+    pio.to_image({"data": [], "layout": {}}, format="png", validate=False)
+
+
+def render_png(figure: str) -> bytes:
+    """
+    Parameters
+    ----------
+    figure : str
+        the figure as JSON
+
+    Returns
+    -------
+    bytes:
+        the figure as PNG image
+    """
+    return pio.to_image(json.loads(figure), format="png", validate=False)
+
+
+def get_pool(workers: int) -> ProcessPoolExecutor:
+    """
+    Parameters
+    ----------
+    workers : int
+        number of processes
+
+    Returns
+    -------
+    ProcessPoolExecutor:
+        the pool of rendering processes, it is started on the first call
+    """
+    if workers not in pools:
+        pools[workers] = ProcessPoolExecutor(workers, initializer=start_kaleido)
+    return pools[workers]
+
+
+def render_pngs(figures: list, workers: int = None) -> list:
+    """
+    Renders figures concurrently
+
+    Parameters
+    ----------
+    figures : list of str
+        the figures as JSON
+    workers : int
+        number of processes, None for WORKERS, with one worker the figures are rendered in the calling process
+
+    Returns
+    -------
+    list of bytes:
+        the PNG images in the order of the figures
+    """
+    if not figures:
+        return []
+    workers = workers or WORKERS
+    if workers == 1:
+        return [render_png(figure) for figure in figures]
+    try:
+        return list(get_pool(workers).map(render_png, figures))
+    except BrokenProcessPool:
+        # a process of the pool died, the next export starts a new pool
+        del pools[workers]
+        raise
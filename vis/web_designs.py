@@ -202,7 +202,10 @@ def body_feature():
             html.Div(
                 [
                     html.Div(
-                        [],
+                        [
+                            html.Div("", id="cache_status", className="cache-status"),
+                            html.Div("", id="cache_ready", className="cache-status"),
+                        ],
                         className="left-column",
                     ),
                     html.Div(  # content: graphs + data
@@ -233,14 +236,14 @@ def body_feature():
                                 [
                                     dbc.Col(
                                         html.Div(
-                                            dcc.Graph(figure=empty_fig()),
+                                            dcc.Graph(id="figure1", figure=empty_fig()),
                                             id="graph1",
                                             className="graph",
                                         )
                                     ),
                                     dbc.Col(
                                         html.Div(
-                                            dcc.Graph(figure=empty_fig()),
+                                            dcc.Graph(id="figure2", figure=empty_fig()),
                                             id="graph2",
                                             className="graph",
                                         )
@@ -390,19 +393,10 @@ def stores():
         [
             dcc.Store(id="filename", data=""),
             dcc.Store(id="filename_license", data=""),
-            html.Div(
-                children=[
-                    dcc.Graph(figure=empty_fig()),
-                    dcc.Graph(figure=empty_fig()),
-                    dcc.Graph(figure=empty_fig()),
-                    dcc.Graph(figure=empty_fig()),
-                    dcc.Graph(figure=empty_fig()),
-                    dcc.Graph(figure=empty_fig()),
-                ],
-                id="graphs-store",
-                style={"display": "none"},
-            ),
-            dcc.Store(id="additions-store", data={"0": {}, "1": {}}),
+            dcc.Store(id="feature_identifiers", data=[]),
+            dcc.Store(id="view-store", data=""),
+            dcc.Store(id="zoom1", data=None),
+            dcc.Store(id="zoom2", data=None),
             dcc.Store(id="license-store", data={}),
             dcc.Store(id="ident_num", data=0),
             dcc.Store(id="ident_names", data=0),